@@ -0,0 +1,366 @@
+"""Banc d'essai du débit de scan sur un corpus synthétique reproductible
+
+Exemples:
+    python benchmarks/scan_benchmark.py --corpus /tmp/av_corpus --output bench.json
+    python benchmarks/scan_benchmark.py --scale 0.1 --profiles quick,full --save-baseline baseline.json
+    python benchmarks/scan_benchmark.py --baseline baseline.json --tolerance 0.15
+
+Le corpus (petits fichiers, gros fichiers, arborescence profonde, archives et
+échantillons malveillants connus) est généré à partir d'une graine: deux
+générations avec les mêmes paramètres produisent les mêmes fichiers. Chaque
+profil de scan est mesuré dans un processus séparé (pic de mémoire propre à ce
+profil) avec une base de signatures dédiée, sans toucher à data/users.db.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Version du format du corpus: une modification du générateur impose une régénération
+CORPUS_VERSION = 1
+
+DEFAULT_SEED = 1337
+DEFAULT_PROFILES = ("quick", "full", "background", "maximum")
+
+# Composition du corpus pour scale=1.0
+TINY_FILES = 5000
+TINY_DIRECTORIES = 50
+HUGE_FILES = 2
+HUGE_FILE_SIZE = 64 * 1024 * 1024
+DEEP_TREE_DEPTH = 40
+DEEP_FILES_PER_LEVEL = 2
+ARCHIVES = 30
+ARCHIVE_MEMBERS = 20
+PLANTED_SAMPLES = 10
+
+# Nombre de fichiers scannés un par un pour mesurer la latence par fichier
+LATENCY_SAMPLE = 500
+
+# Métriques comparées à la référence: True si une valeur plus élevée est meilleure
+COMPARED_METRICS = {
+    "files_per_second": True,
+    "mb_per_second": True,
+    "latency_p50_ms": False,
+    "latency_p99_ms": False,
+    "peak_rss_mb": False,
+}
+DEFAULT_TOLERANCE = 0.10
+
+WORDS = (b"alpha", b"bravo", b"config", b"data", b"export", b"file", b"import", b"log",
+         b"module", b"return", b"system", b"user", b"value", b"window", b"\n", b" ", b"=")
+
+def _text_blob(rng, size):
+    """Contenu texte compressible (journaux, sources, configuration)"""
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        parts.append(word)
+        length += len(word)
+    return b"".join(parts)[:size]
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def _write_huge(path, rng, size):
+    # Écriture par blocs: le fichier n'est jamais entièrement en mémoire
+    block = 4 * 1024 * 1024
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            chunk = min(block, remaining)
+            f.write(rng.randbytes(chunk))
+            remaining -= chunk
+
+def _malware_sample(rng, index):
+    """Échantillon malveillant fictif: en-tête MZ suivi d'octets aléatoires"""
+    return b"MZ" + rng.randbytes(2046 + index * 512)
+
+def generate_corpus(corpus_dir, seed=DEFAULT_SEED, scale=1.0):
+    """Génère le corpus (ou réutilise un corpus identique déjà généré) et retourne son manifeste"""
+    corpus_dir = os.path.abspath(corpus_dir)
+    manifest_path = os.path.join(corpus_dir, "manifest.json")
+    settings = {"version": CORPUS_VERSION, "seed": seed, "scale": scale}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("settings") == settings:
+            return manifest
+        raise SystemExit(f"{corpus_dir} contient un corpus généré avec d'autres paramètres: {manifest.get('settings')}")
+    if os.path.isdir(corpus_dir) and os.listdir(corpus_dir):
+        raise SystemExit(f"{corpus_dir} n'est pas vide et ne contient pas de corpus")
+
+    rng = random.Random(seed)
+    files_dir = os.path.join(corpus_dir, "files")
+    counts = {
+        "tiny": max(1, int(TINY_FILES * scale)),
+        "huge": max(1, int(round(HUGE_FILES * min(scale, 1.0)))),
+        "deep_levels": max(2, int(DEEP_TREE_DEPTH * min(scale, 1.0))),
+        "archives": max(2, int(ARCHIVES * scale)),
+        "planted": max(2, int(PLANTED_SAMPLES * min(scale, 1.0)))
+    }
+    huge_size = max(1024 * 1024, int(HUGE_FILE_SIZE * min(scale, 1.0)))
+
+    # Nombreux petits fichiers répartis dans des répertoires voisins
+    for index in range(counts["tiny"]):
+        directory = os.path.join(files_dir, "tiny", f"d{index % TINY_DIRECTORIES:03d}")
+        _write(os.path.join(directory, f"f{index:06d}.txt"), _text_blob(rng, rng.randint(16, 4096)))
+
+    # Quelques gros fichiers incompressibles
+    os.makedirs(os.path.join(files_dir, "huge"), exist_ok=True)
+    for index in range(counts["huge"]):
+        _write_huge(os.path.join(files_dir, "huge", f"blob{index}.bin"), rng, huge_size)
+
+    # Arborescence profonde
+    directory = os.path.join(files_dir, "deep")
+    for level in range(counts["deep_levels"]):
+        directory = os.path.join(directory, f"level{level:02d}")
+        for index in range(DEEP_FILES_PER_LEVEL):
+            _write(os.path.join(directory, f"item{index}.cfg"), _text_blob(rng, rng.randint(64, 8192)))
+
+    # Échantillons malveillants dispersés dans le corpus (leurs condensats sont enregistrés comme signatures)
+    planted = []
+    samples = [_malware_sample(rng, index) for index in range(counts["planted"])]
+    for index, sample in enumerate(samples[1:], start=1):
+        where = rng.choice(("tiny/d%03d" % rng.randrange(TINY_DIRECTORIES), "deep", "huge"))
+        path = os.path.join(files_dir, where, f"planted{index:02d}.exe")
+        _write(path, sample)
+        planted.append(os.path.relpath(path, corpus_dir))
+
+    # Archives zip et tar.gz; le premier échantillon n'existe qu'à l'intérieur d'une archive
+    for index in range(counts["archives"]):
+        members = [(f"doc{member:02d}.txt", _text_blob(rng, rng.randint(256, 16384)))
+                   for member in range(ARCHIVE_MEMBERS)]
+        if index == 0:
+            members.append(("setup/installer.exe", samples[0]))
+        if index % 3 == 2:
+            path = os.path.join(files_dir, "archives", f"bundle{index:03d}.tar.gz")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tarfile.open(path, "w:gz") as archive:
+                for name, data in members:
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    info.mtime = 0
+                    archive.addfile(info, io.BytesIO(data))
+        else:
+            path = os.path.join(files_dir, "archives", f"bundle{index:03d}.zip")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for name, data in members:
+                    archive.writestr(zipfile.ZipInfo(name, date_time=(2020, 1, 1, 0, 0, 0)), data, zipfile.ZIP_DEFLATED)
+        if index == 0:
+            planted.append(os.path.relpath(path, corpus_dir))
+
+    file_count = 0
+    total_bytes = 0
+    for directory, _, names in os.walk(files_dir):
+        for name in names:
+            file_count += 1
+            total_bytes += os.path.getsize(os.path.join(directory, name))
+
+    manifest = {
+        "settings": settings,
+        "counts": counts,
+        "file_count": file_count,
+        "total_bytes": total_bytes,
+        "planted": planted,
+        "signatures": [
+            {"md5": hashlib.md5(sample).hexdigest(), "size": len(sample), "name": f"Bench.Planted.{index:02d}"}
+            for index, sample in enumerate(samples)
+        ]
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def _warm_page_cache(files_dir):
+    """Lit tout le corpus une fois: chaque profil est mesuré avec le cache disque chaud"""
+    for directory, _, names in os.walk(files_dir):
+        for name in names:
+            with open(os.path.join(directory, name), "rb") as f:
+                while f.read(1024 * 1024):
+                    pass
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(percent / 100.0 * (len(values) - 1)))))
+    return values[index]
+
+def _peak_rss_mb():
+    """Pic de mémoire résidente du processus courant"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+        return round(peak / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+    except ImportError:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, "peak_wset", memory.rss) / (1024.0 * 1024.0), 1)
+
+def run_profile(corpus_dir, profile, repeat=1, latency_sample=LATENCY_SAMPLE, timing=False):
+    """Mesure un profil dans le processus courant (appelé dans un processus enfant)"""
+    corpus_dir = os.path.abspath(corpus_dir)
+    # Base de signatures propre au banc d'essai, à définir avant l'import du moteur
+    os.environ["DATABASE_FILE"] = os.path.join(corpus_dir, f"benchmark-{profile}.db")
+    sys.path.insert(0, ROOT_DIR)
+    from src.database import init_database, add_malware_hash
+    from src.hashing import compute_prehash
+    from src.antivirus_engine import SamShakkurAntivirus
+
+    with open(os.path.join(corpus_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    files_dir = os.path.join(corpus_dir, "files")
+
+    init_database()
+    for signature in manifest["signatures"]:
+        add_malware_hash(signature["md5"], signature["name"], 8, file_size=signature["size"])
+
+    # Scans complets, sans cache incrémental ni point de reprise: chaque passe relit tout le corpus
+    scan_options = {"profile": profile, "incremental": False, "checkpoint": False, "keep_results": False,
+                    "timing": timing}
+    antivirus = SamShakkurAntivirus()
+    runs = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        success, message = antivirus.scan_directory(files_dir, scan_options)
+        elapsed = time.perf_counter() - started
+        if not success:
+            raise RuntimeError(message)
+        runs.append((elapsed, antivirus.files_scanned, antivirus.threats_detected, antivirus.timing_report))
+    elapsed, files_scanned, threats_detected, timing_report = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    scan_options["timing"] = False
+
+    # Latence par fichier: scan individuel d'un échantillon régulier du corpus
+    paths = sorted(
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(files_dir)
+        for name in names
+    )
+    step = max(1, len(paths) // latency_sample) if latency_sample else len(paths) + 1
+    latencies = []
+    for path in paths[::step][:latency_sample]:
+        started = time.perf_counter()
+        antivirus.scan_file(path, scan_options)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+
+    total_mb = manifest["total_bytes"] / (1024.0 * 1024.0)
+    result = {
+        "profile": profile,
+        "elapsed_seconds": round(elapsed, 3),
+        "files_scanned": files_scanned,
+        "threats_detected": threats_detected,
+        "planted_samples": len(manifest["planted"]),
+        "files_per_second": round(manifest["file_count"] / elapsed, 1) if elapsed else None,
+        "mb_per_second": round(total_mb / elapsed, 1) if elapsed else None,
+        "latency_p50_ms": round(_percentile(latencies, 50), 3) if latencies else None,
+        "latency_p99_ms": round(_percentile(latencies, 99), 3) if latencies else None,
+        "latency_samples": len(latencies),
+        "peak_rss_mb": _peak_rss_mb(),
+        "runs": len(runs)
+    }
+    if timing_report is not None:
+        result["timing"] = timing_report
+    return result
+
+def _run_child(corpus_dir, profile, repeat, latency_sample, timing=False):
+    command = [sys.executable, os.path.abspath(__file__), "--corpus", corpus_dir, "--child", profile,
+               "--repeat", str(repeat), "--latency-sample", str(latency_sample)]
+    if timing:
+        command.append("--timing")
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=ROOT_DIR)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Échec du profil {profile}:\n{completed.stderr.strip()}")
+    # Le moteur écrit ses messages sur la sortie standard: le résultat est la dernière ligne
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def compare_with_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare chaque profil à la référence; retourne la liste des régressions au-delà de la tolérance"""
+    regressions = []
+    reference = {result["profile"]: result for result in baseline.get("results", [])}
+    for result in report["results"]:
+        previous = reference.get(result["profile"])
+        if previous is None:
+            continue
+        result["baseline"] = {}
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            current, before = result.get(metric), previous.get(metric)
+            if not current or not before:
+                continue
+            change = (current - before) / before
+            result["baseline"][metric] = {"baseline": before, "change": round(change, 4)}
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{result['profile']}: {metric} {before} -> {current} ({change:+.1%})")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai du débit de scan")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "antivirus_benchmark_corpus"),
+                        help="répertoire du corpus (généré s'il n'existe pas)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--scale", type=float, default=1.0, help="facteur de taille du corpus")
+    parser.add_argument("--profiles", default=",".join(DEFAULT_PROFILES))
+    parser.add_argument("--repeat", type=int, default=1, help="passes par profil (médiane retenue)")
+    parser.add_argument("--latency-sample", type=int, default=LATENCY_SAMPLE)
+    parser.add_argument("--timing", action="store_true", help="détail du temps par étape de scan")
+    parser.add_argument("--output", help="fichier JSON du rapport (sortie standard par défaut)")
+    parser.add_argument("--baseline", help="rapport de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="écart relatif toléré avant de signaler une régression")
+    parser.add_argument("--save-baseline", help="enregistre le rapport comme nouvelle référence")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_profile(args.corpus, args.child, args.repeat, args.latency_sample, args.timing)))
+        return 0
+
+    manifest = generate_corpus(args.corpus, args.seed, args.scale)
+    _warm_page_cache(os.path.join(args.corpus, "files"))
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": {"python": platform.python_version(), "system": platform.platform(), "cpus": os.cpu_count()},
+        "corpus": {key: manifest[key] for key in ("settings", "counts", "file_count", "total_bytes")},
+        "results": []
+    }
+    for profile in [name.strip() for name in args.profiles.split(",") if name.strip()]:
+        print(f"Profil {profile}...", file=sys.stderr)
+        report["results"].append(_run_child(args.corpus, profile, args.repeat, args.latency_sample, args.timing))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(output)
+
+    for regression in regressions:
+        print(f"Régression: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
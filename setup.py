@@ -3,7 +3,7 @@ import os
 
 APP = ['main.py']
 DATA_FILES = [
-    ('src', ['src/app.py', 'src/antivirus_engine.py', 'src/webhook_server.py', 'src/database.py']),
+    ('src', ['src/app.py', 'src/antivirus_engine.py', 'src/webhook_server.py', 'src/database.py', 'src/hashing.py', 'src/traversal.py', 'src/signature_index.py', 'src/content_signatures.py', 'src/scan_sinks.py', 'src/scan_result.py', 'src/realtime_monitor.py', 'src/fuzzy_hash.py', 'src/archive_scanner.py', 'src/binary_analyzer.py', 'src/entropy.py', 'src/resource_governor.py', 'src/scan_rules.py', 'src/scan_dedupe.py', 'src/quarantine.py', 'src/reputation_client.py', 'src/scan_timing.py', 'src/metrics.py']),
     ('data', ['data/users.db']),
     ('resources', ['resources/icon.ico'])
 ]
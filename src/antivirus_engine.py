@@ -1,12 +1,122 @@
 import os
-import tempfile
 import hashlib
 import time
-import shutil
+import threading
 import psutil
 from datetime import datetime
-import requests
-from src.database import check_hash, add_scan_history
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from src.database import (add_scan_history, check_hashes, ScanCache, save_scan_checkpoint,
+                          get_scan_checkpoint, delete_scan_checkpoint)
+from src.hashing import compute_file_digests, compute_stream_digests, compute_prehash, SUPPORTED_ALGORITHMS
+from src.traversal import DirectoryWalker
+from src.scan_rules import ScanRules
+from src.scan_dedupe import ScanDeduplicator, CONTENT_DIGEST
+from src.quarantine import QuarantineStore
+from src.reputation_client import ReputationClient
+from src.scan_timing import ScanTiming, NULL_SCAN_TIMING
+from src.signature_index import SignatureIndex
+from src.scan_result import ScanResult, ScanResultSet
+from src.realtime_monitor import RealtimeMonitor
+from src.fuzzy_hash import FuzzyHasher
+from src.binary_analyzer import analyze_binary, binary_heuristics
+from src.entropy import EntropyAnalyzer, entropy_heuristics
+from src.resource_governor import ResourceGovernor
+from src.archive_scanner import (ArchiveScanner, is_archive_candidate, archive_container,
+                                 MAX_ARCHIVE_DEPTH, MAX_ARCHIVE_TOTAL_BYTES, MAX_ARCHIVE_MEMBERS)
+
+# Nombre de threads par défaut pour le hachage (travail limité par les E/S)
+DEFAULT_SCAN_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Nombre maximal de lots en cours de traitement par thread de scan
+MAX_PENDING_PER_WORKER = 2
+
+# Intervalle minimal entre deux points de reprise d'un scan de répertoire (secondes)
+CHECKPOINT_INTERVAL = 30.0
+
+# Taille des micro-lots de fichiers (une vérification groupée des hashs par lot)
+DEFAULT_BATCH_SIZE = 32
+
+# Réglages du régulateur de ressources (None: aucune limite ni changement de priorité)
+NO_GOVERNOR = {
+    "cpu_ceiling": None,  # Charge CPU système maximale (%)
+    "disk_busy_ceiling": None,  # Occupation maximale du disque le plus sollicité (%)
+    "memory_ceiling": None,  # Mémoire utilisée maximale (%)
+    "io_rate_limit": None,  # Débit de lecture maximal (octets par seconde)
+    "nice": None,  # Priorité CPU des threads de scan
+    "ionice": None,  # Classe de priorité d'E/S des threads de scan ("idle", "best_effort")
+}
+GOVERNOR_KEYS = tuple(NO_GOVERNOR)
+
+# Profils de scan: condensats calculés pour chaque fichier, parallélisme et ressources
+SCAN_PROFILES = {
+    "quick": {
+        "hash_algorithms": None,  # Seulement les condensats présents dans la base de signatures
+        "content_scan": False,
+        "fuzzy_hash": False,
+        "scan_archives": False,
+        "entropy": False,
+        "size_prefilter": True,  # Pas de lecture si aucune signature n'a la taille du fichier
+        "prehash": True,  # Début et fin du fichier d'abord: lecture complète seulement en cas de collision
+        "workers": DEFAULT_SCAN_WORKERS,
+        "process_workers": 0,
+        "batch_size": DEFAULT_BATCH_SIZE,
+    },
+    "full": {
+        "hash_algorithms": SUPPORTED_ALGORITHMS,
+        "content_scan": True,  # Recherche des signatures de contenu pendant la lecture
+        "fuzzy_hash": True,  # Condensat flou pour détecter les variantes des familles connues
+        "scan_archives": True,  # Analyse en mémoire des membres des archives zip/tar/gz/bz2/xz
+        "entropy": True,  # Entropie du fichier et des fenêtres glissantes (empaquetage, chiffrement)
+        "size_prefilter": False,
+        "prehash": False,
+        "workers": DEFAULT_SCAN_WORKERS,
+        "process_workers": 0,
+        "batch_size": DEFAULT_BATCH_SIZE,
+    },
+}
+SCAN_PROFILES["quick"].update(NO_GOVERNOR)
+SCAN_PROFILES["full"].update(NO_GOVERNOR)
+
+# Arrière-plan: analyse complète qui cède la machine aux charges de production
+SCAN_PROFILES["background"] = dict(
+    SCAN_PROFILES["full"],
+    workers=max(2, (os.cpu_count() or 1) // 2),
+    cpu_ceiling=50,
+    disk_busy_ceiling=60,
+    memory_ceiling=85,
+    io_rate_limit=32 * 1024 * 1024,
+    nice=15,
+    ionice="idle",
+)
+
+# Vitesse maximale: analyse complète sans limite, parallélisme élargi
+SCAN_PROFILES["maximum"] = dict(
+    SCAN_PROFILES["full"],
+    workers=min(64, 2 * (os.cpu_count() or 1) + 8),
+    batch_size=2 * DEFAULT_BATCH_SIZE,
+)
+
+# Score de similarité (0-100) à partir duquel un fichier est signalé comme variante d'une famille connue
+FUZZY_MATCH_THRESHOLD = 80
+
+# Niveau de risque minimal d'une signature du service de réputation pour signaler le fichier
+# (les signatures de niveau 1, comme le fichier vide, restent informatives)
+CLOUD_MIN_RISK_LEVEL = 2
+
+# Extensions attendues pour un exécutable ELF/PE (une autre extension: exécutable déguisé)
+EXECUTABLE_EXTENSIONS = ('.exe', '.dll', '.sys', '.scr', '.com', '.cpl', '.ocx', '.drv', '.efi',
+                         '.so', '.o', '.ko', '.elf', '.bin', '.out', '.axf')
+
+# Moteur propre à chaque processus d'analyse (voir _run_behavior_analysis)
+_process_engine = None
+
+def _run_behavior_analysis(file_path, file_size=None, entropy=None):
+    """Point d'entrée des processus d'analyse comportementale"""
+    global _process_engine
+    if _process_engine is None:
+        _process_engine = SamShakkurAntivirus()
+    return _process_engine.analyze_file_behavior(file_path, file_size, entropy)
 
 class LanguageManager:
     """Gestionnaire de langues pour l'interface multilingue"""
@@ -379,9 +489,11 @@ class SamShakkurAntivirus:
     
     def __init__(self):
         self.language_manager = LanguageManager()
-        self.scan_results = []
+        self.scan_results = ScanResultSet()
+        self.threats = []
         self.threats_detected = 0
         self.files_scanned = 0
+        self.scan_progress = 0
         self.scan_start_time = None
         self.scan_end_time = None
         self.current_user = None
@@ -389,6 +501,23 @@ class SamShakkurAntivirus:
         self.is_premium = False
         self.server_connected = False
         self.server_status = {}
+        self.analyzer_pool = None
+        self.scan_cache = None
+        self.scan_cache_lock = threading.Lock()
+        self.signature_index = SignatureIndex()
+        self.realtime_monitor = None
+        # Détections de la protection en temps réel, écrites par les threads du moniteur
+        self.realtime_threats = []
+        self.realtime_lock = threading.Lock()
+        self.resource_governor = None
+        self.resource_stats = None
+        self.scan_skipped = None
+        self.scan_dedupe = None
+        self.dedupe_stats = None
+        self.quarantine_store = QuarantineStore()
+        self.reputation_client = ReputationClient()
+        self.scan_timing = NULL_SCAN_TIMING
+        self.timing_report = None
     
     def set_user(self, email):
         """Définit l'utilisateur courant et récupère son statut d'abonnement"""
@@ -398,19 +527,44 @@ class SamShakkurAntivirus:
     def calculate_file_hash(self, file_path, algorithm="md5"):
         """Calcule le hash d'un fichier"""
         try:
-            hash_func = hashlib.new(algorithm)
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_func.update(chunk)
-            return hash_func.hexdigest()
+            return compute_file_digests(file_path, (algorithm,))[algorithm]
         except Exception as e:
             return None
     
-    def analyze_file_behavior(self, file_path):
+    def calculate_file_hashes(self, file_path, algorithms=SUPPORTED_ALGORITHMS, consumers=()):
+        """Calcule plusieurs hashs d'un fichier en une seule lecture"""
+        try:
+            return compute_file_digests(file_path, algorithms, consumers)
+        except Exception as e:
+            return {}
+    
+    def get_scan_profile(self, scan_options):
+        """Retourne le profil de scan correspondant aux options"""
+        profile_name = scan_options.get("profile") or ("full" if scan_options.get("deep_scan", False) else "quick")
+        profile = dict(SCAN_PROFILES.get(profile_name, SCAN_PROFILES["full"]))
+        if scan_options.get("hash_algorithms"):
+            profile["hash_algorithms"] = tuple(scan_options["hash_algorithms"])
+        elif profile["hash_algorithms"] is None:
+            profile["hash_algorithms"] = self.signature_index.required_algorithms() or ("md5",)
+        for key in ("content_scan", "fuzzy_hash", "scan_archives", "entropy", "size_prefilter", "prehash"):
+            if scan_options.get(key) is not None:
+                profile[key] = bool(scan_options[key])
+        for key in ("workers", "process_workers", "batch_size"):
+            if scan_options.get(key) is not None:
+                profile[key] = max(0, int(scan_options[key]))
+        for key in GOVERNOR_KEYS:
+            if key in scan_options:
+                profile[key] = scan_options[key]
+        profile["workers"] = max(1, profile["workers"])
+        profile["batch_size"] = max(1, profile["batch_size"])
+        return profile
+    
+    def analyze_file_behavior(self, file_path, file_size=None, entropy=None):
         """Analyse le comportement d'un fichier (simulé)"""
         try:
-            # Simulation d'analyse comportementale
-            file_size = os.path.getsize(file_path)
+            # Simulation d'analyse comportementale (taille reprise du parcours si disponible)
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
             score = 0.0
             reasons = []
             
@@ -419,9 +573,25 @@ class SamShakkurAntivirus:
                 score += 0.2
                 reasons.append("Fichier volumineux")
             
-            if file_path.lower().endswith(('.exe', '.dll', '.bat', '.cmd', '.ps1')):
+            # Structure ELF/PE lue dans les en-têtes (l'extension seule ne suffit pas)
+            binary = analyze_binary(file_path)
+            if binary is not None:
+                extension = os.path.splitext(file_path)[1].lower()
+                if extension and extension not in EXECUTABLE_EXTENSIONS and not extension[1:].isdigit():
+                    score += 0.3
+                    reasons.append(f"Exécutable {binary['format']} déguisé")
+                binary_score, binary_reasons = binary_heuristics(binary, file_size)
+                score += binary_score
+                reasons.extend(binary_reasons)
+            elif file_path.lower().endswith(('.bat', '.cmd', '.ps1')):
                 score += 0.3
-                reasons.append("Fichier exécutable")
+                reasons.append("Script exécutable")
+            
+            # Entropie calculée pendant la lecture du scan (contenu empaqueté ou chiffré)
+            if entropy is not None:
+                entropy_score, entropy_reasons = entropy_heuristics(entropy, file_path, binary)
+                score += entropy_score
+                reasons.extend(entropy_reasons)
             
             # Vérification des noms suspects
             suspicious_keywords = ['virus', 'malware', 'trojan', 'worm', 'keylogger', 'ransom', 'hack', 'crack']
@@ -432,11 +602,17 @@ class SamShakkurAntivirus:
                     reasons.append(f"Nom suspect: {keyword}")
                     break
             
-            return {
+            analysis = {
                 "score": min(score, 1.0),
                 "reasons": reasons,
                 "suspicious": score > 0.5
             }
+            if binary is not None:
+                analysis["binary"] = binary
+            # Statistiques d'entropie jointes seulement si le fichier a des régions de haute entropie
+            if entropy is not None and entropy["high_entropy_region_count"]:
+                analysis["entropy"] = entropy
+            return analysis
         except Exception as e:
             return {
                 "score": 0.0,
@@ -445,117 +621,490 @@ class SamShakkurAntivirus:
                 "error": str(e)
             }
     
+    def check_server_connection(self):
+        """Vérifie la connexion au service de réputation et met à jour l'état du serveur"""
+        self.server_connected, self.server_status = self.reputation_client.check_connection()
+        return self.server_connected
+    
     def check_cloud_reputation(self, hash_value):
-        """Vérifie la réputation d'un hash via le cloud (simulé)"""
+        """Vérifie la réputation d'un hash via le service cloud (cache local des verdicts)"""
+        return self.check_cloud_reputations([hash_value])[hash_value]
+    
+    def check_cloud_reputations(self, hash_values):
+        """Vérifie la réputation de plusieurs hashs en requêtes groupées: {hash: réputation}"""
+        hash_values = [hash_value for hash_value in hash_values if hash_value]
+        if not self.server_connected:
+            return {hash_value: {"malware_name": None, "risk_level": 0, "error": "Serveur non connecté"}
+                    for hash_value in hash_values}
+        return self.reputation_client.lookup_many(hash_values)
+    
+    def get_scan_cache(self):
+        """Retourne le cache des scans incrémentaux (ouvert à la première utilisation)"""
+        if self.scan_cache is None:
+            # Threads de scan concurrents (protection en temps réel): une seule connexion ouverte
+            with self.scan_cache_lock:
+                if self.scan_cache is None:
+                    cache = ScanCache()
+                    if cache.open():
+                        self._sync_cache_version(cache)
+                        self.scan_cache = cache
+        return self.scan_cache
+    
+    def refresh_signatures(self, force=False):
+        """Recharge l'index des signatures s'il est périmé et aligne la version du cache incrémental"""
+        self.signature_index.refresh_if_stale(force=force)
+        if self.scan_cache is not None:
+            self._sync_cache_version(self.scan_cache)
+    
+    def _sync_cache_version(self, cache):
+        # Verdicts du cache valides seulement pour la version des signatures chargées dans l'index
+        version = self.signature_index.version()
+        if version is not None:
+            cache.set_signature_version(version)
+    
+    def lookup_hashes(self, hash_values):
+        """Vérifie un lot de condensats (index en mémoire, sinon requêtes SQLite groupées)"""
+        if self.signature_index.ensure_loaded():
+            return self.signature_index.lookup_many(hash_values)
+        return check_hashes(hash_values)
+    
+    def _hash_verdict(self, digests, matches):
+        """Construit le verdict d'un fichier à partir des correspondances trouvées"""
+        for name in SUPPORTED_ALGORITHMS:
+            match = matches.get(digests.get(name))
+            if match:
+                return {"malware_detected": True, "malware_info": match[0], "risk_level": match[1]}
+        return {"malware_detected": False, "malware_info": None, "risk_level": 0}
+    
+    def check_hash_verdict(self, digests):
+        """Vérifie les condensats d'un fichier contre la base de signatures"""
+        return self._hash_verdict(digests, self.lookup_hashes(digests.values()))
+    
+    def scan_file(self, file_path, scan_options, file_stat=None, flush_cache=True):
+        """Scan un fichier unique et retourne les résultats"""
+        self.refresh_signatures()
+        result = self._scan_file(file_path, scan_options, file_stat)
+        if flush_cache and self.scan_cache is not None:
+            self.scan_cache.flush()
+        return result
+    
+    def _scan_file(self, file_path, scan_options, file_stat=None):
+        """Scan un fichier (écritures du cache incrémental regroupées)"""
         try:
-            # Simulation de vérification cloud
-            if not self.server_connected:
-                return {"detections": 0, "engines": 65, "error": "Serveur non connecté"}
-            
-            # Vérifier d'abord localement
-            is_malicious, malware_name, risk_level = check_hash(hash_value)
-            if is_malicious:
-                return {"detections": risk_level * 10, "engines": 65, "result": malware_name}
-            
-            # Simulation aléatoire pour la démo
-            import random
-            detections = random.randint(0, 5)
-            return {"detections": detections, "engines": 65, "result": "Clean" if detections == 0 else "Suspicious"}
-            
+            context = self._prepare_file(file_path, scan_options, self.get_scan_profile(scan_options), file_stat)
+        except OSError as e:
+            # Fichier supprimé ou devenu illisible depuis sa découverte (parcours, événement inotify)
+            return self._error_result(file_path, e)
+        started = self.scan_timing.start()
+        self._resolve_verdicts([context])
+        self.scan_timing.stop_batch("lookup", started, [context])
+        return self._finish_file(context, scan_options)
+    
+    def _scan_batch(self, files, scan_options, profile):
+        """Scan un lot de fichiers (chemin, stat) avec une seule vérification groupée des condensats
+
+        Retourne, pour chaque fichier, la liste de ses résultats: le fichier lui-même
+        puis, pour une archive, chacun de ses membres.
+        """
+        governor = self.resource_governor
+        if governor is None:
+            return self._scan_batch_files(files, scan_options, profile)
+        governor.acquire()
+        try:
+            return self._scan_batch_files(files, scan_options, profile)
+        finally:
+            governor.release()
+    
+    def _scan_batch_files(self, files, scan_options, profile):
+        """Étapes de lecture, de vérification et de finalisation d'un lot"""
+        timing = self.scan_timing
+        results = [None] * len(files)
+        contexts = []
+        for position, (file_path, file_stat) in enumerate(files):
+            try:
+                contexts.append((position, self._prepare_file(file_path, scan_options, profile, file_stat, self.scan_dedupe)))
+            except Exception as e:
+                results[position] = self._error_result(file_path, e)
+        
+        try:
+            started = timing.start()
+            self._resolve_verdicts([context for _, context in contexts])
+            timing.stop_batch("lookup", started, [context for _, context in contexts])
+            if scan_options.get("cloud_scan", False):
+                # Réputation cloud de tout le lot en une requête (pas d'aller-retour par fichier)
+                started = timing.start()
+                self._prefetch_reputation([context for _, context in contexts])
+                timing.stop_batch("reputation", started, [context for _, context in contexts])
         except Exception as e:
-            return {"detections": 0, "engines": 65, "error": str(e)}
+            for position, context in contexts:
+                results[position] = self._error_result(context["file"], e)
+            contexts = []
+        
+        for position, context in contexts:
+            try:
+                results[position] = self._finish_file(context, scan_options)
+            except Exception as e:
+                results[position] = self._error_result(context["file"], e)
+        
+        file_timings = {context["file"]: context.get("timings") for _, context in contexts}
+        file_results = []
+        for (file_path, _), result in zip(files, results):
+            members = []
+            timings = file_timings.get(file_path)
+            if profile["scan_archives"] and result.error is None and is_archive_candidate(file_path):
+                started = timing.start()
+                try:
+                    members = self.scan_archive_members(file_path, scan_options, profile)
+                except Exception as e:
+                    # Archive illisible: erreur rattachée à ce fichier, le scan continue
+                    result.error = f"Erreur d'analyse de l'archive: {e}"
+                timing.stop("archive", started, timings)
+            timing.file_done(file_path, timings)
+            file_results.append([result] + members)
+        return file_results
     
-    def scan_file(self, file_path, scan_options):
-        """Scan un fichier unique et retourne les résultats"""
-        result = {
+    def scan_archive_members(self, file_path, scan_options, profile=None):
+        """Scanne en mémoire les membres d'une archive (résultats nommés "archive!membre")"""
+        profile = profile or self.get_scan_profile(scan_options)
+        
+        def scan_member(member_path, chunks, size):
+            context = self._prepare_stream(member_path, chunks, profile, size)
+            self._resolve_verdicts([context])
+            return self._finish_file(context, scan_options)
+        
+        scanner = ArchiveScanner(
+            scan_member,
+            max_depth=scan_options.get("archive_max_depth", MAX_ARCHIVE_DEPTH),
+            max_total_bytes=scan_options.get("archive_max_bytes", MAX_ARCHIVE_TOTAL_BYTES),
+            max_members=scan_options.get("archive_max_members", MAX_ARCHIVE_MEMBERS)
+        )
+        return scanner.scan(file_path)
+    
+    def _error_result(self, file_path, error):
+        """Résultat d'un fichier dont le scan a échoué"""
+        # En cas d'erreur sur un fichier, continuer avec les autres
+        return ScanResult.from_error(file_path, error)
+    
+    def _prepare_file(self, file_path, scan_options, profile, file_stat=None, dedupe=None):
+        """Étape de lecture: condensats du fichier, ou cache incrémental s'il est inchangé"""
+        algorithms = profile["hash_algorithms"]
+        timing = self.scan_timing
+        timings = timing.new_file()
+        
+        # Cache incrémental: un fichier inchangé n'est pas relu
+        cache = self.get_scan_cache() if scan_options.get("incremental", True) else None
+        if cache is not None and file_stat is None:
+            file_stat = os.stat(file_path)
+        cached = None
+        if cache is not None and not scan_options.get("force_rescan", False):
+            started = timing.start()
+            cached = cache.lookup(file_stat)
+            timing.stop("cache", started, timings)
+        
+        # Étapes partageant la lecture avec le hachage (signatures de contenu, condensat flou, entropie)
+        automaton = self.signature_index.content_automaton() if profile["content_scan"] else None
+        stages = self._content_stages(profile, automaton)
+        stages_cached = cached and cached["verdict"] and all(stage in cached["verdict"] for stage in stages)
+        
+        stage_results = {}
+        shared = False
+        if stages_cached and all(name in cached["digests"] for name in algorithms):
+            digests = {name: cached["digests"][name] for name in algorithms}
+            verdict = cached["verdict"]
+        elif self._skip_full_hash(file_path, file_stat, stages, scan_options, profile, timings):
+            # Aucune signature de cette taille ou de ce préhachage: verdict sain sans lecture complète
+            digests = {}
+            verdict = None
+        else:
+            started = timing.start()
+            read_algorithms = algorithms
+            if dedupe is not None and dedupe.by_content and CONTENT_DIGEST not in read_algorithms:
+                # Condensat complet comparé par les copies candidates avant de reprendre ce résultat
+                read_algorithms = tuple(read_algorithms) + (CONTENT_DIGEST,)
+            def read():
+                return self._read_file(file_path, file_stat, read_algorithms, stages, automaton)
+            
+            # Liens physiques et copies identiques: une seule lecture par scan, partagée entre les chemins
+            if dedupe is not None and file_stat is not None:
+                (digests, stage_results), shared = dedupe.read_once(file_path, file_stat, read)
+            else:
+                digests, stage_results = read()
+            timing.stop("read", started, timings)
+            verdict = None
+        
+        return {
             "file": file_path,
-            "hash_md5": self.calculate_file_hash(file_path, "md5"),
-            "hash_sha1": self.calculate_file_hash(file_path, "sha1"),
-            "hash_sha256": self.calculate_file_hash(file_path, "sha256"),
-            "malware_detected": False,
-            "malware_info": None,
-            "risk_level": 0,
-            "behavior_analysis": None,
-            "cloud_reputation": None,
-            "heuristic_analysis": None
+            "stat": file_stat,
+            "digests": digests,
+            "stages": stage_results,
+            "verdict": verdict,
+            "cache": cache,
+            "cached_digests": cached["digests"] if cached else {},
+            "timings": timings,
+            "shared": shared
         }
+    
+    def _read_file(self, file_path, file_stat, algorithms, stages, automaton):
+        """Lecture unique du fichier: condensats et résultats des étapes de contenu"""
+        file_size = file_stat.st_size if file_stat is not None else os.path.getsize(file_path)
+        consumers = self._content_consumers(stages, automaton, file_size)
+        readers = list(consumers.values())
+        if self.resource_governor is not None:
+            # Limite de débit de lecture appliquée bloc par bloc
+            readers.append(self.resource_governor)
+        digests = self.calculate_file_hashes(file_path, algorithms, readers)
+        stage_results = {}
+        if digests:
+            stage_results = {stage: consumer.finish() for stage, consumer in consumers.items()}
+        return digests, stage_results
+    
+    def _skip_full_hash(self, file_path, file_stat, stages, scan_options, profile, timings=None):
+        """Indique si le hachage complet peut être évité (taille puis préhachage sans correspondance)"""
+        if not profile["size_prefilter"] or stages or file_stat is None:
+            return False
+        # La réputation cloud a besoin du condensat md5
+        if scan_options.get("cloud_scan", False):
+            return False
+        prefilter = self.signature_index.prefilter()
+        if prefilter is None:
+            return False
+        if not prefilter.size_may_match(file_stat.st_size):
+            return True
+        if profile["prehash"] and prefilter.needs_prehash(file_stat.st_size):
+            started = self.scan_timing.start()
+            prehash = compute_prehash(file_path)
+            self.scan_timing.stop("prefilter", started, timings)
+            return not prefilter.prehash_may_match(prehash)
+        return False
+    
+    def _content_stages(self, profile, automaton):
+        """Étapes d'analyse du contenu actives pour un profil (clés du verdict)"""
+        stages = []
+        if automaton is not None:
+            stages.append("content_matches")
+        if profile["fuzzy_hash"]:
+            stages.append("fuzzy_hash")
+        if profile["entropy"]:
+            stages.append("entropy")
+        return stages
+    
+    def _content_consumers(self, stages, automaton, file_size):
+        """Consommateurs (méthodes update/finish) des étapes partageant la lecture"""
+        consumers = {}
+        if "content_matches" in stages:
+            consumers["content_matches"] = automaton.matcher()
+        if "fuzzy_hash" in stages and file_size is not None:
+            consumers["fuzzy_hash"] = FuzzyHasher(file_size)
+        if "entropy" in stages:
+            consumers["entropy"] = EntropyAnalyzer()
+        return consumers
+    
+    def _prepare_stream(self, file_path, chunks, profile, size=None):
+        """Étape de lecture d'un flux en mémoire (membre d'archive): mêmes consommateurs, sans cache"""
+        automaton = self.signature_index.content_automaton() if profile["content_scan"] else None
+        consumers = self._content_consumers(self._content_stages(profile, automaton), automaton, size)
+        digests = compute_stream_digests(chunks, profile["hash_algorithms"], list(consumers.values()))
+        return {
+            "file": file_path,
+            "stat": None,
+            "size": size,
+            "digests": digests,
+            "stages": {stage: consumer.finish() for stage, consumer in consumers.items()},
+            "verdict": None,
+            "cache": None,
+            "cached_digests": {}
+        }
+    
+    def _resolve_verdicts(self, contexts):
+        """Étape de vérification: un seul appel à la base de signatures pour tout le lot"""
+        # Verdicts du cache invalidés si les signatures ont changé
+        pending = [context for context in contexts if context["verdict"] is None]
+        if not pending:
+            return
         
-        # Vérification par hash
-        if result["hash_md5"]:
-            is_malicious, malware_name, risk_level = check_hash(result["hash_md5"])
-            if is_malicious:
-                result["malware_detected"] = True
-                result["malware_info"] = malware_name
-                result["risk_level"] = risk_level
+        matches = self.lookup_hashes(
+            hash_value for context in pending for hash_value in context["digests"].values()
+        )
+        for context in pending:
+            context["verdict"] = self._hash_verdict(context["digests"], matches)
+            stages = context["stages"]
+            if "content_matches" in stages:
+                self._apply_content_matches(context["verdict"], stages["content_matches"])
+            if "fuzzy_hash" in stages:
+                self._apply_similarity(context["verdict"], stages["fuzzy_hash"])
+            if "entropy" in stages:
+                context["verdict"]["entropy"] = stages["entropy"]
+            # Résultat repris d'un autre chemin: jamais enregistré comme résultat propre de ce fichier
+            if context["cache"] is not None and context["digests"] and not context.get("shared"):
+                context["cache"].store(context["stat"], dict(context["cached_digests"], **context["digests"]), context["verdict"])
+    
+    def _prefetch_reputation(self, contexts):
+        """Récupère la réputation cloud des condensats md5 d'un lot"""
+        reputations = self.check_cloud_reputations(context["digests"].get("md5") for context in contexts)
+        for context in contexts:
+            md5 = context["digests"].get("md5")
+            if md5:
+                context["cloud_reputation"] = reputations[md5]
+    
+    def _apply_content_matches(self, verdict, content_matches):
+        """Ajoute au verdict les signatures de contenu trouvées"""
+        verdict["content_matches"] = content_matches
+        if content_matches:
+            verdict["malware_detected"] = True
+            verdict["risk_level"] = max(verdict["risk_level"], max(match["risk_level"] for match in content_matches))
+            verdict["malware_info"] = verdict["malware_info"] or content_matches[0]["name"]
+    
+    def _apply_similarity(self, verdict, fuzzy_hash):
+        """Ajoute au verdict la famille connue la plus proche (condensat flou)"""
+        verdict["fuzzy_hash"] = fuzzy_hash
+        closest = self.signature_index.closest_family(fuzzy_hash)
+        verdict["similarity"] = None
+        if closest is None:
+            return
+        name, risk_level, score = closest
+        verdict["similarity"] = {"family": name, "score": score, "risk_level": risk_level}
+        if score >= FUZZY_MATCH_THRESHOLD and not verdict["malware_detected"]:
+            verdict["malware_detected"] = True
+            verdict["risk_level"] = risk_level
+            verdict["malware_info"] = f"Variante de {name} (similarité {score}%)"
+    
+    def _finish_file(self, context, scan_options):
+        """Étape d'analyse: résultat complet avec analyses comportementale et cloud"""
+        file_path = context["file"]
+        digests = context["digests"]
+        verdict = context["verdict"]
+        timing = self.scan_timing
+        timings = context.get("timings")
+        file_size = context["stat"].st_size if context["stat"] is not None else context.get("size")
+        result = ScanResult.from_digests(
+            file_path,
+            digests,
+            malware_detected=verdict["malware_detected"],
+            malware_info=verdict["malware_info"],
+            risk_level=verdict["risk_level"],
+            content_matches=verdict.get("content_matches"),
+            fuzzy_hash=verdict.get("fuzzy_hash"),
+            similarity=verdict.get("similarity")
+        )
         
         # Analyse comportementale (si option activée ou si premium)
         if scan_options.get("deep_scan", False) or self.is_premium:
-            result["behavior_analysis"] = self.analyze_file_behavior(file_path)
-            if result["behavior_analysis"]["suspicious"]:
-                result["malware_detected"] = True
-                result["risk_level"] = max(result["risk_level"], int(result["behavior_analysis"]["score"] * 10))
-                result["malware_info"] = result["malware_info"] or "Comportement suspect détecté"
+            started = timing.start()
+            entropy = verdict.get("entropy")
+            if self.analyzer_pool is not None:
+                result.behavior_analysis = self.analyzer_pool.submit(_run_behavior_analysis, file_path, file_size, entropy).result()
+            else:
+                result.behavior_analysis = self.analyze_file_behavior(file_path, file_size, entropy)
+            timing.stop("behavior", started, timings)
+            if result.behavior_analysis["suspicious"]:
+                result.malware_detected = True
+                result.risk_level = max(result.risk_level, int(result.behavior_analysis["score"] * 10))
+                result.malware_info = result.malware_info or "Comportement suspect détecté"
         
         # Vérification cloud (si option activée)
-        if scan_options.get("cloud_scan", False) and result["hash_md5"]:
-            result["cloud_reputation"] = self.check_cloud_reputation(result["hash_md5"])
-            if result["cloud_reputation"].get("detections", 0) > 10:
-                result["malware_detected"] = True
-                result["risk_level"] = max(result["risk_level"], 8)
-                result["malware_info"] = result["malware_info"] or f"Détecté par {result['cloud_reputation']['detections']} moteurs"
+        if scan_options.get("cloud_scan", False) and digests.get("md5"):
+            result.cloud_reputation = context.get("cloud_reputation")
+            if result.cloud_reputation is None:
+                started = timing.start()
+                result.cloud_reputation = self.check_cloud_reputation(digests["md5"])
+                timing.stop("reputation", started, timings)
+            reputation_risk = result.cloud_reputation.get("risk_level", 0)
+            if result.cloud_reputation.get("malware_name") and reputation_risk >= CLOUD_MIN_RISK_LEVEL:
+                result.malware_detected = True
+                result.risk_level = max(result.risk_level, reputation_risk)
+                result.malware_info = result.malware_info or (
+                    f"Signalé par le service de réputation: {result.cloud_reputation['malware_name']} (risque {reputation_risk}/10)")
         
         return result
     
-    def scan_directory(self, target_path, scan_options, progress_callback=None):
-        """Scan un répertoire entier"""
-        self.scan_results = []
+    def iter_scan(self, target_path, scan_options, sinks=()):
+        """Scanne une cible et produit les résultats au fur et à mesure
+
+        Seuls les compteurs et les menaces sont conservés en mémoire; les sinks
+        (NdjsonSink, SqliteSink...) reçoivent chaque résultat pour le persister.
+        Un point de reprise est enregistré périodiquement pour un répertoire;
+        l'option resume=True reprend le scan après le dernier fichier terminé.
+        """
+        self.threats = []
         self.threats_detected = 0
         self.files_scanned = 0
+        self.scan_progress = 0
         self.scan_start_time = datetime.now()
+        self.scan_end_time = None
+        self.resource_stats = None
+        self.scan_skipped = None
+        self.dedupe_stats = None
+        self.timing_report = None
+        
+        # Vérifier que le chemin existe
+        if not os.path.exists(target_path):
+            raise FileNotFoundError(f"Le chemin {target_path} n'existe pas")
+        
+        checkpoint_key = os.path.abspath(target_path)
+        scan_type = scan_options.get("profile") or ("full" if scan_options.get("deep_scan") else "quick")
+        checkpointing = os.path.isdir(target_path) and scan_options.get("checkpoint", True)
+        checkpoint = get_scan_checkpoint(checkpoint_key) if checkpointing and scan_options.get("resume") else None
+        checkpoint_interval = scan_options.get("checkpoint_interval", CHECKPOINT_INTERVAL)
+        started_at = self.scan_start_time.isoformat()
+        
+        # Reprise: compteurs et menaces du scan interrompu, parcours élagué jusqu'au dernier fichier terminé
+        files_walked = 0
+        resume_after = None
+        if checkpoint is not None:
+            resume_after = checkpoint["watermark"]
+            started_at = checkpoint["started_at"] or started_at
+            self.files_scanned = checkpoint["files_scanned"]
+            self.threats_detected = checkpoint["threats_detected"]
+            self.threats = [ScanResult.from_dict(threat) for threat in checkpoint["threats"]]
+            files_walked = checkpoint["files_walked"]
+        resumed_files = files_walked
         
+        # État à la fin du dernier fichier terminé: (fichier, parcourus, scannés, menaces)
+        snapshot = None
+        last_file = resume_after
+        completed = False
         try:
-            # Vérifier que le chemin existe
-            if not os.path.exists(target_path):
-                return False, f"Le chemin {target_path} n'existe pas"
+            # Recharger l'index et la version des signatures pour invalider les verdicts périmés
+            self.refresh_signatures(force=True)
+            if scan_options.get("incremental", True) and self.get_scan_cache() is not None:
+                self.scan_cache.open()
+                self._sync_cache_version(self.scan_cache)
             
-            # Compter les fichiers pour la progression
-            total_files = 0
-            for root, dirs, files in os.walk(target_path):
-                total_files += len(files)
+            # Parcours unique: les fichiers sont scannés pendant la découverte
+            # (règles d'exclusion compilées une fois, sous-arborescences exclues élaguées)
+            walker = DirectoryWalker(target_path, resume_after=resume_after, rules=ScanRules.from_options(scan_options))
+            profile = self.get_scan_profile(scan_options)
+            self.scan_timing = ScanTiming.from_options(scan_options)
+            if scan_options.get("dedupe", True):
+                self.scan_dedupe = ScanDeduplicator(by_content=scan_options.get("dedupe_content", False),
+                                                    all_inodes=scan_options.get("dedupe_bind_mounts", False))
+            next_checkpoint = time.monotonic() + checkpoint_interval
             
-            scanned_files = 0
-            
-            # Parcourir tous les fichiers
-            for root, dirs, files in os.walk(target_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    
-                    try:
-                        # Scanner le fichier
-                        result = self.scan_file(file_path, scan_options)
-                        self.scan_results.append(result)
-                        self.files_scanned += 1
-                        
-                        if result["malware_detected"]:
-                            self.threats_detected += 1
-                        
-                        # Mettre à jour la progression
-                        scanned_files += 1
-                        if progress_callback:
-                            progress = int((scanned_files / total_files) * 100) if total_files > 0 else 100
-                            progress_callback(progress, file_path, result)
-                            
-                    except Exception as e:
-                        # En cas d'erreur sur un fichier, continuer avec les autres
-                        error_result = {
-                            "file": file_path,
-                            "error": str(e),
-                            "malware_detected": False
-                        }
-                        self.scan_results.append(error_result)
-                        self.files_scanned += 1
+            # Parcourir tous les fichiers (résultats fusionnés dans l'ordre du parcours)
+            for file_path, result in self._iter_scan_results(walker, scan_options, profile):
+                if result.file == file_path:
+                    # Nouveau fichier: le précédent et ses membres d'archive sont entièrement traités
+                    if files_walked > resumed_files:
+                        snapshot = (last_file, files_walked, self.files_scanned, self.threats_detected)
+                    if checkpointing and snapshot is not None and time.monotonic() >= next_checkpoint:
+                        self._save_checkpoint(checkpoint_key, scan_type, snapshot, started_at)
+                        next_checkpoint = time.monotonic() + checkpoint_interval
+                    last_file = file_path
+                    files_walked += 1
+                self.files_scanned += 1
+                if result.malware_detected:
+                    self.threats_detected += 1
+                    self.threats.append(result)
+                
+                # Progression estimée sur la partie restant à parcourir
+                self.scan_progress = walker.progress(files_walked - resumed_files)
+                for sink in sinks:
+                    sink.write(result)
+                yield result
             
+            completed = True
             self.scan_end_time = datetime.now()
+            self.scan_skipped = walker.skip_stats()
             
             # Enregistrer dans l'historique
             if self.current_user:
@@ -563,34 +1112,148 @@ class SamShakkurAntivirus:
                 add_scan_history(
                     self.current_user, 
                     target_path, 
-                    "full" if scan_options.get("deep_scan") else "quick",
+                    scan_type,
                     self.files_scanned,
                     self.threats_detected,
                     duration
                 )
+        finally:
+            self.timing_report = self.scan_timing.report()
+            self.scan_timing = NULL_SCAN_TIMING
+            if self.scan_dedupe is not None:
+                self.dedupe_stats = self.scan_dedupe.get_stats()
+                self.scan_dedupe = None
+            if self.scan_cache is not None:
+                self.scan_cache.flush()
+            if checkpointing:
+                if completed:
+                    delete_scan_checkpoint(checkpoint_key)
+                elif snapshot is not None:
+                    # Scan interrompu (erreur, arrêt du générateur): reprise après le dernier fichier terminé
+                    self._save_checkpoint(checkpoint_key, scan_type, snapshot, started_at)
+            for sink in sinks:
+                sink.close()
+    
+    def _save_checkpoint(self, target_path, scan_type, snapshot, started_at):
+        """Enregistre le point de reprise: compteurs et menaces jusqu'au dernier fichier terminé inclus"""
+        watermark, files_walked, files_scanned, threats_detected = snapshot
+        # Les menaces sont ajoutées dans l'ordre: celles du fichier en cours sont en fin de liste
+        threats = self.threats[:threats_detected]
+        save_scan_checkpoint(
+            target_path, self.current_user, scan_type, os.path.abspath(watermark), files_scanned, files_walked,
+            threats_detected, [threat.to_dict() for threat in threats], started_at
+        )
+    
+    def scan_directory(self, target_path, scan_options, progress_callback=None, sinks=()):
+        """Scan un répertoire entier"""
+        self.scan_results = ScanResultSet()
+        # Option keep_results=False: rapport en flux uniquement (menaces et compteurs conservés)
+        keep_results = scan_options.get("keep_results", True)
+        
+        try:
+            # Vérifier que le chemin existe
+            if not os.path.exists(target_path):
+                return False, f"Le chemin {target_path} n'existe pas"
+            
+            for result in self.iter_scan(target_path, scan_options, sinks):
+                if keep_results:
+                    self.scan_results.append(result)
+                
+                # Mettre à jour la progression
+                if progress_callback and result.error is None:
+                    progress_callback(self.scan_progress, result.file, result)
             
             return True, f"Scan terminé: {self.files_scanned} fichiers analysés, {self.threats_detected} menaces détectées"
             
         except Exception as e:
             return False, f"Erreur lors du scan: {str(e)}"
     
-    def quarantine_file(self, file_path):
-        """Met un fichier en quarantaine"""
+    def _iter_scan_results(self, files, scan_options, profile):
+        """Scanne les fichiers (chemin, stat) par lots avec le pool de threads et les renvoie dans l'ordre d'entrée"""
+        workers = profile["workers"]
+        process_workers = profile["process_workers"]
+        batches = self._iter_batches(files, profile["batch_size"])
+        
+        # Régulateur optionnel (profil "background"): concurrence et débit adaptés à la charge
+        governor = ResourceGovernor.from_profile(profile)
+        if governor is not None:
+            governor.start()
+            self.resource_governor = governor
         try:
-            # Créer le répertoire de quarantaine s'il n'existe pas
-            quarantine_dir = os.path.join(tempfile.gettempdir(), "antivirus_quarantine")
-            os.makedirs(quarantine_dir, exist_ok=True)
-            
-            # Générer un nom de fichier unique pour la quarantaine
-            filename = os.path.basename(file_path)
-            quarantine_path = os.path.join(quarantine_dir, f"quarantine_{int(time.time())}_{filename}")
-            
-            # Déplacer le fichier
-            shutil.move(file_path, quarantine_path)
-            
-            return True, quarantine_path
-        except Exception as e:
-            return False, str(e)
+            # Avec un régulateur, toujours un pool: nice/ionice ne s'appliquent qu'aux threads de scan,
+            # jamais au thread de l'appelant (sa priorité ne pourrait plus être relevée)
+            if workers <= 1 and process_workers <= 0 and governor is None:
+                for batch in batches:
+                    yield from self._iter_batch_results(batch, self._scan_batch(batch, scan_options, profile))
+                return
+            yield from self._iter_pooled_results(batches, scan_options, profile, governor)
+        finally:
+            if governor is not None:
+                governor.stop()
+                self.resource_stats = governor.get_stats()
+                self.resource_governor = None
+    
+    def _iter_pooled_results(self, batches, scan_options, profile, governor=None):
+        """Scanne les lots avec le pool de threads (priorité nice/ionice appliquée à chaque thread)"""
+        workers = profile["workers"]
+        process_workers = profile["process_workers"]
+        initializer = governor.configure_thread if governor is not None else None
+        
+        # Pool de processus optionnel pour les analyses coûteuses en CPU
+        if process_workers > 0:
+            self.analyzer_pool = ProcessPoolExecutor(max_workers=process_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan", initializer=initializer) as executor:
+                # Fenêtre bornée de lots en cours: la mémoire reste constante
+                pending = deque()
+                for batch in batches:
+                    pending.append((batch, executor.submit(self._scan_batch, batch, scan_options, profile)))
+                    if len(pending) >= workers * MAX_PENDING_PER_WORKER:
+                        batch, future = pending.popleft()
+                        yield from self._iter_batch_results(batch, future.result())
+                while pending:
+                    batch, future = pending.popleft()
+                    yield from self._iter_batch_results(batch, future.result())
+        finally:
+            if self.analyzer_pool is not None:
+                self.analyzer_pool.shutdown()
+                self.analyzer_pool = None
+    
+    def _iter_batch_results(self, batch, file_results):
+        """Résultats d'un lot dans l'ordre: (chemin sur disque, résultat du fichier ou d'un membre)"""
+        for (file_path, _), results in zip(batch, file_results):
+            for result in results:
+                yield file_path, result
+    
+    def _iter_batches(self, files, batch_size):
+        """Regroupe les fichiers du parcours en micro-lots"""
+        batch = []
+        for item in files:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def quarantine_file(self, file_path, verdict=None, risk_level=0):
+        """Met un fichier en quarantaine (l'archive entière pour un membre d'archive)
+
+        Retourne (True, identifiant de l'élément de quarantaine) ou (False, message d'erreur).
+        """
+        return self.quarantine_store.quarantine(archive_container(file_path), verdict, risk_level)
+    
+    def restore_quarantined_file(self, item_id, destination=None, overwrite=False):
+        """Restaure un fichier de la quarantaine (emplacement d'origine par défaut)"""
+        return self.quarantine_store.restore(item_id, destination, overwrite)
+    
+    def purge_quarantine(self, item_ids=None, older_than_days=None):
+        """Supprime définitivement des éléments de la quarantaine"""
+        return self.quarantine_store.purge(item_ids, older_than_days)
+    
+    def get_quarantine_items(self, limit=None):
+        """Liste les éléments de la quarantaine"""
+        return self.quarantine_store.list_items(limit)
     
     def get_scan_report(self):
         """Génère un rapport de scan"""
@@ -605,21 +1268,76 @@ class SamShakkurAntivirus:
             "start_time": self.scan_start_time,
             "end_time": self.scan_end_time,
             "duration_seconds": duration,
-            "results": self.scan_results
+            "threats": self.threats,
+            "summary": self.scan_results.summary(),
+            "results": self.scan_results,
+            "resources": self.resource_stats,
+            "skipped": self.scan_skipped,
+            "deduplicated": self.dedupe_stats,
+            "timing": self.timing_report
         }
     
+    def start_realtime_protection(self, paths, scan_options=None, on_result=None):
+        """Démarre la protection en temps réel sur les dossiers indiqués"""
+        self.stop_realtime_protection()
+        options = {"profile": "quick", "incremental": True}
+        options.update(scan_options or {})
+        
+        def record_result(result):
+            # Liste séparée: iter_scan remet self.threats à zéro et en sauvegarde une tranche
+            if result.malware_detected:
+                with self.realtime_lock:
+                    self.realtime_threats.append(result)
+            if on_result is not None:
+                on_result(result)
+        
+        self.realtime_monitor = RealtimeMonitor(self, paths, options, on_result=record_result)
+        try:
+            self.realtime_monitor.start()
+            return True, f"Surveillance active sur {len(self.realtime_monitor.watches)} dossier(s)"
+        except Exception as e:
+            self.realtime_monitor.stop()
+            self.realtime_monitor = None
+            return False, f"Impossible de démarrer la protection en temps réel: {str(e)}"
+    
+    def stop_realtime_protection(self):
+        """Arrête la protection en temps réel"""
+        if self.realtime_monitor is not None:
+            self.realtime_monitor.stop()
+            self.realtime_monitor = None
+    
+    def get_realtime_threats(self):
+        """Copie des menaces détectées par la protection en temps réel"""
+        with self.realtime_lock:
+            return list(self.realtime_threats)
+    
     def cleanup_system(self):
         """Nettoie le système des fichiers détectés comme malveillants"""
         cleaned_files = 0
         errors = 0
         
-        for result in self.scan_results:
-            if result.get("malware_detected", False):
-                success, message = self.quarantine_file(result["file"])
-                if success:
-                    cleaned_files += 1
-                else:
-                    errors += 1
+        # Les membres menaçants d'une même archive ne la mettent en quarantaine qu'une fois
+        realtime_threats = self.get_realtime_threats()
+        containers = {}
+        for result in self.threats + realtime_threats:
+            if result.malware_detected:
+                containers.setdefault(archive_container(result.file), (result.malware_info, result.risk_level))
+        
+        # Mise en quarantaine parallèle (renommage puis compression de chaque fichier)
+        entries = [(container, verdict, risk_level) for container, (verdict, risk_level) in containers.items()]
+        quarantined = set()
+        for container, success, _ in self.quarantine_store.quarantine_many(entries):
+            if success:
+                cleaned_files += 1
+                quarantined.add(container)
+            else:
+                errors += 1
+        
+        # Les détections en temps réel traitées sont retirées (le moniteur a pu en ajouter entre-temps)
+        if realtime_threats:
+            handled = {id(result) for result in realtime_threats if archive_container(result.file) in quarantined}
+            with self.realtime_lock:
+                self.realtime_threats = [result for result in self.realtime_threats if id(result) not in handled]
         
         return cleaned_files, errors
 
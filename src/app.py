@@ -22,7 +22,7 @@ load_dotenv()
 
 # Import des composants de l'antivirus
 from src.antivirus_engine import SamShakkurAntivirus, LanguageManager
-from src.database import init_database, get_user_subscription_status, update_user_subscription, add_scan_history, get_scan_history
+from src.database import init_database, get_user_subscription_status, update_user_subscription, add_scan_history, get_scan_history, get_scan_checkpoint
 
 # Configuration de la page
 st.set_page_config(
@@ -182,6 +182,7 @@ class AppState:
         """Initialise l'application"""
         self.antivirus = SamShakkurAntivirus()
         init_database()
+        self.antivirus.check_server_connection()
         
     def login(self, email):
         """Connecte un utilisateur"""
@@ -441,6 +442,14 @@ def render_scan_tab(language_manager):
             # Dans Streamlit Cloud, on ne peut pas utiliser file_uploader pour les répertoires
             # On utilise donc une approche simplifiée
             st.info("Environnement cloud - Entrez le chemin manuellement")
+        
+        exclusions = st.text_input(
+            "Exclusions (motifs séparés par des virgules)",
+            placeholder="node_modules, .git, *.iso, *.vmdk, */backups/*",
+            help="Un motif sans / porte sur le nom, un motif avec / sur le chemin complet"
+        )
+        same_filesystem = st.checkbox("Rester sur le même système de fichiers", value=False,
+                                      help="Ne pas descendre dans les points de montage")
     
     with col2:
         deep_scan = st.checkbox(language_manager.t('deep_scan'), value=True)
@@ -448,6 +457,24 @@ def render_scan_tab(language_manager):
                                value=app_state.antivirus.server_connected,
                                disabled=not app_state.antivirus.server_connected)
         auto_quarantine = st.checkbox(language_manager.t('auto_quarantine'), value=False)
+        force_rescan = st.checkbox("Rescan complet (ignorer le cache)", value=False,
+                                   help="Relit tous les fichiers, même ceux inchangés depuis le dernier scan")
+        checkpoint = get_scan_checkpoint(os.path.abspath(target_path)) if target_path and os.path.isdir(target_path) else None
+        resume_scan = False
+        if checkpoint:
+            resume_scan = st.checkbox(
+                f"Reprendre le scan interrompu ({checkpoint['files_walked']} fichiers déjà analysés)",
+                value=True,
+                help=f"Dernier point de reprise: {checkpoint['updated_at']}"
+            )
+        dedupe_content = st.checkbox("Analyser une seule fois les copies identiques", value=False,
+                                     help="Copies de même taille et de même début/fin (sauvegardes, couches de conteneurs): "
+                                          "chaque copie est encore lue pour son sha256, seules les analyses de contenu sont évitées")
+        resource_mode = st.selectbox(
+            "Priorité du scan",
+            ["Normale", "Arrière-plan", "Vitesse maximale"],
+            help="Arrière-plan: le scan ralentit quand le CPU, le disque ou la mémoire sont chargés"
+        )
     
     # Boutons d'action
     col1, col2, col3 = st.columns([2, 2, 1])
@@ -459,8 +486,17 @@ def render_scan_tab(language_manager):
                     scan_options = {
                         "deep_scan": deep_scan,
                         "cloud_scan": cloud_scan,
-                        "auto_quarantine": auto_quarantine
+                        "auto_quarantine": auto_quarantine,
+                        "force_rescan": force_rescan,
+                        "resume": resume_scan,
+                        "exclude": exclusions,
+                        "one_filesystem": same_filesystem,
+                        "dedupe_content": dedupe_content
                     }
+                    if resource_mode == "Arrière-plan":
+                        scan_options["profile"] = "background"
+                    elif resource_mode == "Vitesse maximale":
+                        scan_options["profile"] = "maximum"
                     
                     def progress_callback(progress, file_path, result):
                         progress_bar.progress(progress)
@@ -504,17 +540,14 @@ def render_scan_tab(language_manager):
     
     with col3:
         if st.button(language_manager.t('clean_button'), use_container_width=True):
-            if hasattr(app_state.antivirus, 'threats_detected') and app_state.antivirus.threats_detected > 0:
+            if app_state.antivirus.threats_detected > 0 or app_state.antivirus.get_realtime_threats():
                 with st.spinner(language_manager.t('cleaning')):
-                    # Mettre en quarantaine les fichiers malveillants
-                    quarantined = 0
-                    for result in app_state.antivirus.scan_results:
-                        if result.get('status') in ['malicious', 'suspicious']:
-                            success, _ = app_state.antivirus.quarantine_file(result['file'])
-                            if success:
-                                quarantined += 1
+                    # Mettre en quarantaine les fichiers malveillants (en parallèle)
+                    quarantined, errors = app_state.antivirus.cleanup_system()
                     
                     st.success(f"{quarantined} fichiers mis en quarantaine!")
+                    if errors:
+                        st.warning(f"{errors} fichiers n'ont pas pu être mis en quarantaine")
                     app_state.antivirus.threats_detected = 0
                     st.rerun()
             else:
@@ -645,7 +678,29 @@ def render_protection_tab(language_manager):
             disabled=not app_state.user_is_premium,
             help="Activez la surveillance en temps réel (PRO uniquement)"
         )
-        
+        watched_paths = st.text_input(
+            "Dossiers surveillés (séparés par des virgules)",
+            value=os.path.expanduser("~"),
+            disabled=not app_state.user_is_premium
+        )
+
+        monitor = app_state.antivirus.realtime_monitor
+        if real_time_protection and monitor is None:
+            paths = [path.strip() for path in watched_paths.split(",") if path.strip()]
+            success, message = app_state.antivirus.start_realtime_protection(paths)
+            if success:
+                st.success(message)
+            else:
+                st.error(message)
+        elif not real_time_protection and monitor is not None:
+            app_state.antivirus.stop_realtime_protection()
+
+        monitor = app_state.antivirus.realtime_monitor
+        if monitor is not None:
+            stats = monitor.get_stats()
+            st.caption(f"Fichiers analysés: {stats['scanned']} | Menaces: {stats['threats']} | "
+                       f"En attente: {stats['pending'] + stats['queued']} | Ignorés: {stats['dropped']}")
+
         # Analyse comportementale
         behavior_analysis = st.toggle(
             "Analyse comportementale", 
@@ -671,6 +726,43 @@ def render_protection_tab(language_manager):
             help="Bientôt disponible"
         )
     
+    # Quarantaine
+    st.markdown("---")
+    st.subheader("🗄️ Quarantaine")
+    quarantine_items = app_state.antivirus.get_quarantine_items(limit=100)
+    if not quarantine_items:
+        st.info("Aucun fichier en quarantaine")
+    else:
+        st.dataframe(pd.DataFrame([
+            {
+                "ID": item["id"],
+                "Fichier d'origine": item["original_path"],
+                "Verdict": item["verdict"] or "",
+                "Risque": item["risk_level"],
+                "Taille": item["size"],
+                "Date": item["quarantined_at"]
+            }
+            for item in quarantine_items
+        ]), use_container_width=True, hide_index=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            item_id = st.selectbox("Élément", [item["id"] for item in quarantine_items],
+                                   format_func=lambda value: f"#{value}")
+            if st.button("Restaurer"):
+                success, message = app_state.antivirus.restore_quarantined_file(item_id)
+                if success:
+                    st.success(f"Fichier restauré: {message}")
+                    st.rerun()
+                else:
+                    st.error(message)
+        with col2:
+            purge_days = st.number_input("Purger les éléments de plus de (jours)", min_value=0, value=30)
+            if st.button("Purger"):
+                purged = app_state.antivirus.purge_quarantine(older_than_days=purge_days)
+                st.success(f"{purged} éléments supprimés définitivement")
+                st.rerun()
+    
     # Fonctionnalités PRO
     if not app_state.user_is_premium:
         st.markdown("---")
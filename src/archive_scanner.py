@@ -0,0 +1,208 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import tarfile
+import zipfile
+import zlib
+from src.hashing import READ_BUFFER_SIZE
+from src.scan_result import ScanResult
+
+# Séparateur entre le chemin d'une archive et celui d'un de ses membres ("archive.zip!dossier/membre.exe")
+ARCHIVE_MEMBER_SEPARATOR = "!"
+
+# Extensions examinées lors du parcours (le format réel est vérifié par signature magique)
+ARCHIVE_EXTENSIONS = ('.zip', '.jar', '.apk', '.tar', '.tgz', '.gz', '.tbz', '.tbz2', '.bz2', '.txz', '.xz')
+
+# Limites par archive de premier niveau (protection contre les bombes de décompression)
+MAX_ARCHIVE_DEPTH = 3
+MAX_ARCHIVE_TOTAL_BYTES = 256 * 1024 * 1024
+MAX_ARCHIVE_MEMBERS = 10000
+# Taille maximale d'une archive imbriquée conservée en mémoire pour être ouverte à son tour
+MAX_NESTED_ARCHIVE_SIZE = 32 * 1024 * 1024
+
+# Erreurs des formats d'archive: une archive illisible est simplement analysée comme un fichier
+ARCHIVE_ERRORS = (zipfile.BadZipFile, zipfile.LargeZipFile, tarfile.TarError, lzma.LZMAError,
+                  zlib.error, EOFError, OSError, ValueError, NotImplementedError)
+
+class ArchiveLimitError(Exception):
+    """Levée quand une limite de décompression est atteinte"""
+
+def is_archive_candidate(file_path):
+    """Indique si un fichier porte une extension d'archive"""
+    return file_path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def detect_archive_format(head):
+    """Format d'archive d'après les premiers octets (None si non reconnu)"""
+    if head.startswith((b"PK\x03\x04", b"PK\x05\x06")):
+        return "zip"
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if head.startswith(b"BZh"):
+        return "bz2"
+    if head.startswith(b"\xfd7zXZ\x00"):
+        return "xz"
+    if head[257:262] == b"ustar":
+        return "tar"
+    return None
+
+def archive_container(file_path):
+    """Chemin sur disque de l'archive contenant un membre (le chemin lui-même sinon)"""
+    if os.path.exists(file_path):
+        return file_path
+    position = file_path.find(ARCHIVE_MEMBER_SEPARATOR)
+    while position != -1:
+        if os.path.isfile(file_path[:position]):
+            return file_path[:position]
+        position = file_path.find(ARCHIVE_MEMBER_SEPARATOR, position + 1)
+    return file_path
+
+class ArchiveScanner:
+    """Parcourt récursivement les membres d'une archive sans rien extraire sur disque
+
+    Chaque membre est lu par blocs et transmis à scan_member(chemin, blocs, taille),
+    qui applique les étapes de hachage et de signatures du moteur. Les membres sont
+    rapportés sous le chemin de l'archive parente ("parent!membre"). Les limites de
+    profondeur, d'octets décompressés et de nombre de membres s'appliquent à
+    l'ensemble d'une archive de premier niveau.
+    """
+
+    def __init__(self, scan_member, max_depth=MAX_ARCHIVE_DEPTH, max_total_bytes=MAX_ARCHIVE_TOTAL_BYTES,
+                 max_members=MAX_ARCHIVE_MEMBERS, max_nested_size=MAX_NESTED_ARCHIVE_SIZE):
+        self.scan_member = scan_member
+        self.max_depth = max_depth
+        self.max_total_bytes = max_total_bytes
+        self.max_members = max_members
+        self.max_nested_size = max_nested_size
+        self.total_bytes = 0
+        self.member_count = 0
+
+    def scan(self, file_path):
+        """Résultats des membres d'une archive sur disque (liste vide si ce n'est pas une archive)"""
+        self.total_bytes = 0
+        self.member_count = 0
+        results = []
+        try:
+            with open(file_path, "rb") as f:
+                self._scan_container(f, file_path, 1, results)
+        except ArchiveLimitError:
+            pass
+        except ARCHIVE_ERRORS as e:
+            self._container_error(file_path, e, results)
+        return results
+
+    def _scan_container(self, fileobj, container_path, depth, results):
+        head = fileobj.read(512)
+        fileobj.seek(0)
+        archive_format = detect_archive_format(head)
+        if archive_format == "zip":
+            self._scan_zip(fileobj, container_path, depth, results)
+        elif archive_format == "tar":
+            with tarfile.open(fileobj=fileobj, mode="r|") as archive:
+                self._scan_tar(archive, container_path, depth, results)
+        elif archive_format is not None:
+            self._scan_compressed(fileobj, archive_format, container_path, depth, results)
+
+    def _scan_zip(self, fileobj, container_path, depth, results):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                member_path = f"{container_path}{ARCHIVE_MEMBER_SEPARATOR}{info.filename}"
+                try:
+                    stream = archive.open(info)
+                except (RuntimeError, NotImplementedError, zipfile.BadZipFile) as e:
+                    # Membre chiffré ou méthode de compression non supportée
+                    results.append(ScanResult.from_error(member_path, f"Membre illisible: {e}"))
+                    continue
+                try:
+                    with stream:
+                        self._scan_member(stream, member_path, info.file_size, depth, results)
+                except ARCHIVE_ERRORS as e:
+                    # Données compressées corrompues: les membres suivants restent lisibles
+                    results.append(ScanResult.from_error(member_path, f"Membre illisible: {e}"))
+
+    def _scan_tar(self, archive, container_path, depth, results):
+        # Mode flux ("r|"): les membres sont lus dans l'ordre, sans retour en arrière
+        for info in archive:
+            if not info.isfile():
+                continue
+            member_path = f"{container_path}{ARCHIVE_MEMBER_SEPARATOR}{info.name}"
+            stream = archive.extractfile(info)
+            if stream is None:
+                continue
+            try:
+                self._scan_member(stream, member_path, info.size, depth, results)
+            except ARCHIVE_ERRORS as e:
+                # Flux tronqué ou corrompu (CRC gzip...): la suite de l'archive n'est plus lisible
+                results.append(ScanResult.from_error(member_path, f"Membre illisible: {e}"))
+                return
+
+    def _scan_compressed(self, fileobj, archive_format, container_path, depth, results):
+        if archive_format == "gzip":
+            stream = gzip.GzipFile(fileobj=fileobj, mode="rb")
+        elif archive_format == "bz2":
+            stream = bz2.BZ2File(fileobj, mode="rb")
+        else:
+            stream = lzma.LZMAFile(fileobj, mode="rb")
+        with stream:
+            if detect_archive_format(stream.peek(512)[:512]) == "tar":
+                with tarfile.open(fileobj=stream, mode="r|") as archive:
+                    self._scan_tar(archive, container_path, depth, results)
+                return
+            # Flux compressé simple: un seul membre, nommé d'après l'archive
+            name = os.path.basename(container_path.rsplit(ARCHIVE_MEMBER_SEPARATOR, 1)[-1])
+            root, extension = os.path.splitext(name)
+            member_name = root if extension.lower() in ('.gz', '.bz2', '.xz') else name
+            member_path = f"{container_path}{ARCHIVE_MEMBER_SEPARATOR}{member_name}"
+            try:
+                self._scan_member(stream, member_path, None, depth, results)
+            except ARCHIVE_ERRORS as e:
+                results.append(ScanResult.from_error(member_path, f"Membre illisible: {e}"))
+
+    def _scan_member(self, stream, member_path, size, depth, results):
+        self.member_count += 1
+        if self.member_count > self.max_members:
+            results.append(ScanResult.from_error(member_path, f"Limite de {self.max_members} membres d'archive atteinte"))
+            raise ArchiveLimitError(member_path)
+
+        # Une archive imbriquée est conservée en mémoire pendant sa lecture pour être ouverte ensuite
+        nested = bytearray() if depth < self.max_depth else None
+        chunks = self._read_chunks(stream, member_path, nested)
+        try:
+            results.append(self.scan_member(member_path, chunks, size))
+        except ArchiveLimitError as e:
+            results.append(ScanResult.from_error(member_path, str(e)))
+            raise
+
+        if nested and detect_archive_format(bytes(nested[:512])) is not None:
+            try:
+                self._scan_container(io.BytesIO(nested), member_path, depth + 1, results)
+            except ARCHIVE_ERRORS as e:
+                self._container_error(member_path, e, results)
+
+    def _container_error(self, container_path, error, results):
+        # Structure illisible hors d'un membre (en-tête de tar, répertoire central du zip):
+        # rapportée sous "archive!" pour ne pas être confondue avec le résultat de l'archive
+        results.append(ScanResult.from_error(f"{container_path}{ARCHIVE_MEMBER_SEPARATOR}",
+                                             f"Archive illisible: {error}"))
+
+    def _read_chunks(self, stream, member_path, nested):
+        """Blocs décompressés d'un membre, en comptant les octets contre la limite globale"""
+        while True:
+            chunk = stream.read(READ_BUFFER_SIZE)
+            if not chunk:
+                break
+            self.total_bytes += len(chunk)
+            if self.total_bytes > self.max_total_bytes:
+                raise ArchiveLimitError(f"Limite de {self.max_total_bytes} octets décompressés atteinte")
+            if nested is not None:
+                if len(nested) == 0 and detect_archive_format(chunk[:512]) is None:
+                    nested = None
+                elif len(nested) + len(chunk) > self.max_nested_size:
+                    nested.clear()
+                    nested = None
+                else:
+                    nested.extend(chunk)
+            yield chunk
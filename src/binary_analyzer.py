@@ -0,0 +1,375 @@
+import mmap
+import struct
+import numpy as np
+from src.entropy import shannon_entropy, HIGH_ENTROPY_THRESHOLD
+
+# Signatures magiques des formats exécutables
+ELF_MAGIC = b"\x7fELF"
+PE_MAGIC = b"MZ"
+PE_SIGNATURE = b"PE\0\0"
+
+# Taille de l'en-tête DOS (e_lfanew à 0x3C) et des en-têtes ELF 32/64 bits
+DOS_HEADER_SIZE = 0x40
+ELF_HEADER_SIZES = {1: 52, 2: 64}
+
+# Limites de l'analyse: seuls les en-têtes et tables sont lus (quelques Ko par fichier)
+MAX_SECTIONS = 256
+MAX_LIBRARIES = 64
+MAX_IMPORTS = 1024
+MAX_NAME_LENGTH = 256
+
+# Entropie des sections: échantillon borné par section (morceaux répartis sur la section)
+# et pour tout le fichier; en dessous de SECTION_ENTROPY_MIN_SIZE, l'entropie n'est pas significative
+SECTION_ENTROPY_SAMPLE = 64 * 1024
+SECTION_ENTROPY_CHUNKS = 8
+SECTION_ENTROPY_BUDGET = 1024 * 1024
+SECTION_ENTROPY_MIN_SIZE = 512
+
+# Noms de sections laissés par les empaqueteurs courants
+PACKER_SECTIONS = {
+    "UPX0", "UPX1", "UPX2", ".UPX0", ".UPX1", ".aspack", ".adata", ".petite", ".nsp0", ".nsp1",
+    ".MPRESS1", ".MPRESS2", ".themida", ".vmp0", ".vmp1", ".enigma1", ".packed", "pebundle"
+}
+
+# Fonctions Windows typiques de l'injection de code, de l'espionnage ou du téléchargement
+SUSPICIOUS_IMPORTS = {
+    "VirtualAllocEx", "WriteProcessMemory", "CreateRemoteThread", "NtUnmapViewOfSection",
+    "ZwUnmapViewOfSection", "QueueUserAPC", "SetThreadContext", "SetWindowsHookExA", "SetWindowsHookExW",
+    "GetAsyncKeyState", "CheckRemoteDebuggerPresent",
+    "URLDownloadToFileA", "URLDownloadToFileW", "WinExec", "CryptEncrypt", "AdjustTokenPrivileges",
+    "InternetOpenUrlA", "InternetOpenUrlW", "ReadProcessMemory", "OpenProcess", "VirtualProtectEx"
+}
+DYNAMIC_LOADING_IMPORTS = {"LoadLibraryA", "LoadLibraryW", "LoadLibraryExA", "LoadLibraryExW", "GetProcAddress"}
+
+# Constantes ELF
+ELF_SHF_WRITE = 0x1
+ELF_SHF_ALLOC = 0x2
+ELF_SHF_EXECINSTR = 0x4
+ELF_SHT_DYNAMIC = 6
+ELF_SHT_NOBITS = 8
+ELF_PT_LOAD = 1
+ELF_PF_X = 0x1
+ELF_PF_W = 0x2
+ELF_DT_NEEDED = 1
+
+# Constantes PE
+PE_SCN_MEM_EXECUTE = 0x20000000
+PE_SCN_MEM_WRITE = 0x80000000
+PE_FILE_DLL = 0x2000
+PE_IMPORT_DIRECTORY = 1
+PE_SECURITY_DIRECTORY = 4
+
+class _MalformedBinary(Exception):
+    """En-têtes incohérents (table hors du fichier...)"""
+
+def analyze_binary(file_path):
+    """Caractéristiques structurelles d'un exécutable ELF ou PE (None pour un autre fichier)
+
+    Seuls les en-têtes, la table des sections et la table d'importation sont lus, via
+    une projection en mémoire: le coût ne dépend pas de la taille du fichier. Un
+    fichier n'est traité comme exécutable (et éventuellement malformé) qu'une fois
+    son en-tête confirmé: "MZ" dont le champ e_lfanew désigne la signature PE, ou
+    identification ELF valide.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            magic = f.read(4)
+            if not (magic.startswith(ELF_MAGIC) or magic.startswith(PE_MAGIC)):
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if magic.startswith(ELF_MAGIC):
+                    features = _analyze_elf(data) if _is_elf_header(data) else None
+                else:
+                    pe_offset = _pe_header_offset(data)
+                    features = _analyze_pe(data, pe_offset) if pe_offset is not None else None
+                if features is not None:
+                    del features["entropy_budget"]
+                return features
+    except (OSError, ValueError):
+        return None
+
+def _is_elf_header(data):
+    # Classe, boutisme et version d'identification valides, en-tête complet
+    if len(data) < 16 or data[5] not in (1, 2) or data[6] != 1:
+        return False
+    header_size = ELF_HEADER_SIZES.get(data[4])
+    return header_size is not None and len(data) >= header_size
+
+def _pe_header_offset(data):
+    """Position de l'en-tête PE désignée par e_lfanew, ou None si la signature n'y est pas"""
+    if len(data) < DOS_HEADER_SIZE:
+        return None
+    (pe_offset,) = struct.unpack_from("<I", data, 0x3C)
+    # Les PE minimaux chevauchent l'en-tête DOS: seule la signature fait foi
+    if pe_offset < len(PE_MAGIC) or pe_offset + len(PE_SIGNATURE) > len(data):
+        return None
+    if data[pe_offset:pe_offset + len(PE_SIGNATURE)] != PE_SIGNATURE:
+        return None
+    return pe_offset
+
+def _features(binary_format):
+    # sections: [{"name", "size", "executable", "entropy"}] (entropie None si non mesurée)
+    return {
+        "format": binary_format,
+        "bits": None,
+        "sections": [],
+        "entry_point": None,
+        "entry_section": None,
+        "abnormal_entry_point": False,
+        "writable_executable": [],
+        "packer_sections": [],
+        "raw_size_mismatch": [],
+        "libraries": [],
+        "imports": 0,
+        "suspicious_imports": [],
+        "dynamic_loading": False,
+        "overlay_size": 0,
+        "malformed": False,
+        "entropy_budget": SECTION_ENTROPY_BUDGET
+    }
+
+def _section(features, data, name, offset, size, executable):
+    """Ajoute une section et l'entropie d'un échantillon de son contenu sur disque"""
+    entropy = None
+    if size >= SECTION_ENTROPY_MIN_SIZE and 0 <= offset < len(data) and features["entropy_budget"] > 0:
+        end = min(len(data), offset + size)
+        sample_size = min(end - offset, SECTION_ENTROPY_SAMPLE, features["entropy_budget"])
+        features["entropy_budget"] -= sample_size
+        if sample_size >= SECTION_ENTROPY_MIN_SIZE:
+            # Morceaux régulièrement espacés: début, milieu et fin de la section sont représentés
+            chunk = sample_size // SECTION_ENTROPY_CHUNKS
+            step = (end - offset - chunk) // max(1, SECTION_ENTROPY_CHUNKS - 1)
+            counts = np.zeros(256, dtype=np.int64)
+            for index in range(SECTION_ENTROPY_CHUNKS):
+                start = offset + index * step
+                counts += np.bincount(np.frombuffer(data[start:start + chunk], dtype=np.uint8), minlength=256)
+            entropy = round(float(shannon_entropy(counts, int(counts.sum()))), 3)
+    features["sections"].append({"name": name, "size": size, "executable": executable, "entropy": entropy})
+
+def _unpack(fmt, data, offset):
+    if offset < 0 or offset + struct.calcsize(fmt) > len(data):
+        raise _MalformedBinary(offset)
+    return struct.unpack_from(fmt, data, offset)
+
+def _c_string(data, offset):
+    if offset < 0 or offset >= len(data):
+        return ""
+    end = data.find(b"\0", offset, min(len(data), offset + MAX_NAME_LENGTH))
+    if end == -1:
+        end = min(len(data), offset + MAX_NAME_LENGTH)
+    return data[offset:end].decode("latin-1")
+
+def _analyze_elf(data):
+    features = _features("ELF")
+    try:
+        elf_class, encoding = data[4], data[5]
+        order = "<" if encoding == 1 else ">"
+        features["bits"] = 32 if elf_class == 1 else 64
+        header = "HHIIIIIHHHHHH" if elf_class == 1 else "HHIQQQIHHHHHH"
+        (e_type, _, _, e_entry, e_phoff, e_shoff, _, _, e_phentsize, e_phnum,
+         e_shentsize, e_shnum, e_shstrndx) = _unpack(order + header, data, 16)
+        features["entry_point"] = e_entry
+        end_of_data = 0
+
+        # Segments chargés (présents même quand la table des sections est supprimée)
+        segment_format = order + ("IIIIIIII" if elf_class == 1 else "IIQQQQQQ")
+        executable_segments = []
+        for index in range(min(e_phnum, MAX_SECTIONS)):
+            fields = _unpack(segment_format, data, e_phoff + index * e_phentsize)
+            if elf_class == 1:
+                p_type, p_offset, p_vaddr, _, p_filesz, p_memsz, p_flags, _ = fields
+            else:
+                p_type, p_flags, p_offset, p_vaddr, _, p_filesz, p_memsz, _ = fields
+            end_of_data = max(end_of_data, p_offset + p_filesz)
+            if p_type != ELF_PT_LOAD:
+                continue
+            if p_flags & ELF_PF_X:
+                executable_segments.append((p_vaddr, p_vaddr + p_memsz))
+                if p_flags & ELF_PF_W:
+                    features["writable_executable"].append(f"segment@{p_vaddr:#x}")
+
+        # Table des sections
+        section_format = order + ("IIIIIIIIII" if elf_class == 1 else "IIQQQQIIQQ")
+        sections = []
+        if e_shoff and e_shnum:
+            for index in range(min(e_shnum, MAX_SECTIONS)):
+                sections.append(_unpack(section_format, data, e_shoff + index * e_shentsize))
+            end_of_data = max(end_of_data, e_shoff + e_shnum * e_shentsize)
+        names_offset = sections[e_shstrndx][4] if e_shstrndx < len(sections) else None
+
+        dynamic = None
+        for section in sections:
+            sh_name, sh_type, sh_flags, sh_addr, sh_offset, sh_size, sh_link = section[:7]
+            name = _c_string(data, names_offset + sh_name) if names_offset is not None else ""
+            _section(features, data, name, sh_offset, 0 if sh_type == ELF_SHT_NOBITS else sh_size,
+                     bool(sh_flags & ELF_SHF_EXECINSTR))
+            if sh_type != ELF_SHT_NOBITS:
+                end_of_data = max(end_of_data, sh_offset + sh_size)
+            if name in PACKER_SECTIONS:
+                features["packer_sections"].append(name)
+            if sh_flags & ELF_SHF_WRITE and sh_flags & ELF_SHF_EXECINSTR:
+                features["writable_executable"].append(name)
+            if sh_flags & ELF_SHF_ALLOC and sh_addr <= e_entry < sh_addr + sh_size and features["entry_section"] is None:
+                features["entry_section"] = name
+                if not sh_flags & ELF_SHF_EXECINSTR:
+                    features["abnormal_entry_point"] = True
+            if sh_type == ELF_SHT_DYNAMIC:
+                dynamic = section
+
+        # Point d'entrée hors de tout segment exécutable (exécutables et bibliothèques)
+        if e_type in (2, 3) and e_entry:
+            if not any(start <= e_entry < end for start, end in executable_segments):
+                features["abnormal_entry_point"] = True
+
+        # Bibliothèques requises (entrées DT_NEEDED de la section dynamique)
+        if dynamic is not None and dynamic[6] < len(sections):
+            strings_offset = sections[dynamic[6]][4]
+            entry_format = order + ("iI" if elf_class == 1 else "qQ")
+            entry_size = struct.calcsize(entry_format)
+            for index in range(min(dynamic[5] // entry_size, MAX_IMPORTS)):
+                tag, value = _unpack(entry_format, data, dynamic[4] + index * entry_size)
+                if tag == 0:
+                    break
+                if tag == ELF_DT_NEEDED and len(features["libraries"]) < MAX_LIBRARIES:
+                    features["libraries"].append(_c_string(data, strings_offset + value))
+
+        features["overlay_size"] = max(0, len(data) - end_of_data)
+    except (_MalformedBinary, struct.error, IndexError):
+        features["malformed"] = True
+    return features
+
+def _analyze_pe(data, pe_offset):
+    features = _features("PE")
+    try:
+        (_, section_count, _, _, _, optional_size, characteristics) = _unpack("<HHIIIHH", data, pe_offset + 4)
+        optional_offset = pe_offset + 24
+        (magic,) = _unpack("<H", data, optional_offset)
+        if magic not in (0x10b, 0x20b):
+            raise _MalformedBinary("optional header")
+        pe32_plus = magic == 0x20b
+        features["bits"] = 64 if pe32_plus else 32
+        (entry_rva,) = _unpack("<I", data, optional_offset + 16)
+        (size_of_headers,) = _unpack("<I", data, optional_offset + 60)
+        features["entry_point"] = entry_rva
+
+        directories_offset = optional_offset + (112 if pe32_plus else 96)
+        (directory_count,) = _unpack("<I", data, directories_offset - 4)
+        directories = [_unpack("<II", data, directories_offset + 8 * index) for index in range(min(directory_count, 16))]
+
+        # Table des sections
+        sections = []
+        section_offset = optional_offset + optional_size
+        end_of_data = size_of_headers
+        for index in range(min(section_count, MAX_SECTIONS)):
+            raw_name, virtual_size, virtual_address, raw_size, raw_offset = _unpack("<8sIIII", data, section_offset + 40 * index)
+            (flags,) = _unpack("<I", data, section_offset + 40 * index + 36)
+            name = raw_name.rstrip(b"\0").decode("latin-1")
+            sections.append((name, virtual_size, virtual_address, raw_size, raw_offset, flags))
+            _section(features, data, name, raw_offset, raw_size, bool(flags & PE_SCN_MEM_EXECUTE))
+            if raw_size:
+                end_of_data = max(end_of_data, raw_offset + raw_size)
+            if name in PACKER_SECTIONS:
+                features["packer_sections"].append(name)
+            if flags & PE_SCN_MEM_EXECUTE and flags & PE_SCN_MEM_WRITE:
+                features["writable_executable"].append(name)
+            # Section vide sur disque mais grande en mémoire: décompressée à l'exécution
+            if raw_size == 0 and virtual_size > 64 * 1024:
+                features["raw_size_mismatch"].append(name)
+
+        # Point d'entrée: doit se trouver dans une section exécutable (hors DLL sans point d'entrée)
+        if entry_rva or not characteristics & PE_FILE_DLL:
+            for position, (name, virtual_size, virtual_address, raw_size, _, flags) in enumerate(sections):
+                if virtual_address <= entry_rva < virtual_address + max(virtual_size, raw_size):
+                    features["entry_section"] = name
+                    # Point d'entrée dans la dernière section: technique classique des infecteurs
+                    if not flags & PE_SCN_MEM_EXECUTE or (position == len(sections) - 1 and len(sections) > 1):
+                        features["abnormal_entry_point"] = True
+                    break
+            else:
+                features["abnormal_entry_point"] = True
+
+        if len(directories) > PE_IMPORT_DIRECTORY and directories[PE_IMPORT_DIRECTORY][0]:
+            _read_pe_imports(data, features, sections, directories[PE_IMPORT_DIRECTORY][0], pe32_plus)
+
+        # Données ajoutées après la dernière section (hors signature Authenticode)
+        overlay_end = len(data)
+        if len(directories) > PE_SECURITY_DIRECTORY:
+            certificate_offset, certificate_size = directories[PE_SECURITY_DIRECTORY]
+            if certificate_size and certificate_offset + certificate_size == len(data):
+                overlay_end = certificate_offset
+        features["overlay_size"] = max(0, overlay_end - end_of_data)
+    except (_MalformedBinary, struct.error, IndexError):
+        features["malformed"] = True
+    return features
+
+def _rva_to_offset(sections, rva):
+    for name, virtual_size, virtual_address, raw_size, raw_offset, _ in sections:
+        if virtual_address <= rva < virtual_address + max(virtual_size, raw_size):
+            return rva - virtual_address + raw_offset
+    return rva
+
+def _read_pe_imports(data, features, sections, import_rva, pe32_plus):
+    thunk_format, ordinal_flag = ("<Q", 1 << 63) if pe32_plus else ("<I", 1 << 31)
+    thunk_size = struct.calcsize(thunk_format)
+    descriptor_offset = _rva_to_offset(sections, import_rva)
+    imports = set()
+    for index in range(MAX_LIBRARIES):
+        original_thunk, _, _, name_rva, first_thunk = _unpack("<IIIII", data, descriptor_offset + 20 * index)
+        if not name_rva and not first_thunk:
+            break
+        features["libraries"].append(_c_string(data, _rva_to_offset(sections, name_rva)))
+        thunk_offset = _rva_to_offset(sections, original_thunk or first_thunk)
+        for position in range(MAX_IMPORTS):
+            (thunk,) = _unpack(thunk_format, data, thunk_offset + position * thunk_size)
+            if not thunk:
+                break
+            features["imports"] += 1
+            if not thunk & ordinal_flag:
+                imports.add(_c_string(data, _rva_to_offset(sections, thunk & 0x7FFFFFFF) + 2))
+            if features["imports"] >= MAX_IMPORTS:
+                break
+    features["suspicious_imports"] = sorted(imports & SUSPICIOUS_IMPORTS)
+    features["dynamic_loading"] = bool(imports & DYNAMIC_LOADING_IMPORTS)
+
+def binary_heuristics(features, file_size):
+    """Score heuristique (0-1) et raisons déduits des caractéristiques d'un exécutable"""
+    score = 0.0
+    reasons = []
+    if features["malformed"]:
+        score += 0.2
+        reasons.append("En-têtes exécutables malformés")
+    if features["abnormal_entry_point"]:
+        score += 0.3
+        reasons.append(f"Point d'entrée anormal ({features['entry_section'] or 'hors section'})")
+    if features["packer_sections"]:
+        score += 0.3
+        reasons.append(f"Sections d'empaqueteur: {', '.join(features['packer_sections'])}")
+    if features["writable_executable"]:
+        score += 0.2
+        reasons.append("Sections inscriptibles et exécutables")
+    if features["raw_size_mismatch"]:
+        score += 0.1
+        reasons.append("Sections décompressées à l'exécution")
+    # Code compressé ou chiffré: décompressé par un chargeur à l'exécution
+    packed = [f"{section['name'] or '?'} ({section['entropy']})" for section in features["sections"]
+              if section["executable"] and section["entropy"] is not None and section["entropy"] >= HIGH_ENTROPY_THRESHOLD]
+    if packed:
+        score += 0.2
+        reasons.append(f"Sections exécutables à haute entropie: {', '.join(packed[:5])}")
+    if len(features["suspicious_imports"]) >= 3:
+        score += 0.3
+        reasons.append(f"Importations suspectes: {', '.join(features['suspicious_imports'][:5])}")
+    elif features["suspicious_imports"]:
+        score += 0.1
+        reasons.append(f"Importation sensible: {', '.join(features['suspicious_imports'])}")
+    if features["format"] == "PE" and 0 < features["imports"] <= 5 and features.get("dynamic_loading"):
+        score += 0.2
+        reasons.append("Table d'importation minimale (chargement dynamique)")
+    if features["format"] == "ELF" and not features["sections"]:
+        score += 0.2
+        reasons.append("Table des sections supprimée")
+    overlay = features["overlay_size"]
+    if overlay > 1024 * 1024 or (file_size and overlay > file_size // 2 and overlay > 4096):
+        score += 0.1
+        reasons.append(f"Données ajoutées en fin de fichier ({overlay} octets)")
+    return score, reasons
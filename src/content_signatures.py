@@ -0,0 +1,244 @@
+import re
+from collections import deque
+import numpy as np
+
+# Nombre maximal de correspondances rapportées par fichier
+MAX_CONTENT_MATCHES = 32
+
+# Longueur du préfixe (ancre) utilisé par le préfiltre vectorisé
+ANCHOR_LENGTH = 4
+
+class AhoCorasickAutomaton:
+    """Automate Aho-Corasick compilé à partir de milliers de motifs binaires
+
+    Toutes les signatures sont recherchées en un seul passage sur le contenu,
+    quel que soit leur nombre. Les transitions manquantes sont résolues par les
+    liens d'échec puis mémorisées (automate déterministe construit à la demande).
+    """
+
+    def __init__(self, patterns):
+        # patterns: itérable de (motif en octets, (nom, niveau de risque))
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+        self.pattern_count = 0
+        self.max_pattern_length = 0
+        self.min_pattern_length = 0
+        self.anchors = []
+
+        for pattern, payload in patterns:
+            if not pattern:
+                continue
+            self._add_pattern(bytes(pattern), payload)
+        self._build_failure_links()
+
+        # Octets pouvant démarrer un motif: saut rapide depuis l'état initial
+        first_bytes = sorted(self.goto[0])
+        self.first_byte_re = re.compile(b"[" + b"".join(re.escape(bytes([b])) for b in first_bytes) + b"]") if first_bytes else None
+
+        # Préfiltre NumPy: seules les positions dont les 4 premiers octets sont le début
+        # d'un motif sont confirmées par l'automate (motifs d'au moins 4 octets uniquement)
+        self.anchor_table = None
+        self.anchor_keys = None
+        if self.pattern_count and self.min_pattern_length >= ANCHOR_LENGTH:
+            anchors = np.frombuffer(b"".join(self.anchors), dtype="<u4")
+            self.anchor_keys = np.unique(anchors)
+            self.anchor_table = np.zeros(1 << 16, dtype=bool)
+            self.anchor_table[self.anchor_keys & 0xFFFF] = True
+        del self.anchors
+
+    def _add_pattern(self, pattern, payload):
+        state = 0
+        for byte in pattern:
+            next_state = self.goto[state].get(byte)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(())
+                self.goto[state][byte] = next_state
+            state = next_state
+        self.outputs[state] = self.outputs[state] + ((len(pattern), payload),)
+        self.pattern_count += 1
+        self.max_pattern_length = max(self.max_pattern_length, len(pattern))
+        self.min_pattern_length = min(self.min_pattern_length or len(pattern), len(pattern))
+        self.anchors.append(pattern[:ANCHOR_LENGTH].ljust(ANCHOR_LENGTH, b"\0"))
+
+    def _build_failure_links(self):
+        # Parcours en largeur: le lien d'échec d'un état est déjà connu pour ses parents
+        queue = deque(self.goto[0].values())
+        self.trie_edges = [dict(transitions) for transitions in self.goto]
+        while queue:
+            state = queue.popleft()
+            for byte, child in self.trie_edges[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and byte not in self.trie_edges[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.trie_edges[fallback].get(byte, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def next_state(self, state, byte):
+        """Transition complète (avec liens d'échec), mémorisée dans la table goto"""
+        origin = state
+        while True:
+            target = self.trie_edges[state].get(byte)
+            if target is not None:
+                break
+            if state == 0:
+                target = 0
+                break
+            state = self.fail[state]
+        self.goto[origin][byte] = target
+        return target
+
+    def matcher(self):
+        """Crée un consommateur de flux pour un fichier"""
+        if self.anchor_keys is not None:
+            return AnchoredContentMatcher(self)
+        return ContentMatcher(self)
+
+    def match_at(self, data, start, base_offset):
+        """Confirme par l'automate les motifs commençant exactement à la position start"""
+        state = 0
+        found = []
+        end = min(len(data), start + self.max_pattern_length)
+        for position in range(start, end):
+            next_state = self.goto[state].get(data[position])
+            if next_state is None:
+                next_state = self.next_state(state, data[position])
+            state = next_state
+            for pattern_length, payload in self.outputs[state]:
+                if position - pattern_length + 1 == start:
+                    found.append((pattern_length, payload))
+            if state == 0:
+                break
+        return [(base_offset + start + pattern_length - 1, pattern_length, payload) for pattern_length, payload in found]
+
+    def __len__(self):
+        return self.pattern_count
+
+class ContentMatcher:
+    """Consommateur de flux (méthode update) qui applique l'automate bloc par bloc
+
+    L'état de l'automate est conservé entre les blocs: un motif à cheval sur
+    deux blocs est détecté sans relecture.
+    """
+
+    def __init__(self, automaton):
+        self.automaton = automaton
+        self.state = 0
+        self.offset = 0
+        self.matches = []
+        self.seen = set()
+
+    def finish(self):
+        """Fin du flux (rien à faire: l'automate n'a pas de retard)"""
+        return self.matches
+
+    def update(self, chunk):
+        automaton = self.automaton
+        goto = automaton.goto
+        outputs = automaton.outputs
+        first_byte_re = automaton.first_byte_re
+        state = self.state
+        length = len(chunk)
+        position = 0
+
+        if first_byte_re is None or len(self.matches) >= MAX_CONTENT_MATCHES:
+            self.offset += length
+            return
+
+        while position < length:
+            if state == 0:
+                # Depuis l'état initial, sauter directement au prochain début de motif possible
+                found = first_byte_re.search(chunk, position)
+                if found is None:
+                    break
+                position = found.start()
+            byte = chunk[position]
+            next_state = goto[state].get(byte)
+            if next_state is None:
+                next_state = automaton.next_state(state, byte)
+            state = next_state
+            if outputs[state]:
+                self._record(outputs[state], self.offset + position)
+                if len(self.matches) >= MAX_CONTENT_MATCHES:
+                    break
+            position += 1
+
+        self.state = state
+        self.offset += length
+
+    def _record(self, outputs, end_position):
+        for pattern_length, (name, risk_level) in outputs:
+            if name in self.seen:
+                continue
+            self.seen.add(name)
+            self.matches.append({
+                "name": name,
+                "risk_level": risk_level,
+                "offset": end_position - pattern_length + 1
+            })
+
+class AnchoredContentMatcher(ContentMatcher):
+    """Variante vectorisée: préfiltre NumPy sur les ancres, confirmation par l'automate
+
+    Les positions candidates sont trouvées par une table de 65536 entrées sur les deux
+    premiers octets puis une recherche dichotomique sur les quatre premiers. Seules ces
+    positions passent dans l'automate. Les derniers octets de chaque bloc sont conservés
+    pour les motifs à cheval sur deux blocs; finish() traite la fin du fichier.
+    """
+
+    def __init__(self, automaton):
+        super().__init__(automaton)
+        self.pending = b""
+
+    def update(self, chunk):
+        data = self.pending + bytes(chunk)
+        # Positions dont la fenêtre de confirmation est complète
+        limit = len(data) - self.automaton.max_pattern_length + 1
+        if limit <= 0:
+            self.pending = data
+            return
+        self._scan(data, limit)
+        self.offset += limit
+        self.pending = data[limit:]
+
+    def finish(self):
+        """Traite les dernières positions du fichier"""
+        if self.pending:
+            self._scan(self.pending, len(self.pending))
+            self.offset += len(self.pending)
+            self.pending = b""
+        return self.matches
+
+    def _scan(self, data, limit):
+        if len(self.matches) >= MAX_CONTENT_MATCHES:
+            return
+        count = min(limit, len(data) - ANCHOR_LENGTH + 1)
+        if count <= 0:
+            return
+        automaton = self.automaton
+        raw = np.frombuffer(data, dtype=np.uint8)
+
+        # Premier filtre: deux premiers octets de l'ancre
+        pairs = raw[:count].astype(np.uint16) | (raw[1:count + 1].astype(np.uint16) << 8)
+        candidates = np.flatnonzero(automaton.anchor_table[pairs])
+        if not len(candidates):
+            return
+
+        # Second filtre: les quatre octets de l'ancre
+        anchors = (raw[candidates].astype(np.uint32)
+                   | (raw[candidates + 1].astype(np.uint32) << 8)
+                   | (raw[candidates + 2].astype(np.uint32) << 16)
+                   | (raw[candidates + 3].astype(np.uint32) << 24))
+        keys = automaton.anchor_keys
+        slots = np.minimum(np.searchsorted(keys, anchors), len(keys) - 1)
+        candidates = candidates[keys[slots] == anchors]
+
+        for start in candidates.tolist():
+            for end_position, pattern_length, payload in automaton.match_at(data, start, self.offset):
+                self._record(((pattern_length, payload),), end_position)
+            if len(self.matches) >= MAX_CONTENT_MATCHES:
+                break
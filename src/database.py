@@ -2,15 +2,79 @@ import sqlite3
 from datetime import datetime, timedelta
 import json
 import os
+import threading
+import time
+from src.hashing import prehash_bytes
 
-def get_db_connection():
+# Modifications des signatures faites par ce processus: les index se rechargent sans attendre leur intervalle
+_local_signature_changes = 0
+
+def get_local_signature_changes():
+    """Nombre de modifications des signatures faites par ce processus"""
+    return _local_signature_changes
+
+def _signatures_changed():
+    global _local_signature_changes
+    _local_signature_changes += 1
+
+# Observateur optionnel de la durée des requêtes: observer(opération, secondes)
+_query_observer = None
+
+# Opérations distinguées dans les mesures (les autres sont regroupées sous OTHER)
+QUERY_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "ALTER")
+
+def set_query_observer(observer):
+    """Active (ou désactive avec None) la mesure de la durée des requêtes SQLite"""
+    global _query_observer
+    _query_observer = observer
+
+def _observe_query(sql, elapsed):
+    observer = _query_observer
+    if observer is None:
+        return
+    words = sql.split(None, 1)
+    operation = words[0].upper() if words else ""
+    observer(operation if operation in QUERY_OPERATIONS else "OTHER", elapsed)
+
+class _TimedCursor(sqlite3.Cursor):
+    """Curseur mesurant la durée d'exécution de chaque requête"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _observe_query(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _observe_query(sql, time.perf_counter() - started)
+
+class _TimedConnection(sqlite3.Connection):
+    """Connexion dont les curseurs (et conn.execute) sont mesurés"""
+
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def get_db_connection(check_same_thread=True):
     """Obtient une connexion à la base de données avec gestion des accès concurrents"""
     try:
         db_file = os.environ.get('DATABASE_FILE', 'data/users.db')
         # Créer le répertoire si nécessaire
         os.makedirs(os.path.dirname(db_file), exist_ok=True)
         
-        conn = sqlite3.connect(db_file, timeout=30)
+        # Connexion mesurée uniquement si un observateur est installé (serveur webhook)
+        factory = _TimedConnection if _query_observer is not None else sqlite3.Connection
+        conn = sqlite3.connect(db_file, timeout=30, check_same_thread=check_same_thread, factory=factory)
         conn.row_factory = sqlite3.Row
         return conn
     except Exception as e:
@@ -49,6 +113,22 @@ def init_database():
         )
         ''')
         
+        # Condensat flou (similarité) des signatures: colonne ajoutée aux bases existantes
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(malware_hashes)')}
+        if 'fuzzy_hash' not in columns:
+            cursor.execute('ALTER TABLE malware_hashes ADD COLUMN fuzzy_hash TEXT')
+        
+        # Taille de l'échantillon (NULL si inconnue): un fichier d'une autre taille ne peut pas correspondre
+        if 'file_size' not in columns:
+            cursor.execute('ALTER TABLE malware_hashes ADD COLUMN file_size INTEGER')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_malware_hashes_file_size ON malware_hashes (file_size)
+        ''')
+        
+        # Préhachage (taille, début et fin de l'échantillon): la lecture complète n'a lieu qu'en cas de collision
+        if 'prehash' not in columns:
+            cursor.execute('ALTER TABLE malware_hashes ADD COLUMN prehash TEXT')
+        
         # Table de l'historique des scans
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS scan_history (
@@ -74,18 +154,124 @@ def init_database():
         )
         ''')
         
+        # Version de la base de signatures (incrémentée à chaque modification)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS signature_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        ''')
+        
+        cursor.execute('''
+        INSERT OR IGNORE INTO signature_meta (key, value) VALUES ('signature_version', 1)
+        ''')
+        
+        # Table des signatures de contenu (motifs binaires recherchés dans les fichiers)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS content_signatures (
+            pattern_hex TEXT PRIMARY KEY,
+            malware_name TEXT NOT NULL,
+            risk_level INTEGER DEFAULT 5,
+            date_added DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        for table in ('malware_hashes', 'content_signatures'):
+            for operation in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()}
+                AFTER {operation} ON {table}
+                BEGIN
+                    UPDATE signature_meta SET value = value + 1 WHERE key = 'signature_version';
+                END
+                ''')
+        
+        # Cache des scans incrémentaux (identité du fichier -> condensats et verdict)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scan_cache (
+            device INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            ctime_ns INTEGER NOT NULL,
+            hash_md5 TEXT,
+            hash_sha1 TEXT,
+            hash_sha256 TEXT,
+            verdict TEXT,
+            signature_version INTEGER,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (device, inode)
+        )
+        ''')
+        
+        # Points de reprise des scans longs (un par cible): dernier fichier terminé, compteurs et menaces
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scan_checkpoints (
+            target_path TEXT PRIMARY KEY,
+            email TEXT,
+            scan_type TEXT,
+            watermark TEXT,
+            files_scanned INTEGER DEFAULT 0,
+            files_walked INTEGER DEFAULT 0,
+            threats_detected INTEGER DEFAULT 0,
+            threats TEXT,
+            started_at DATETIME,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        # Index de la quarantaine: un élément par fichier mis en quarantaine, objets partagés par sha256
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quarantine_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sha256 TEXT NOT NULL,
+            original_path TEXT NOT NULL,
+            owner_uid INTEGER,
+            owner_gid INTEGER,
+            mode INTEGER,
+            mtime_ns INTEGER,
+            size INTEGER,
+            stored_size INTEGER,
+            verdict TEXT,
+            risk_level INTEGER DEFAULT 0,
+            quarantined_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_quarantine_items_sha256 ON quarantine_items (sha256)
+        ''')
+        
         # Insérer des hashs malveillants par défaut
+        default_samples = [
+            ("d41d8cd98f00b204e9800998ecf8427e", "Empty file", 1, b""),
+            ("e99a18c428cb38d5f260853678922e03", "Test malware signature", 5, b"abc123"),
+            ("5d41402abc4b2a76b9719d911017c592", "Another test signature", 7, b"hello")
+        ]
         default_hashes = [
-            ("d41d8cd98f00b204e9800998ecf8427e", "Empty file", 1),
-            ("e99a18c428cb38d5f260853678922e03", "Test malware signature", 5),
-            ("5d41402abc4b2a76b9719d911017c592", "Another test signature", 7)
+            (hash_value, name, risk_level, len(sample), prehash_bytes(sample))
+            for hash_value, name, risk_level, sample in default_samples
         ]
         
         cursor.executemany('''
-        INSERT OR IGNORE INTO malware_hashes (hash_value, malware_name, risk_level)
-        VALUES (?, ?, ?)
+        INSERT OR IGNORE INTO malware_hashes (hash_value, malware_name, risk_level, file_size, prehash)
+        VALUES (?, ?, ?, ?, ?)
         ''', default_hashes)
         
+        # Bases existantes: renseigner la taille et le préhachage des signatures par défaut
+        cursor.executemany('''
+        UPDATE malware_hashes SET file_size = ? WHERE hash_value = ? AND file_size IS NULL
+        ''', [(file_size, hash_value) for hash_value, _, _, file_size, _ in default_hashes])
+        cursor.executemany('''
+        UPDATE malware_hashes SET prehash = ? WHERE hash_value = ? AND prehash IS NULL
+        ''', [(prehash, hash_value) for hash_value, _, _, _, prehash in default_hashes])
+        
+        # Signature de contenu par défaut: fichier de test EICAR
+        eicar = rb"X5O!P%@AP[4\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*"
+        cursor.execute('''
+        INSERT OR IGNORE INTO content_signatures (pattern_hex, malware_name, risk_level)
+        VALUES (?, ?, ?)
+        ''', (eicar.hex(), "EICAR-Test-File", 8))
+        
         conn.commit()
         conn.close()
         print("Base de données SQLite initialisée avec succès")
@@ -181,8 +367,8 @@ def update_user_subscription(email, subscription_type, duration_days=30):
         print(f"Erreur mise à jour abonnement: {e}")
         return False
 
-def add_malware_hash(hash_value, malware_name, risk_level=5):
-    """Ajoute un hash malveillant à la base de données"""
+def add_malware_hash(hash_value, malware_name, risk_level=5, fuzzy_hash=None, file_size=None, prehash=None):
+    """Ajoute un hash malveillant (avec condensat flou, taille et préhachage de l'échantillon éventuels) à la base de données"""
     try:
         conn = get_db_connection()
         if conn is None:
@@ -191,17 +377,68 @@ def add_malware_hash(hash_value, malware_name, risk_level=5):
         cursor = conn.cursor()
         
         cursor.execute('''
-        INSERT OR REPLACE INTO malware_hashes (hash_value, malware_name, risk_level)
-        VALUES (?, ?, ?)
-        ''', (hash_value, malware_name, risk_level))
+        INSERT OR REPLACE INTO malware_hashes (hash_value, malware_name, risk_level, fuzzy_hash, file_size, prehash)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (hash_value, malware_name, risk_level, fuzzy_hash, file_size, prehash))
         
         conn.commit()
         conn.close()
+        _signatures_changed()
         return True
     except Exception as e:
         print(f"Erreur lors de l'ajout du hash malveillant: {e}")
         return False
 
+def add_content_signature(pattern, malware_name, risk_level=5):
+    """Ajoute un motif binaire (octets ou hexadécimal) aux signatures de contenu"""
+    try:
+        pattern_hex = pattern.hex() if isinstance(pattern, (bytes, bytearray)) else bytes.fromhex(pattern).hex()
+        if not pattern_hex:
+            return False
+        
+        conn = get_db_connection()
+        if conn is None:
+            return False
+            
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        INSERT OR REPLACE INTO content_signatures (pattern_hex, malware_name, risk_level)
+        VALUES (?, ?, ?)
+        ''', (pattern_hex, malware_name, risk_level))
+        
+        conn.commit()
+        conn.close()
+        _signatures_changed()
+        return True
+    except Exception as e:
+        print(f"Erreur lors de l'ajout de la signature de contenu: {e}")
+        return False
+
+def get_content_signatures():
+    """Récupère toutes les signatures de contenu sous forme (motif, nom, risque)"""
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return []
+            
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT pattern_hex, malware_name, risk_level FROM content_signatures')
+        
+        signatures = []
+        for row in cursor.fetchall():
+            try:
+                signatures.append((bytes.fromhex(row['pattern_hex']), row['malware_name'], row['risk_level']))
+            except ValueError:
+                continue
+        conn.close()
+        
+        return signatures
+    except Exception as e:
+        print(f"Erreur lors de la récupération des signatures de contenu: {e}")
+        return []
+
 def check_hash(hash_value):
     """Vérifie si un hash est connu comme malveillant"""
     try:
@@ -226,6 +463,41 @@ def check_hash(hash_value):
         print(f"Erreur lors de la vérification du hash: {e}")
         return False, None, 0
 
+# Nombre de paramètres par requête (limite SQLite historique: 999)
+HASH_LOOKUP_BATCH_SIZE = 500
+
+def check_hashes(hash_values):
+    """Vérifie un ensemble de hashs en quelques requêtes et retourne les correspondances
+
+    Retourne un dictionnaire {hash: (malware_name, risk_level)} limité aux hashs malveillants.
+    """
+    try:
+        unique_hashes = list(dict.fromkeys(h for h in hash_values if h))
+        if not unique_hashes:
+            return {}
+        
+        conn = get_db_connection()
+        if conn is None:
+            return {}
+            
+        cursor = conn.cursor()
+        matches = {}
+        
+        for start in range(0, len(unique_hashes), HASH_LOOKUP_BATCH_SIZE):
+            batch = unique_hashes[start:start + HASH_LOOKUP_BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            cursor.execute(f'''
+            SELECT hash_value, malware_name, risk_level FROM malware_hashes WHERE hash_value IN ({placeholders})
+            ''', batch)
+            for row in cursor.fetchall():
+                matches[row['hash_value']] = (row['malware_name'], row['risk_level'])
+        
+        conn.close()
+        return matches
+    except Exception as e:
+        print(f"Erreur lors de la vérification groupée des hashs: {e}")
+        return {}
+
 def add_scan_history(email, target_path, scan_type, files_scanned, threats_detected, duration_seconds):
     """Ajoute une entrée à l'historique des scans"""
     try:
@@ -271,4 +543,297 @@ def get_scan_history(email, limit=50):
         return user_history
     except Exception as e:
         print(f"Erreur lors de la récupération de l'historique des scans: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def save_scan_checkpoint(target_path, email, scan_type, watermark, files_scanned, files_walked,
+                         threats_detected, threats, started_at):
+    """Enregistre (ou remplace) le point de reprise d'un scan en cours"""
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return False
+            
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        INSERT OR REPLACE INTO scan_checkpoints
+        (target_path, email, scan_type, watermark, files_scanned, files_walked, threats_detected, threats,
+         started_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (target_path, email, scan_type, watermark, files_scanned, files_walked, threats_detected,
+              json.dumps(threats, default=str, ensure_ascii=False), started_at))
+        
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"Erreur lors de l'enregistrement du point de reprise: {e}")
+        return False
+
+def get_scan_checkpoint(target_path):
+    """Récupère le point de reprise d'un scan interrompu (None s'il n'y en a pas)"""
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return None
+            
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT * FROM scan_checkpoints WHERE target_path = ?
+        ''', (target_path,))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row is None:
+            return None
+        checkpoint = dict(row)
+        checkpoint['threats'] = json.loads(checkpoint['threats']) if checkpoint['threats'] else []
+        return checkpoint
+    except Exception as e:
+        print(f"Erreur lors de la récupération du point de reprise: {e}")
+        return None
+
+def delete_scan_checkpoint(target_path):
+    """Supprime le point de reprise d'une cible (scan terminé)"""
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return False
+            
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        DELETE FROM scan_checkpoints WHERE target_path = ?
+        ''', (target_path,))
+        
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"Erreur lors de la suppression du point de reprise: {e}")
+        return False
+
+def add_quarantine_item(sha256, original_path, owner_uid, owner_gid, mode, mtime_ns, size, stored_size,
+                        verdict=None, risk_level=0):
+    """Ajoute un fichier à l'index de la quarantaine et retourne son identifiant (None en cas d'erreur)"""
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return None
+            
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        INSERT INTO quarantine_items
+        (sha256, original_path, owner_uid, owner_gid, mode, mtime_ns, size, stored_size, verdict, risk_level)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (sha256, original_path, owner_uid, owner_gid, mode, mtime_ns, size, stored_size, verdict, risk_level))
+        
+        item_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        return item_id
+    except Exception as e:
+        print(f"Erreur lors de l'ajout à l'index de la quarantaine: {e}")
+        return None
+
+def get_quarantine_items(limit=None, older_than_days=None):
+    """Récupère les éléments de la quarantaine, du plus récent au plus ancien"""
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return []
+            
+        cursor = conn.cursor()
+        
+        query = 'SELECT * FROM quarantine_items'
+        params = []
+        if older_than_days is not None:
+            query += " WHERE quarantined_at < datetime('now', ?)"
+            params.append(f'-{float(older_than_days)} days')
+        query += ' ORDER BY quarantined_at DESC, id DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        cursor.execute(query, params)
+        
+        items = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return items
+    except Exception as e:
+        print(f"Erreur lors de la récupération de la quarantaine: {e}")
+        return []
+
+def get_quarantine_item(item_id):
+    """Récupère un élément de la quarantaine (None s'il n'existe pas)"""
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return None
+            
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT * FROM quarantine_items WHERE id = ?
+        ''', (item_id,))
+        
+        row = cursor.fetchone()
+        conn.close()
+        return dict(row) if row else None
+    except Exception as e:
+        print(f"Erreur lors de la récupération de l'élément de quarantaine: {e}")
+        return None
+
+def delete_quarantine_item(item_id):
+    """Retire un élément de l'index et retourne le nombre d'éléments partageant encore son contenu"""
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return None
+            
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT sha256 FROM quarantine_items WHERE id = ?
+        ''', (item_id,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.close()
+            return None
+        
+        cursor.execute('DELETE FROM quarantine_items WHERE id = ?', (item_id,))
+        cursor.execute('SELECT COUNT(*) FROM quarantine_items WHERE sha256 = ?', (row['sha256'],))
+        remaining = cursor.fetchone()[0]
+        
+        conn.commit()
+        conn.close()
+        return remaining
+    except Exception as e:
+        print(f"Erreur lors de la suppression de l'élément de quarantaine: {e}")
+        return None
+
+def get_signature_version():
+    """Retourne la version courante de la base de signatures"""
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            return 0
+            
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT value FROM signature_meta WHERE key = 'signature_version'
+        ''')
+        
+        result = cursor.fetchone()
+        conn.close()
+        
+        return result['value'] if result else 0
+    except Exception as e:
+        print(f"Erreur lors de la récupération de la version des signatures: {e}")
+        return 0
+
+class ScanCache:
+    """Cache persistant des scans incrémentaux, indexé sur l'identité des fichiers
+
+    Une entrée est valide tant que (device, inode, taille, mtime_ns, ctime_ns) ne
+    change pas. Le verdict n'est réutilisé que pour la même version des signatures;
+    les condensats restent valides tant que le fichier n'a pas été modifié.
+    Une seule connexion est partagée par les threads de scan.
+    """
+    
+    # Nombre d'écritures regroupées dans une transaction
+    COMMIT_BATCH_SIZE = 256
+    
+    def __init__(self):
+        self.conn = None
+        self.lock = threading.Lock()
+        self.pending = []
+        self.signature_version = 0
+    
+    def open(self):
+        """Ouvre la connexion
+
+        Les verdicts des anciennes signatures ne sont pas purgés ici (réécriture de
+        toute la table à chaque scan): lookup les ignore, et store les remplace.
+        """
+        if self.conn is None:
+            self.conn = get_db_connection(check_same_thread=False)
+            if self.conn is None:
+                return False
+        self.signature_version = get_signature_version()
+        return True
+    
+    def set_signature_version(self, version):
+        """Version des signatures des verdicts lus et écrits (celle de l'index rechargé)"""
+        self.signature_version = version
+    
+    def lookup(self, file_stat):
+        """Retourne l'entrée du cache si le fichier n'a pas changé, sinon None"""
+        if self.conn is None:
+            return None
+        try:
+            with self.lock:
+                row = self.conn.execute('''
+                SELECT hash_md5, hash_sha1, hash_sha256, verdict, signature_version
+                FROM scan_cache
+                WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ? AND ctime_ns = ?
+                ''', (file_stat.st_dev, file_stat.st_ino, file_stat.st_size,
+                      file_stat.st_mtime_ns, file_stat.st_ctime_ns)).fetchone()
+            if row is None:
+                return None
+            
+            verdict = None
+            if row['verdict'] and row['signature_version'] == self.signature_version:
+                verdict = json.loads(row['verdict'])
+            return {
+                "digests": {name: row[f"hash_{name}"] for name in ("md5", "sha1", "sha256") if row[f"hash_{name}"]},
+                "verdict": verdict
+            }
+        except Exception as e:
+            print(f"Erreur lors de la lecture du cache de scan: {e}")
+            return None
+    
+    def store(self, file_stat, digests, verdict):
+        """Enregistre les condensats et le verdict d'un fichier (écriture groupée)"""
+        if self.conn is None:
+            return
+        entry = (file_stat.st_dev, file_stat.st_ino, file_stat.st_size,
+                 file_stat.st_mtime_ns, file_stat.st_ctime_ns,
+                 digests.get("md5"), digests.get("sha1"), digests.get("sha256"),
+                 json.dumps(verdict), self.signature_version)
+        with self.lock:
+            self.pending.append(entry)
+            if len(self.pending) >= self.COMMIT_BATCH_SIZE:
+                self._flush_locked()
+    
+    def flush(self):
+        """Écrit les entrées en attente dans la base"""
+        if self.conn is None:
+            return
+        with self.lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        if not self.pending:
+            return
+        try:
+            self.conn.executemany('''
+            INSERT OR REPLACE INTO scan_cache
+            (device, inode, size, mtime_ns, ctime_ns, hash_md5, hash_sha1, hash_sha256, verdict, signature_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', self.pending)
+            self.conn.commit()
+        except Exception as e:
+            print(f"Erreur lors de l'écriture du cache de scan: {e}")
+        self.pending = []
+    
+    def close(self):
+        """Écrit les entrées en attente et ferme la connexion"""
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
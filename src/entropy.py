@@ -0,0 +1,143 @@
+import os
+import numpy as np
+
+# Fenêtres glissantes de 8 Ko avançant par pas de 4 Ko (deux demi-fenêtres)
+ENTROPY_WINDOW = 8192
+ENTROPY_STEP = ENTROPY_WINDOW // 2
+
+# Seuil (bits par octet) au-delà duquel une fenêtre est considérée compressée ou chiffrée
+HIGH_ENTROPY_THRESHOLD = 7.2
+
+# Nombre maximal de régions de haute entropie rapportées par fichier
+MAX_ENTROPY_REGIONS = 16
+
+# Fichiers texte dont le contenu ne devrait pas ressembler à des données chiffrées
+TEXT_EXTENSIONS = ('.txt', '.ps1', '.bat', '.cmd', '.vbs', '.js', '.py', '.sh', '.csv', '.log',
+                   '.xml', '.json', '.html', '.htm', '.ini', '.cfg')
+
+# Table c * log2(c) pour les effectifs possibles d'une fenêtre (évite un log2 par case)
+_COUNT_LOG_TABLE = np.zeros(ENTROPY_WINDOW + 1)
+_COUNT_LOG_TABLE[1:] = np.arange(1, ENTROPY_WINDOW + 1) * np.log2(np.arange(1, ENTROPY_WINDOW + 1))
+
+def shannon_entropy(histograms, length):
+    """Entropie de Shannon (bits par octet) d'un ou plusieurs histogrammes de 256 cases"""
+    if length <= ENTROPY_WINDOW:
+        # H = log2(n) - somme(c * log2(c)) / n
+        return np.log2(length) - _COUNT_LOG_TABLE[histograms].sum(axis=-1) / length
+    probabilities = histograms / float(length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(probabilities > 0, probabilities * np.log2(probabilities), 0.0)
+    return -terms.sum(axis=-1)
+
+class EntropyAnalyzer:
+    """Consommateur de flux (méthode update) calculant l'entropie du fichier et de fenêtres glissantes
+
+    Chaque bloc lu est découpé en demi-fenêtres dont l'histogramme est obtenu par
+    np.bincount; une fenêtre est la somme de deux demi-fenêtres consécutives, ce qui
+    donne des fenêtres chevauchantes sans relire les octets.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(256, dtype=np.int64)
+        self.length = 0
+        self.pending = bytearray()
+        self.previous = None
+        # Position de la prochaine demi-fenêtre complète
+        self.offset = 0
+        self.windows = 0
+        self.high_windows = 0
+        self.max_window_entropy = 0.0
+        self.regions = []
+        self.current_region = None
+        self.region_count = 0
+
+    def update(self, chunk):
+        view = memoryview(chunk)
+        self.length += len(view)
+        if self.pending:
+            needed = ENTROPY_STEP - len(self.pending)
+            self.pending += view[:needed]
+            view = view[needed:]
+            if len(self.pending) < ENTROPY_STEP:
+                return
+            self._add_halves(np.frombuffer(bytes(self.pending), dtype=np.uint8).reshape(1, ENTROPY_STEP))
+            self.pending = bytearray()
+        count = len(view) // ENTROPY_STEP
+        if count:
+            self._add_halves(np.frombuffer(view[:count * ENTROPY_STEP], dtype=np.uint8).reshape(count, ENTROPY_STEP))
+        self.pending += view[count * ENTROPY_STEP:]
+
+    def _add_halves(self, rows):
+        halves = np.empty((len(rows), 256), dtype=np.int64)
+        for index, row in enumerate(rows):
+            halves[index] = np.bincount(row, minlength=256)
+        self.counts += halves.sum(axis=0)
+
+        first_offset = self.offset - ENTROPY_STEP
+        if self.previous is not None:
+            halves = np.vstack((self.previous[None, :], halves))
+        else:
+            first_offset = self.offset
+        self.previous = halves[-1]
+        self.offset += len(rows) * ENTROPY_STEP
+        if len(halves) < 2:
+            return
+
+        entropies = shannon_entropy(halves[:-1] + halves[1:], ENTROPY_WINDOW)
+        self.windows += len(entropies)
+        self.max_window_entropy = max(self.max_window_entropy, float(entropies.max()))
+        high = np.flatnonzero(entropies >= HIGH_ENTROPY_THRESHOLD)
+        if not len(high):
+            return
+        self.high_windows += len(high)
+
+        # Suites de fenêtres hautes qui se chevauchent ou se touchent (écart d'au plus deux pas)
+        run_starts = np.concatenate(([0], np.flatnonzero(np.diff(high) > 2) + 1))
+        run_ends = np.concatenate((run_starts[1:], [len(high)]))
+        run_maxima = np.maximum.reduceat(entropies[high], run_starts)
+        for first, last, maximum in zip(high[run_starts].tolist(), high[run_ends - 1].tolist(), run_maxima.tolist()):
+            self._add_region(first_offset + first * ENTROPY_STEP, first_offset + last * ENTROPY_STEP + ENTROPY_WINDOW, maximum)
+
+    def _add_region(self, start, end, entropy):
+        # Région contiguë à la précédente (à cheval sur deux blocs): prolongée
+        if self.current_region is not None and start <= self.current_region[1]:
+            self.current_region[1] = end
+            self.current_region[2] = max(self.current_region[2], entropy)
+            return
+        self.region_count += 1
+        self.current_region = [start, end, entropy]
+        if len(self.regions) < MAX_ENTROPY_REGIONS:
+            self.regions.append(self.current_region)
+
+    def finish(self):
+        """Statistiques d'entropie du fichier complet"""
+        if self.pending:
+            self.counts += np.bincount(np.frombuffer(bytes(self.pending), dtype=np.uint8), minlength=256)
+            self.pending = bytearray()
+        entropy = float(shannon_entropy(self.counts, self.length)) if self.length else 0.0
+        return {
+            "entropy": round(entropy, 3),
+            "max_window_entropy": round(self.max_window_entropy, 3),
+            "high_entropy_ratio": round(self.high_windows / self.windows, 3) if self.windows else 0.0,
+            "high_entropy_regions": [
+                {"offset": start, "length": end - start, "entropy": round(value, 3)}
+                for start, end, value in self.regions
+            ],
+            "high_entropy_region_count": self.region_count
+        }
+
+def entropy_heuristics(entropy, file_path, binary=None):
+    """Score heuristique (0-1) et raisons déduits des statistiques d'entropie"""
+    score = 0.0
+    reasons = []
+    if binary is not None:
+        if entropy["entropy"] >= HIGH_ENTROPY_THRESHOLD or entropy["high_entropy_ratio"] > 0.5:
+            score += 0.3
+            reasons.append(f"Exécutable empaqueté ou chiffré (entropie {entropy['entropy']})")
+        elif entropy["high_entropy_region_count"]:
+            score += 0.1
+            reasons.append(f"Région chiffrée dans l'exécutable ({entropy['high_entropy_region_count']})")
+    elif os.path.splitext(file_path)[1].lower() in TEXT_EXTENSIONS and entropy["entropy"] >= 5.8:
+        score += 0.3
+        reasons.append(f"Contenu obfusqué ou chiffré dans un fichier texte (entropie {entropy['entropy']})")
+    return score, reasons
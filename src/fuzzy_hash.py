@@ -0,0 +1,243 @@
+from collections import Counter
+import numpy as np
+
+# Paramètres du hachage par morceaux (CTPH, format "ctph1:taille_bloc:signature1:signature2")
+ROLLING_WINDOW = 7
+MIN_BLOCKSIZE = 3
+SIGNATURE_LENGTH = 64
+BASE64_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_ALPHABET = frozenset(BASE64_ALPHABET)
+
+# Marqueur de format: le hachage glissant diffère de celui de ssdeep, dont les
+# condensats ("taille_bloc:signature1:signature2") ne sont pas comparables et sont refusés
+FUZZY_HASH_FORMAT = "ctph1"
+
+# Coefficients du hachage glissant (polynôme sur la fenêtre, puis mélange des bits)
+_POWERS = [np.uint32(pow(257, k, 1 << 32)) for k in range(ROLLING_WINDOW)]
+_MIX = np.uint32(2654435761)
+_PIECE_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+# Index LSH: nombre maximal de candidats comparés et taille des n-grammes
+MAX_CANDIDATES = 64
+NGRAM_LENGTH = ROLLING_WINDOW
+
+def choose_blocksize(file_size):
+    """Taille de bloc initiale: environ SIGNATURE_LENGTH morceaux pour le fichier"""
+    blocksize = MIN_BLOCKSIZE
+    while blocksize * SIGNATURE_LENGTH < file_size:
+        blocksize *= 2
+    return blocksize
+
+class _BlockLevel:
+    """Signature d'une taille de bloc: un caractère par morceau délimité par le hachage glissant"""
+
+    def __init__(self, blocksize, max_length):
+        self.blocksize = blocksize
+        self.max_length = max_length
+        self.pieces = []
+        # Somme des hachages glissants depuis la dernière frontière émise
+        self.accumulator = np.uint64(0)
+        self.has_tail = False
+
+    def update(self, rolling, cumulative):
+        triggers = np.flatnonzero(rolling % np.uint32(self.blocksize) == np.uint32(self.blocksize - 1))
+        room = self.max_length - 1 - len(self.pieces)
+        if room > 0 and len(triggers):
+            emitted = triggers[:room]
+            ends = cumulative[emitted]
+            sums = np.diff(ends, prepend=np.uint64(0))
+            sums[0] += self.accumulator
+            self.pieces.extend(sums.tolist())
+            self.accumulator = cumulative[-1] - ends[-1]
+            self.has_tail = bool(emitted[-1] != len(rolling) - 1) or len(triggers) > len(emitted)
+        else:
+            self.accumulator += cumulative[-1]
+            self.has_tail = True
+
+    def signature(self):
+        pieces = list(self.pieces)
+        if self.has_tail:
+            pieces.append(int(self.accumulator))
+        if not pieces:
+            return ""
+        values = (np.array(pieces, dtype=np.uint64) * _PIECE_MIX) >> np.uint64(58)
+        return "".join(BASE64_ALPHABET[value] for value in values.tolist())
+
+class FuzzyHasher:
+    """Consommateur de flux (méthode update) calculant un condensat flou de type CTPH
+
+    Le hachage glissant est vectorisé avec NumPy bloc par bloc: deux fichiers qui
+    ne diffèrent que localement partagent la plupart des caractères de leur signature.
+    """
+
+    def __init__(self, file_size):
+        blocksize = choose_blocksize(file_size)
+        self.blocksize = blocksize
+        # Trois niveaux calculés en parallèle: le choix final dépend de la longueur obtenue
+        self.levels = {
+            size: _BlockLevel(size, SIGNATURE_LENGTH if size <= blocksize else SIGNATURE_LENGTH // 2)
+            for size in (max(MIN_BLOCKSIZE, blocksize // 2), blocksize, blocksize * 2)
+        }
+        self.window = np.zeros(ROLLING_WINDOW - 1, dtype=np.uint8)
+        self.length = 0
+
+    def update(self, chunk):
+        if not len(chunk):
+            return
+        data = np.concatenate((self.window, np.frombuffer(chunk, dtype=np.uint8)))
+        wide = data.astype(np.uint32)
+        count = len(data) - ROLLING_WINDOW + 1
+        rolling = wide[ROLLING_WINDOW - 1:].copy()
+        for k in range(1, ROLLING_WINDOW):
+            start = ROLLING_WINDOW - 1 - k
+            rolling += wide[start:start + count] * _POWERS[k]
+        rolling *= _MIX
+        rolling ^= rolling >> np.uint32(16)
+        cumulative = np.cumsum(rolling, dtype=np.uint64)
+        for level in self.levels.values():
+            level.update(rolling, cumulative)
+        self.window = data[-(ROLLING_WINDOW - 1):].copy()
+        self.length += len(chunk)
+
+    def hexdigest(self):
+        """Condensat "ctph1:taille_bloc:signature1:signature2" (même rôle que hexdigest de hashlib)"""
+        blocksize = self.blocksize
+        first = self.levels[blocksize].signature()
+        if len(first) < SIGNATURE_LENGTH // 2 and blocksize > MIN_BLOCKSIZE:
+            blocksize //= 2
+            first = self.levels[blocksize].signature()
+        second = self.levels[blocksize * 2].signature()[:SIGNATURE_LENGTH // 2]
+        return f"{FUZZY_HASH_FORMAT}:{blocksize}:{first}:{second}"
+
+    def finish(self):
+        """Fin du flux: retourne le condensat flou"""
+        return self.hexdigest()
+
+def parse_fuzzy_hash(fuzzy_hash):
+    """Découpe un condensat flou en (taille de bloc, signature1, signature2)
+
+    Retourne None pour un condensat d'un autre format (ssdeep notamment) ou mal formé.
+    """
+    try:
+        marker, blocksize, first, second = fuzzy_hash.split(":")
+        blocksize = int(blocksize)
+    except (AttributeError, ValueError):
+        return None
+    if marker != FUZZY_HASH_FORMAT or not _valid_blocksize(blocksize):
+        return None
+    if len(first) > SIGNATURE_LENGTH or len(second) > SIGNATURE_LENGTH // 2:
+        return None
+    if not set(first + second) <= _ALPHABET:
+        return None
+    return blocksize, _eliminate_runs(first), _eliminate_runs(second)
+
+def _valid_blocksize(blocksize):
+    # Tailles produites par choose_blocksize: MIN_BLOCKSIZE multiplié par une puissance de deux
+    if blocksize < MIN_BLOCKSIZE or blocksize % MIN_BLOCKSIZE:
+        return False
+    ratio = blocksize // MIN_BLOCKSIZE
+    return ratio & (ratio - 1) == 0
+
+def _eliminate_runs(signature):
+    # Les répétitions de plus de 3 caractères identiques n'apportent pas d'information
+    result = []
+    for char in signature:
+        if len(result) >= 3 and result[-1] == result[-2] == result[-3] == char:
+            continue
+        result.append(char)
+    return "".join(result)
+
+def _ngrams(signature):
+    return {signature[i:i + NGRAM_LENGTH] for i in range(len(signature) - NGRAM_LENGTH + 1)}
+
+def _edit_distance(first, second):
+    # Insertion/suppression: 1, substitution: 2
+    previous = list(range(len(second) + 1))
+    for i, char in enumerate(first, 1):
+        current = [i]
+        for j, other in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (0 if char == other else 2)))
+        previous = current
+    return previous[-1]
+
+def _score_signatures(first, second, blocksize):
+    if not first or not second or not _ngrams(first) & _ngrams(second):
+        return 0
+    distance = _edit_distance(first, second)
+    score = 100 - (distance * SIGNATURE_LENGTH // (len(first) + len(second))) * 100 // SIGNATURE_LENGTH
+    # Petites tailles de bloc: plafonner pour ne pas surestimer la ressemblance de petits fichiers
+    if blocksize < (99 + ROLLING_WINDOW) // ROLLING_WINDOW * MIN_BLOCKSIZE:
+        score = min(score, blocksize // MIN_BLOCKSIZE * min(len(first), len(second)))
+    return max(0, score)
+
+def compare(first_hash, second_hash):
+    """Score de similarité (0 à 100) entre deux condensats flous"""
+    first = parse_fuzzy_hash(first_hash)
+    second = parse_fuzzy_hash(second_hash)
+    if first is None or second is None:
+        return 0
+    return _compare_parsed(first, second)
+
+def _compare_parsed(first, second):
+    size1, a1, a2 = first
+    size2, b1, b2 = second
+    if size1 == size2:
+        if a1 == b1 and a1:
+            return 100
+        return max(_score_signatures(a1, b1, size1), _score_signatures(a2, b2, size1 * 2))
+    if size1 == size2 * 2:
+        return _score_signatures(a1, b2, size1)
+    if size2 == size1 * 2:
+        return _score_signatures(a2, b1, size2)
+    return 0
+
+class FuzzyIndex:
+    """Index LSH des condensats flous des signatures
+
+    Chaque signature est indexée par ses n-grammes de 7 caractères et sa taille de
+    bloc; seuls les condensats partageant au moins un n-gramme (condition nécessaire
+    d'un score non nul) sont comparés, au lieu de parcourir toute la base.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.postings = {}
+
+    def add(self, fuzzy_hash, payload):
+        parsed = parse_fuzzy_hash(fuzzy_hash)
+        if parsed is None:
+            return False
+        entry_id = len(self.entries)
+        self.entries.append((parsed, payload))
+        for key in self._keys(parsed):
+            self.postings.setdefault(key, []).append(entry_id)
+        return True
+
+    def _keys(self, parsed):
+        blocksize, first, second = parsed
+        keys = {hash((blocksize, gram)) for gram in _ngrams(first)}
+        keys.update(hash((blocksize * 2, gram)) for gram in _ngrams(second))
+        return keys
+
+    def closest(self, fuzzy_hash, min_score=1):
+        """Signature la plus proche: (payload, score), ou None sous min_score"""
+        parsed = parse_fuzzy_hash(fuzzy_hash)
+        if parsed is None or not self.entries:
+            return None
+        shared = Counter()
+        for key in self._keys(parsed):
+            shared.update(self.postings.get(key, ()))
+
+        best = None
+        for entry_id, _ in shared.most_common(MAX_CANDIDATES):
+            candidate, payload = self.entries[entry_id]
+            score = _compare_parsed(parsed, candidate)
+            if score >= min_score and (best is None or score > best[1]):
+                best = (payload, score)
+                if score == 100:
+                    break
+        return best
+
+    def __len__(self):
+        return len(self.entries)
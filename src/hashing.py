@@ -0,0 +1,87 @@
+import hashlib
+import os
+import threading
+
+# Taille du tampon de lecture réutilisable (1 Mo au lieu de 4 Ko)
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Préhachage: octets lus au début et à la fin du fichier (en plus de la taille)
+PREHASH_SPAN = 64 * 1024
+
+# Condensats supportés par le moteur, dans l'ordre des colonnes du rapport
+SUPPORTED_ALGORITHMS = ("md5", "sha1", "sha256")
+
+# Un tampon par thread pour pouvoir lire plusieurs fichiers en parallèle
+_thread_local = threading.local()
+
+def get_read_buffer():
+    """Retourne le tampon de lecture réutilisable du thread courant"""
+    buffer = getattr(_thread_local, "buffer", None)
+    if buffer is None:
+        buffer = bytearray(READ_BUFFER_SIZE)
+        _thread_local.buffer = buffer
+    return buffer
+
+def stream_file(file_path, consumers):
+    """Lit un fichier une seule fois et transmet chaque bloc à tous les consommateurs
+
+    Chaque consommateur expose une méthode update(bloc), comme les objets hashlib.
+    Les blocs sont des vues sur un tampon partagé: ils ne doivent pas être conservés.
+    Retourne le nombre d'octets lus.
+    """
+    buffer = get_read_buffer()
+    view = memoryview(buffer)
+    total = 0
+    with open(file_path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            chunk = view[:n]
+            for consumer in consumers:
+                consumer.update(chunk)
+            total += n
+    return total
+
+def compute_file_digests(file_path, algorithms=SUPPORTED_ALGORITHMS, consumers=()):
+    """Calcule tous les condensats demandés en une seule lecture du fichier
+
+    Les consommateurs supplémentaires (signatures de contenu...) partagent la même lecture.
+    """
+    hashers = {name: hashlib.new(name) for name in algorithms}
+    stream_file(file_path, list(hashers.values()) + list(consumers))
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+def compute_stream_digests(chunks, algorithms=SUPPORTED_ALGORITHMS, consumers=()):
+    """Calcule les condensats d'un flux de blocs déjà lus (membres d'archives...)"""
+    hashers = {name: hashlib.new(name) for name in algorithms}
+    targets = list(hashers.values()) + list(consumers)
+    for chunk in chunks:
+        for consumer in targets:
+            consumer.update(chunk)
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+def prehash_digest(size, head, tail):
+    """Préhachage sha256 de la taille, des premiers et des derniers octets d'un contenu"""
+    hasher = hashlib.sha256(size.to_bytes(8, "little"))
+    hasher.update(head)
+    hasher.update(tail)
+    return hasher.hexdigest()
+
+def compute_prehash(file_path, span=PREHASH_SPAN):
+    """Préhachage d'un fichier: au plus deux lectures de span octets, quelle que soit sa taille"""
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        head = f.read(span)
+        tail = b""
+        if size > span:
+            # La fin ne recouvre jamais le début (petits fichiers lus une seule fois)
+            f.seek(max(span, size - span))
+            tail = f.read(span)
+    return prehash_digest(size, head, tail)
+
+def prehash_bytes(data, span=PREHASH_SPAN):
+    """Préhachage d'un contenu en mémoire (identique à compute_prehash sur le même fichier)"""
+    size = len(data)
+    tail = data[max(span, size - span):] if size > span else b""
+    return prehash_digest(size, data[:span], tail)
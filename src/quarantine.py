@@ -0,0 +1,298 @@
+import errno
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou consultatif, les journaux sont repris sans vérification
+    fcntl = None
+from src.hashing import READ_BUFFER_SIZE
+from src.database import add_quarantine_item, get_quarantine_item, get_quarantine_items, delete_quarantine_item
+
+# Répertoire de la quarantaine (même emplacement par défaut que l'ancienne quarantaine à plat)
+QUARANTINE_DIR = os.environ.get("QUARANTINE_DIR") or os.path.join(tempfile.gettempdir(), "antivirus_quarantine")
+
+# Niveau de compression zlib des objets (compromis vitesse/taille)
+COMPRESSION_LEVEL = 6
+
+# Nombre de fichiers mis en quarantaine en parallèle lors d'un nettoyage
+QUARANTINE_WORKERS = 4
+
+OBJECT_SUFFIX = ".zz"
+
+# Journal écrit à côté d'un fichier en transit dans staging (chemin d'origine et métadonnées)
+JOURNAL_SUFFIX = ".json"
+
+class QuarantineStore:
+    """Quarantaine adressée par contenu: un objet compressé par sha256, indexé dans SQLite
+
+    Le fichier est d'abord renommé dans le répertoire de la quarantaine (opération
+    atomique si la quarantaine est sur le même système de fichiers), puis compressé
+    en un seul passage qui calcule son sha256. Plusieurs fichiers identiques
+    partagent le même objet; l'index conserve pour chacun le chemin d'origine, le
+    propriétaire, les droits et le verdict, pour la restauration.
+
+    Avant le renommage, un journal décrivant le fichier est écrit dans staging et
+    verrouillé pendant l'opération: si le processus s'arrête avant l'insertion dans
+    l'index, le verrou est libéré et la mise en quarantaine est terminée à la
+    création suivante du magasin (recover_staging).
+    """
+
+    def __init__(self, root=None, workers=QUARANTINE_WORKERS):
+        self.root = root or QUARANTINE_DIR
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.staging_dir = os.path.join(self.root, "staging")
+        self.workers = max(1, workers)
+        self.recover_staging()
+
+    def object_path(self, sha256):
+        """Chemin de l'objet compressé d'un contenu"""
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + OBJECT_SUFFIX)
+
+    def quarantine(self, file_path, verdict=None, risk_level=0):
+        """Met un fichier en quarantaine: (True, identifiant) ou (False, message d'erreur)"""
+        try:
+            file_stat = os.lstat(file_path)
+            if not stat.S_ISREG(file_stat.st_mode):
+                return False, f"{file_path} n'est pas un fichier régulier"
+            os.makedirs(self.staging_dir, exist_ok=True)
+            staging_path = os.path.join(self.staging_dir, uuid.uuid4().hex)
+            record = {
+                "original_path": os.path.abspath(file_path), "owner_uid": file_stat.st_uid,
+                "owner_gid": file_stat.st_gid, "mode": stat.S_IMODE(file_stat.st_mode),
+                "mtime_ns": file_stat.st_mtime_ns, "size": file_stat.st_size,
+                "verdict": verdict, "risk_level": risk_level
+            }
+            journal = self._write_journal(staging_path, record)
+
+            # Renommage sur le même système de fichiers: le fichier quitte immédiatement son emplacement
+            source = file_path
+            try:
+                os.rename(file_path, staging_path)
+                source = staging_path
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # Autre système de fichiers: compression directe depuis l'emplacement d'origine
+
+            try:
+                try:
+                    item_id = self._store_and_index(source, record)
+                except BaseException:
+                    if source == staging_path:
+                        os.rename(staging_path, file_path)
+                    raise
+                os.unlink(source)
+            finally:
+                self._remove_journal(staging_path, journal)
+            return True, item_id
+        except Exception as e:
+            return False, str(e)
+
+    def recover_staging(self):
+        """Termine les mises en quarantaine interrompues (fichier resté dans staging) et retourne leur nombre"""
+        try:
+            names = os.listdir(self.staging_dir)
+        except OSError:
+            return 0
+        recovered = 0
+        for name in names:
+            if not name.endswith(JOURNAL_SUFFIX):
+                continue
+            staging_path = os.path.join(self.staging_dir, name[:-len(JOURNAL_SUFFIX)])
+            try:
+                journal = open(staging_path + JOURNAL_SUFFIX, "r+", encoding="utf-8")
+            except OSError:
+                continue
+            try:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        # Mise en quarantaine en cours dans un autre processus ou thread
+                        journal.close()
+                        continue
+                record = json.load(journal)
+                if os.path.exists(staging_path):
+                    # Interruption après le renommage: l'index n'a peut-être pas reçu l'élément
+                    self._store_and_index(staging_path, record, skip_indexed=True)
+                    os.unlink(staging_path)
+                    recovered += 1
+                # Sans fichier en transit (autre système de fichiers), l'original n'a pas bougé
+                self._remove_journal(staging_path, journal)
+            except (OSError, ValueError, KeyError) as e:
+                journal.close()
+                print(f"Reprise de la quarantaine impossible pour {staging_path}: {e}")
+        return recovered
+
+    def quarantine_many(self, entries):
+        """Met en quarantaine plusieurs fichiers (chemin, verdict, risque) en parallèle
+
+        Retourne une liste de (chemin, succès, identifiant ou message d'erreur).
+        """
+        entries = list(entries)
+
+        def quarantine_entry(entry):
+            file_path, verdict, risk_level = entry
+            success, info = self.quarantine(file_path, verdict, risk_level)
+            return file_path, success, info
+
+        if len(entries) <= 1 or self.workers <= 1:
+            return [quarantine_entry(entry) for entry in entries]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="quarantine") as executor:
+            return list(executor.map(quarantine_entry, entries))
+
+    def restore(self, item_id, destination=None, overwrite=False):
+        """Restaure un fichier (à son emplacement d'origine par défaut): (True, chemin) ou (False, message)"""
+        item = get_quarantine_item(item_id)
+        if item is None:
+            return False, f"Élément de quarantaine {item_id} introuvable"
+        destination = destination or item["original_path"]
+        object_path = self.object_path(item["sha256"])
+        try:
+            if os.path.lexists(destination) and not overwrite:
+                return False, f"{destination} existe déjà"
+            directory = os.path.dirname(os.path.abspath(destination))
+            os.makedirs(directory, exist_ok=True)
+
+            # Décompression dans un fichier temporaire voisin, vérifiée avant de remplacer la destination
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".restore-")
+            try:
+                with os.fdopen(fd, "wb") as output:
+                    sha256 = self._extract(object_path, output)
+                if sha256 != item["sha256"]:
+                    raise ValueError(f"Objet de quarantaine corrompu ({item['sha256']})")
+                self._apply_metadata(temp_path, item)
+                os.replace(temp_path, destination)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+        except Exception as e:
+            return False, str(e)
+
+        self._forget(item_id)
+        return True, destination
+
+    def purge(self, item_ids=None, older_than_days=None):
+        """Supprime définitivement des éléments (tous si aucun critère) et retourne leur nombre"""
+        if item_ids is None:
+            item_ids = [item["id"] for item in get_quarantine_items(older_than_days=older_than_days)]
+        return sum(1 for item_id in item_ids if self._forget(item_id))
+
+    def list_items(self, limit=None):
+        """Éléments de la quarantaine, du plus récent au plus ancien"""
+        return get_quarantine_items(limit=limit)
+
+    def _store_and_index(self, source, record, skip_indexed=False):
+        """Compresse le fichier et l'ajoute à l'index; retourne l'identifiant de l'élément"""
+        sha256, stored_size = self._store(source)
+        if skip_indexed:
+            for item in get_quarantine_items():
+                if item["sha256"] == sha256 and item["original_path"] == record["original_path"]:
+                    return item["id"]
+        item_id = add_quarantine_item(
+            sha256, record["original_path"], record["owner_uid"], record["owner_gid"], record["mode"],
+            record["mtime_ns"], record["size"], stored_size, record["verdict"], record["risk_level"]
+        )
+        if item_id is None:
+            raise OSError("Index de la quarantaine indisponible")
+        return item_id
+
+    def _write_journal(self, staging_path, record):
+        """Écrit le journal d'un fichier en transit; retourné ouvert et verrouillé jusqu'à la fin de l'opération"""
+        journal = open(staging_path + JOURNAL_SUFFIX, "x", encoding="utf-8")
+        try:
+            if fcntl is not None:
+                fcntl.flock(journal.fileno(), fcntl.LOCK_EX)
+            json.dump(record, journal)
+            journal.flush()
+            os.fsync(journal.fileno())
+        except BaseException:
+            self._remove_journal(staging_path, journal)
+            raise
+        return journal
+
+    def _remove_journal(self, staging_path, journal):
+        # Suppression avant la fermeture: le verrou couvre le journal jusqu'à sa disparition
+        try:
+            os.unlink(staging_path + JOURNAL_SUFFIX)
+        except FileNotFoundError:
+            pass
+        journal.close()
+
+    def _store(self, source):
+        """Compresse un fichier dans le magasin d'objets; retourne (sha256, taille stockée)"""
+        directory = os.path.join(self.objects_dir, "tmp")
+        os.makedirs(directory, exist_ok=True)
+        hasher = hashlib.sha256()
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as output, open(source, "rb") as f:
+                while True:
+                    chunk = f.read(READ_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    output.write(compressor.compress(chunk))
+                output.write(compressor.flush())
+            sha256 = hasher.hexdigest()
+            object_path = self.object_path(sha256)
+            if os.path.exists(object_path):
+                # Contenu déjà en quarantaine: l'objet existant est partagé
+                os.unlink(temp_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(temp_path, object_path)
+            return sha256, os.path.getsize(object_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def _extract(self, object_path, output):
+        """Décompresse un objet dans un fichier ouvert et retourne le sha256 du contenu"""
+        hasher = hashlib.sha256()
+        decompressor = zlib.decompressobj()
+        with open(object_path, "rb") as f:
+            while True:
+                chunk = f.read(READ_BUFFER_SIZE)
+                if not chunk:
+                    break
+                data = decompressor.decompress(chunk)
+                hasher.update(data)
+                output.write(data)
+        data = decompressor.flush()
+        hasher.update(data)
+        output.write(data)
+        return hasher.hexdigest()
+
+    def _apply_metadata(self, path, item):
+        # Droits et date d'origine; le propriétaire n'est rétabli que si le processus en a le droit
+        if item["mode"] is not None:
+            os.chmod(path, item["mode"])
+        if item["mtime_ns"] is not None:
+            os.utime(path, ns=(item["mtime_ns"], item["mtime_ns"]))
+        if hasattr(os, "chown") and item["owner_uid"] is not None:
+            try:
+                os.chown(path, item["owner_uid"], item["owner_gid"])
+            except PermissionError:
+                pass
+
+    def _forget(self, item_id):
+        """Retire un élément de l'index et supprime l'objet s'il n'est plus référencé"""
+        item = get_quarantine_item(item_id)
+        if item is None:
+            return False
+        remaining = delete_quarantine_item(item_id)
+        if remaining == 0:
+            object_path = self.object_path(item["sha256"])
+            if os.path.exists(object_path):
+                os.unlink(object_path)
+        return remaining is not None
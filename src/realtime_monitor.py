@@ -0,0 +1,415 @@
+import ctypes
+import ctypes.util
+import errno
+import heapq
+import itertools
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# Constantes inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MOVED_FROM
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+# Priorités de la file de scan (plus petit = plus urgent)
+PRIORITY_EXECUTABLE = 0
+PRIORITY_DEFAULT = 1
+EXECUTABLE_EXTENSIONS = ('.exe', '.dll', '.bat', '.cmd', '.ps1', '.sh', '.so', '.py', '.js', '.jar', '.elf', '.bin')
+
+_libc = None
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        _libc.inotify_init1.argtypes = [ctypes.c_int]
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return _libc
+
+def is_supported():
+    """Indique si la surveillance inotify est disponible sur ce système"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_load_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+class BoundedPriorityQueue:
+    """File de priorité bornée et sans doublons pour les fichiers à scanner
+
+    Quand la file est pleine, un fichier plus prioritaire remplace le moins
+    prioritaire; sinon le nouveau fichier est rejeté (compté dans dropped).
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.heap = []
+        self.queued = set()
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, priority, path):
+        with self.condition:
+            if path in self.queued:
+                return True
+            if len(self.queued) >= self.maxsize:
+                worst = max(self.heap)
+                if worst[0] <= priority:
+                    self.dropped += 1
+                    return False
+                self.heap.remove(worst)
+                heapq.heapify(self.heap)
+                self.queued.discard(worst[2])
+                self.dropped += 1
+            heapq.heappush(self.heap, (priority, next(self.counter), path))
+            self.queued.add(path)
+            self.condition.notify()
+            return True
+
+    def get(self, timeout=None):
+        """Retourne le chemin le plus prioritaire, ou None après le délai"""
+        with self.condition:
+            if not self.heap:
+                self.condition.wait(timeout)
+            if not self.heap:
+                return None
+            _, _, path = heapq.heappop(self.heap)
+            self.queued.discard(path)
+            return path
+
+    def wake_all(self):
+        with self.condition:
+            self.condition.notify_all()
+
+    def fill_ratio(self):
+        return len(self.queued) / self.maxsize if self.maxsize else 0.0
+
+    def __len__(self):
+        return len(self.queued)
+
+class EventDebouncer:
+    """Regroupe les rafales d'événements d'un même fichier en une seule demande de scan
+
+    Un fichier est prêt quand aucun événement n'est arrivé depuis `delay` secondes,
+    ou au plus tard `max_delay` secondes après le premier événement (fichiers
+    réécrits en continu). Les échéances sont tenues dans des tas: chaque tick ne
+    consulte que les fichiers arrivés à échéance, pas toute la file d'attente.
+    Les éléments périmés des tas (fichier retouché ou retiré) sont ignorés au dépilage.
+    """
+
+    def __init__(self, delay=0.5, max_delay=5.0, max_pending=100000):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        # chemin -> [premier événement, dernier événement, priorité, prêt]
+        self.pending = {}
+        # (dernier événement, chemin) et (premier événement, chemin): échéances
+        self.by_last = []
+        self.by_first = []
+        # (priorité, premier événement, chemin): fichiers prêts, les plus prioritaires d'abord
+        self.ready = []
+        self.dropped = 0
+
+    def touch(self, path, priority, now):
+        entry = self.pending.get(path)
+        if entry is not None:
+            entry[1] = now
+            if priority < entry[2]:
+                entry[2] = priority
+                if entry[3]:
+                    heapq.heappush(self.ready, (priority, entry[0], path))
+            if not entry[3]:
+                heapq.heappush(self.by_last, (now, path))
+        elif len(self.pending) < self.max_pending:
+            self.pending[path] = [now, now, priority, False]
+            heapq.heappush(self.by_last, (now, path))
+            heapq.heappush(self.by_first, (now, path))
+        else:
+            self.dropped += 1
+        if len(self.by_last) + len(self.by_first) + len(self.ready) > 6 * len(self.pending) + 64:
+            self._compact()
+
+    def discard(self, path):
+        self.pending.pop(path, None)
+
+    def pop_ready(self, now, delay=None, limit=None):
+        """Retire et retourne les fichiers prêts, les plus prioritaires d'abord"""
+        delay = self.delay if delay is None else delay
+        self._promote(self.by_last, 1, now - delay)
+        self._promote(self.by_first, 0, now - self.max_delay)
+        ready = []
+        while self.ready and (limit is None or len(ready) < limit):
+            priority, first, path = heapq.heappop(self.ready)
+            entry = self.pending.get(path)
+            if entry is not None and entry[3] and entry[0] == first and entry[2] == priority:
+                del self.pending[path]
+                ready.append((priority, path))
+        return ready
+
+    def _promote(self, heap, field, deadline):
+        # Passe dans le tas des fichiers prêts ceux dont l'échéance est atteinte
+        while heap and heap[0][0] <= deadline:
+            stamp, path = heapq.heappop(heap)
+            entry = self.pending.get(path)
+            if entry is not None and not entry[3] and entry[field] == stamp:
+                entry[3] = True
+                heapq.heappush(self.ready, (entry[2], entry[0], path))
+
+    def _compact(self):
+        # Reconstruit les tas à partir des seules entrées en attente
+        self.by_last = [(entry[1], path) for path, entry in self.pending.items() if not entry[3]]
+        self.by_first = [(entry[0], path) for path, entry in self.pending.items() if not entry[3]]
+        self.ready = [(entry[2], entry[0], path) for path, entry in self.pending.items() if entry[3]]
+        for heap in (self.by_last, self.by_first, self.ready):
+            heapq.heapify(heap)
+
+class RealtimeMonitor:
+    """Protection en temps réel: surveillance inotify récursive et scan des fichiers modifiés
+
+    Un thread lit les événements du noyau, les regroupe par fichier puis alimente une
+    file de priorité bornée, vidée par quelques threads qui appellent scan_file.
+    Le débit de scan est plafonné (max_scan_rate); quand la file se remplit, le délai
+    de regroupement s'allonge et les fichiers restent dans le regroupeur: les rafales
+    (compilations...) ne saturent pas le CPU.
+    """
+
+    def __init__(self, engine, paths, scan_options=None, workers=2, queue_size=10000,
+                 debounce=0.5, max_delay=5.0, max_scan_rate=200, on_result=None):
+        self.engine = engine
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.scan_options = scan_options or {}
+        self.workers = max(1, workers)
+        self.queue = BoundedPriorityQueue(queue_size)
+        self.debouncer = EventDebouncer(debounce, max_delay)
+        self.on_result = on_result
+        # Débit maximal de scans par seconde (None = illimité)
+        self.scan_interval = 1.0 / max_scan_rate if max_scan_rate else 0.0
+        self.next_scan_time = 0.0
+        self.throttle_lock = threading.Lock()
+        self.fd = None
+        self.watches = {}  # descripteur de surveillance -> répertoire
+        self.threads = []
+        self.stop_event = threading.Event()
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            "events": 0,
+            "scanned": 0,
+            "threats": 0,
+            "errors": 0,
+            "overflows": 0,
+            "watch_errors": 0
+        }
+
+    def start(self):
+        """Démarre la surveillance des chemins configurés"""
+        if self.is_running():
+            return
+        if not is_supported():
+            raise OSError("La surveillance inotify n'est pas disponible sur ce système")
+
+        libc = _load_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.fd = fd
+        self.stop_event.clear()
+
+        for path in self.paths:
+            self._watch_tree(path)
+
+        self.threads = [threading.Thread(target=self._read_loop, name="realtime-reader", daemon=True)]
+        for index in range(self.workers):
+            self.threads.append(threading.Thread(target=self._scan_loop, name=f"realtime-scan-{index}", daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """Arrête la surveillance et libère les descripteurs"""
+        self.stop_event.set()
+        self.queue.wake_all()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.threads = []
+        if self.engine.scan_cache is not None:
+            self.engine.scan_cache.flush()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self.watches = {}
+
+    def is_running(self):
+        return bool(self.threads) and not self.stop_event.is_set()
+
+    def get_stats(self):
+        """Compteurs de la surveillance (événements, scans, rejets...)"""
+        with self.stats_lock:
+            stats = dict(self.stats)
+        return dict(stats,
+                    watched_directories=len(self.watches),
+                    pending=len(self.debouncer.pending),
+                    queued=len(self.queue),
+                    dropped=self.queue.dropped + self.debouncer.dropped)
+
+    def _watch_tree(self, root):
+        """Ajoute une surveillance sur un répertoire et tous ses sous-répertoires"""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            if not self._add_watch(directory):
+                continue
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _add_watch(self, directory):
+        wd = _load_libc().inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            self.stats["watch_errors"] += 1
+            if error == errno.ENOSPC:
+                print(f"Limite de surveillances inotify atteinte (fs.inotify.max_user_watches): {directory}")
+            return False
+        self.watches[wd] = directory
+        return True
+
+    def _read_loop(self):
+        poller = select.poll()
+        poller.register(self.fd, select.POLLIN)
+        tick = min(0.1, self.debouncer.delay)
+        while not self.stop_event.is_set():
+            if poller.poll(int(tick * 1000)):
+                self._read_events()
+            self._flush_ready()
+
+    def _read_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        except OSError:
+            return
+
+        now = time.monotonic()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            self.stats["events"] += 1
+            self._handle_event(wd, mask, os.fsdecode(name), now)
+
+    def _handle_event(self, wd, mask, name, now):
+        if mask & IN_Q_OVERFLOW:
+            # Événements perdus par le noyau: le prochain scan planifié les rattrapera
+            self.stats["overflows"] += 1
+            return
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return
+
+        directory = self.watches.get(wd)
+        if directory is None or not name:
+            return
+        path = os.path.join(directory, name)
+
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Nouveau répertoire: le surveiller et scanner ce qui y a déjà été écrit
+                self._watch_tree(path)
+                self._touch_existing_files(path, now)
+            return
+
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self.debouncer.discard(path)
+            return
+
+        if mask & (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE):
+            self.debouncer.touch(path, self._priority(path), now)
+
+    def _touch_existing_files(self, root, now):
+        for current, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(current, name)
+                self.debouncer.touch(path, self._priority(path), now)
+
+    def _priority(self, path):
+        return PRIORITY_EXECUTABLE if path.lower().endswith(EXECUTABLE_EXTENSIONS) else PRIORITY_DEFAULT
+
+    def _flush_ready(self):
+        """Transfère les fichiers stabilisés vers la file de scan, selon la place disponible"""
+        fill_ratio = self.queue.fill_ratio()
+        if fill_ratio >= 0.9:
+            # Contre-pression: les événements continuent d'être regroupés en attendant
+            return
+        # Plus la file est pleine, plus le regroupement est long
+        delay = self.debouncer.delay * (1 + 4 * fill_ratio)
+        room = self.queue.maxsize - len(self.queue)
+        for priority, path in self.debouncer.pop_ready(time.monotonic(), delay, limit=room):
+            self.queue.put(priority, path)
+
+    def _scan_loop(self):
+        while not self.stop_event.is_set():
+            path = self.queue.get(timeout=0.5)
+            if path is None:
+                # File vide: enregistrer les écritures du cache incrémental en attente
+                if self.engine.scan_cache is not None:
+                    self.engine.scan_cache.flush()
+                continue
+            self._throttle()
+            try:
+                if not os.path.isfile(path):
+                    continue
+                # Le cache incrémental est enregistré par lots, pas à chaque fichier
+                result = self.engine.scan_file(path, self.scan_options, flush_cache=False)
+            except Exception:
+                self._count("errors")
+                continue
+            self._count("scanned")
+            if result.malware_detected:
+                self._count("threats")
+            if self.on_result is not None:
+                self.on_result(result)
+
+    def _throttle(self):
+        """Espace les scans pour respecter max_scan_rate; la file absorbe le surplus"""
+        if not self.scan_interval:
+            return
+        with self.throttle_lock:
+            now = time.monotonic()
+            scan_time = max(now, self.next_scan_time)
+            self.next_scan_time = scan_time + self.scan_interval
+        if scan_time > now:
+            time.sleep(scan_time - now)
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
@@ -0,0 +1,356 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from requests.adapters import HTTPAdapter
+from cachetools import TTLCache
+
+# Service de réputation: par défaut le serveur webhook (endpoint /hash/check/batch)
+REPUTATION_URL = os.getenv('REPUTATION_URL') or os.getenv('WEBHOOK_SERVER_URL', 'http://localhost:5000')
+REPUTATION_BATCH_PATH = '/hash/check/batch'
+REPUTATION_HEALTH_PATH = '/health'
+
+# Condensats par requête (le serveur en accepte au plus MAX_BATCH_HASHES) et requêtes simultanées
+REPUTATION_BATCH_SIZE = int(os.getenv('REPUTATION_BATCH_SIZE', 500))
+REPUTATION_MAX_IN_FLIGHT = int(os.getenv('REPUTATION_MAX_IN_FLIGHT', 4))
+
+# Délais (connexion, lecture) en secondes
+REPUTATION_TIMEOUT = (2.0, 10.0)
+
+# Cache local des verdicts: les verdicts sains expirent plus vite que les détections
+REPUTATION_CACHE_SIZE = 100000
+POSITIVE_VERDICT_TTL = 24 * 3600
+NEGATIVE_VERDICT_TTL = 3600
+
+# Réponses 429 (limitation de débit): nouvelles tentatives, attente initiale et attente maximale (secondes)
+THROTTLE_RETRIES = 3
+THROTTLE_BACKOFF = 0.5
+THROTTLE_MAX_BACKOFF = 10.0
+
+# Disjoncteur: nombre d'échecs consécutifs avant ouverture, puis délai avant un nouvel essai
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30.0
+
+class ReputationUnavailable(Exception):
+    """Levée quand le service de réputation ne peut pas répondre"""
+
+class CircuitBreaker:
+    """Disjoncteur: après plusieurs échecs, les appels sont refusés localement pendant un délai
+
+    Une fois le délai écoulé, un seul appel d'essai est autorisé (état semi-ouvert):
+    son succès referme le disjoncteur, son échec le rouvre.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_progress:
+                return False
+            self.trial_in_progress = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_progress or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_progress = False
+
+class ReputationClient:
+    """Client du service de réputation cloud
+
+    Une session requests garde ses connexions ouvertes (keep-alive) dans un pool;
+    les condensats absents du cache local sont envoyés par lots, plusieurs lots
+    pouvant être en vol simultanément. Un service indisponible ou lent ouvre le
+    disjoncteur: les scans continuent sans réputation au lieu d'attendre. Une
+    réponse 429 n'est pas une panne: le lot est renvoyé après une attente
+    (Retry-After ou attente exponentielle).
+    """
+
+    def __init__(self, base_url=None, batch_size=REPUTATION_BATCH_SIZE, max_in_flight=REPUTATION_MAX_IN_FLIGHT,
+                 timeout=REPUTATION_TIMEOUT, cache_size=REPUTATION_CACHE_SIZE,
+                 positive_ttl=POSITIVE_VERDICT_TTL, negative_ttl=NEGATIVE_VERDICT_TTL, breaker=None,
+                 throttle_retries=THROTTLE_RETRIES, throttle_backoff=THROTTLE_BACKOFF,
+                 throttle_max_backoff=THROTTLE_MAX_BACKOFF):
+        self.base_url = (base_url or REPUTATION_URL).rstrip('/')
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.timeout = timeout
+        self.throttle_retries = max(0, throttle_retries)
+        self.throttle_backoff = throttle_backoff
+        self.throttle_max_backoff = throttle_max_backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breaker = breaker or CircuitBreaker()
+        self.cache_lock = threading.Lock()
+        self.positive_cache = TTLCache(maxsize=cache_size, ttl=positive_ttl)
+        self.negative_cache = TTLCache(maxsize=cache_size, ttl=negative_ttl)
+        self.executor = None
+        self.executor_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "requests": 0, "failures": 0, "rejected": 0, "throttled": 0}
+
+    def lookup(self, hash_value):
+        """Réputation d'un condensat (voir lookup_many)"""
+        return self.lookup_many([hash_value])[hash_value]
+
+    def lookup_many(self, hash_values):
+        """Réputation de plusieurs condensats: {condensat: verdict}
+
+        Un verdict reprend les champs du service: malware_name (None si le condensat
+        est inconnu) et risk_level (0 à 10); en cas d'indisponibilité du service, il
+        contient error et n'est pas mis en cache.
+        """
+        hash_values = [hash_value for hash_value in hash_values if hash_value]
+        verdicts = {}
+        missing = []
+        with self.cache_lock:
+            for hash_value in dict.fromkeys(h.lower() for h in hash_values):
+                verdict = self.positive_cache.get(hash_value) or self.negative_cache.get(hash_value)
+                if verdict is not None:
+                    verdicts[hash_value] = verdict
+                else:
+                    missing.append(hash_value)
+        self._count("cache_hits", len(verdicts))
+        self._count("cache_misses", len(missing))
+
+        batches = [missing[start:start + self.batch_size] for start in range(0, len(missing), self.batch_size)]
+        if len(batches) > 1:
+            for batch, result in zip(batches, self._get_executor().map(self._lookup_batch, batches)):
+                verdicts.update(result)
+        elif batches:
+            verdicts.update(self._lookup_batch(batches[0]))
+
+        # Clés d'origine (casse comprise) pour l'appelant
+        return {hash_value: verdicts[hash_value.lower()] for hash_value in hash_values}
+
+    def check_connection(self):
+        """Vérifie la disponibilité du service: (connecté, état retourné par /health)"""
+        try:
+            response = self.session.get(self.base_url + REPUTATION_HEALTH_PATH, timeout=self.timeout)
+            if response.status_code != 200:
+                return False, {"error": f"HTTP {response.status_code}"}
+            self.breaker.record_success()
+            return True, response.json()
+        except (requests.RequestException, ValueError) as e:
+            return False, {"error": str(e)}
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        with self.cache_lock:
+            stats["cached_verdicts"] = len(self.positive_cache) + len(self.negative_cache)
+        stats["breaker"] = self.breaker.state
+        return stats
+
+    def close(self):
+        """Ferme les connexions du pool et les threads de requêtes"""
+        with self.executor_lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+        self.session.close()
+
+    def _get_executor(self):
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="reputation")
+            return self.executor
+
+    def _lookup_batch(self, batch):
+        """Interroge le service pour un lot; verdicts d'erreur si le service est indisponible"""
+        try:
+            matches = self._post_batch(batch)
+        except ReputationUnavailable as e:
+            return {hash_value: {"malware_name": None, "risk_level": 0, "error": str(e)} for hash_value in batch}
+
+        verdicts = {}
+        with self.cache_lock:
+            for hash_value in batch:
+                match = matches.get(hash_value)
+                if match is not None:
+                    verdict = {"malware_name": match.get('malware_name'), "risk_level": match.get('risk_level', 0)}
+                    self.positive_cache[hash_value] = verdict
+                else:
+                    verdict = {"malware_name": None, "risk_level": 0}
+                    self.negative_cache[hash_value] = verdict
+                verdicts[hash_value] = verdict
+        return verdicts
+
+    def _post_batch(self, batch):
+        for attempt in range(self.throttle_retries + 1):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise ReputationUnavailable("Service de réputation indisponible (disjoncteur ouvert)")
+            self._count("requests")
+            try:
+                response = self.session.post(self.base_url + REPUTATION_BATCH_PATH, json={'hashes': batch},
+                                             timeout=self.timeout)
+            except requests.RequestException as e:
+                self._record_failure()
+                raise ReputationUnavailable(f"Service de réputation injoignable: {e}")
+            if response.status_code != 429:
+                break
+            # Limitation de débit: le service répond, on attend puis on renvoie le même lot
+            self._count("throttled")
+            self.breaker.record_success()
+            if attempt < self.throttle_retries:
+                time.sleep(self._throttle_delay(response, attempt))
+        else:
+            raise ReputationUnavailable("Service de réputation saturé (HTTP 429)")
+
+        if response.status_code >= 500:
+            self._record_failure()
+            raise ReputationUnavailable(f"Service de réputation indisponible (HTTP {response.status_code})")
+
+        # Le service a répondu: une requête refusée ne compte pas comme une panne
+        self.breaker.record_success()
+        if response.status_code != 200:
+            raise ReputationUnavailable(f"Requête de réputation refusée (HTTP {response.status_code})")
+        try:
+            matches = response.json().get('matches', {})
+            return {hash_value.lower(): match for hash_value, match in matches.items()}
+        except (ValueError, AttributeError) as e:
+            raise ReputationUnavailable(f"Réponse de réputation invalide: {e}")
+
+    def _throttle_delay(self, response, attempt):
+        """Attente avant de renvoyer un lot refusé par la limitation de débit"""
+        try:
+            delay = float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            delay = self.throttle_backoff * (2 ** attempt)
+        return min(max(0.0, delay), self.throttle_max_backoff)
+
+    def _record_failure(self):
+        self.breaker.record_failure()
+        self._count("failures")
+
+    def _count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+class LocalReputationServer:
+    """Service de réputation local (http.server) reproduisant /hash/check/batch et /health
+
+    Remplace le serveur webhook pour les essais: les signatures sont un dictionnaire
+    {condensat: (nom, niveau de risque)}; delay simule la latence, fail_requests un
+    nombre de réponses 503 avant de répondre normalement, throttle_requests un
+    nombre de réponses 429 (avec l'en-tête Retry-After: retry_after).
+    """
+
+    def __init__(self, signatures=None, host='127.0.0.1', port=0, delay=0.0, fail_requests=0,
+                 throttle_requests=0, retry_after=0):
+        self.signatures = {key.lower(): value for key, value in (signatures or {}).items()}
+        self.delay = delay
+        self.fail_requests = fail_requests
+        self.throttle_requests = throttle_requests
+        self.retry_after = retry_after
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="reputation-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def _handler_class(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Connexions persistantes (keep-alive)
+
+            def do_GET(self):
+                if self.path != REPUTATION_HEALTH_PATH:
+                    return self._reply(404, {'error': 'Introuvable'})
+                self._reply(200, {'status': 'healthy', 'malware_hashes_count': len(stand_in.signatures)})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+                if self.path != REPUTATION_BATCH_PATH:
+                    return self._reply(404, {'error': 'Introuvable'})
+                with stand_in.lock:
+                    stand_in.requests += 1
+                    throttled = stand_in.throttle_requests > 0
+                    if throttled:
+                        stand_in.throttle_requests -= 1
+                    failing = not throttled and stand_in.fail_requests > 0
+                    if failing:
+                        stand_in.fail_requests -= 1
+                if throttled:
+                    return self._reply(429, {'error': 'Trop de requêtes'},
+                                       {'Retry-After': str(stand_in.retry_after)})
+                if stand_in.delay:
+                    time.sleep(stand_in.delay)
+                if failing:
+                    return self._reply(503, {'error': 'Service indisponible'})
+                try:
+                    hashes = json.loads(body).get('hashes')
+                except (ValueError, AttributeError):
+                    hashes = None
+                if not isinstance(hashes, list):
+                    return self._reply(400, {'error': 'Liste de hashs requise'})
+                matches = {}
+                for hash_value in hashes:
+                    entry = stand_in.signatures.get(str(hash_value).lower())
+                    if entry is not None:
+                        matches[hash_value] = {'malware_name': entry[0], 'risk_level': entry[1]}
+                self._reply(200, {'checked': len(hashes), 'matches': matches})
+
+            def _reply(self, status, payload, headers=None):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,228 @@
+import sys
+import threading
+import time
+import psutil
+
+# Intervalle d'échantillonnage de la charge système (secondes)
+SAMPLE_INTERVAL = 1.0
+
+# Sous ce ratio du plafond, la charge est jugée basse et le scan accélère à nouveau
+RECOVERY_RATIO = 0.8
+
+# Débit de lecture minimal conservé lorsque le disque est saturé (octets par seconde)
+MIN_IO_RATE = 1024 * 1024
+
+# Classes de priorité d'E/S (ionice) acceptées dans les profils
+IONICE_CLASSES = {
+    "idle": getattr(psutil, "IOPRIO_CLASS_IDLE", None),
+    "best_effort": getattr(psutil, "IOPRIO_CLASS_BE", None),
+}
+
+class TokenBucket:
+    """Seau à jetons limitant le débit de lecture (octets par seconde)
+
+    Les lectures ne sont jamais refusées: un bloc plus gros que les jetons
+    disponibles crée une dette que le thread appelant rembourse en dormant.
+    """
+
+    def __init__(self, rate):
+        self.lock = threading.Lock()
+        self.rate = float(rate)
+        self.tokens = self.rate
+        self.last_refill = time.monotonic()
+        self.waited = 0.0
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            self.tokens = min(self.tokens, self.rate)
+
+    def consume(self, amount):
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def _refill(self, now):
+        # Capacité d'une seconde de débit: une courte rafale reste possible
+        self.tokens = min(self.rate, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+class ResourceGovernor:
+    """Régulateur du scan selon la charge CPU, l'occupation disque et la pression mémoire
+
+    Un thread échantillonne psutil à intervalle fixe. Au-delà d'un plafond, le
+    nombre de lots traités simultanément et le débit de lecture sont divisés par
+    deux; ils remontent progressivement quand la charge redescend sous 80 % des
+    plafonds. Les threads de scan reçoivent leur propre priorité nice/ionice,
+    sans toucher au reste du processus (interface Streamlit, serveur).
+    """
+
+    def __init__(self, max_workers, cpu_ceiling=None, disk_busy_ceiling=None, memory_ceiling=None,
+                 io_rate_limit=None, nice=None, ionice=None, sample_interval=SAMPLE_INTERVAL):
+        self.max_workers = max(1, max_workers)
+        self.cpu_ceiling = cpu_ceiling
+        self.disk_busy_ceiling = disk_busy_ceiling
+        self.memory_ceiling = memory_ceiling
+        self.max_io_rate = io_rate_limit
+        self.nice = nice
+        self.ionice = ionice
+        self.sample_interval = sample_interval
+
+        self.condition = threading.Condition()
+        self.worker_limit = self.max_workers
+        self.active = 0
+        self.io_bucket = TokenBucket(io_rate_limit) if io_rate_limit else None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_disk_sample = None
+        self.samples = {"cpu_percent": None, "disk_busy_percent": None, "memory_percent": None}
+        self.stats = {"samples": 0, "slowdowns": 0, "min_worker_limit": self.max_workers, "priority_errors": 0}
+
+    @classmethod
+    def from_profile(cls, profile):
+        """Régulateur configuré par un profil de scan (None si le profil n'impose aucune limite)"""
+        keys = ("cpu_ceiling", "disk_busy_ceiling", "memory_ceiling", "io_rate_limit", "nice", "ionice")
+        settings = {key: profile.get(key) for key in keys}
+        if all(value is None for value in settings.values()):
+            return None
+        return cls(profile["workers"], **settings)
+
+    def start(self):
+        """Démarre l'échantillonnage de la charge système"""
+        if not self._has_ceilings():
+            return
+        # Premier appel de référence: cpu_percent(None) mesure ensuite depuis l'appel précédent
+        psutil.cpu_percent(interval=None)
+        self.last_disk_sample = self._disk_busy_time()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._sample_loop, name="resource-governor", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Arrête l'échantillonnage et libère les threads en attente"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+            self.thread = None
+        with self.condition:
+            self.worker_limit = self.max_workers
+            self.condition.notify_all()
+
+    def configure_thread(self):
+        """Initialiseur des threads de scan: priorité CPU (nice) et d'E/S (ionice) du thread courant"""
+        if self.nice is None and self.ionice is None:
+            return
+        # Sous Linux, chaque thread est une tâche dont la priorité se règle séparément
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            thread = psutil.Process(threading.get_native_id())
+            if self.nice is not None:
+                thread.nice(self.nice)
+            if IONICE_CLASSES.get(self.ionice) is not None:
+                thread.ionice(IONICE_CLASSES[self.ionice], 7 if self.ionice == "best_effort" else None)
+        except (psutil.Error, OSError, ValueError):
+            with self.condition:
+                self.stats["priority_errors"] += 1
+
+    def acquire(self):
+        """Attend qu'un emplacement de scan soit libre selon la limite courante"""
+        with self.condition:
+            while self.active >= self.worker_limit and not self.stop_event.is_set():
+                self.condition.wait(timeout=self.sample_interval)
+            self.active += 1
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+    def update(self, chunk):
+        """Consommateur de flux: applique la limite de débit de lecture à chaque bloc"""
+        if self.io_bucket is not None:
+            self.io_bucket.consume(len(chunk))
+
+    def get_stats(self):
+        """Dernières mesures et réglages courants du régulateur"""
+        with self.condition:
+            stats = dict(self.stats, **self.samples)
+            stats["worker_limit"] = self.worker_limit
+        stats["io_rate_limit"] = int(self.io_bucket.rate) if self.io_bucket is not None else None
+        stats["io_wait_seconds"] = round(self.io_bucket.waited, 3) if self.io_bucket is not None else 0.0
+        return stats
+
+    def _has_ceilings(self):
+        return any(value is not None for value in (self.cpu_ceiling, self.disk_busy_ceiling, self.memory_ceiling))
+
+    def _sample_loop(self):
+        while not self.stop_event.wait(self.sample_interval):
+            try:
+                self._adjust(self._sample())
+            except (psutil.Error, OSError) as e:
+                print(f"Erreur lors de l'échantillonnage des ressources: {e}")
+
+    def _sample(self):
+        """Mesures depuis l'échantillon précédent: CPU système, disque le plus occupé, mémoire"""
+        samples = {
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_percent": psutil.virtual_memory().percent,
+            "disk_busy_percent": None
+        }
+        disk_sample = self._disk_busy_time()
+        if disk_sample is not None and self.last_disk_sample is not None:
+            elapsed = disk_sample[0] - self.last_disk_sample[0]
+            busy = [
+                busy_time - self.last_disk_sample[1].get(disk, busy_time)
+                for disk, busy_time in disk_sample[1].items()
+            ]
+            if elapsed > 0 and busy:
+                samples["disk_busy_percent"] = min(100.0, max(busy) / (elapsed * 1000.0) * 100.0)
+        self.last_disk_sample = disk_sample
+        return samples
+
+    def _disk_busy_time(self):
+        # busy_time (ms) n'est fourni que sous Linux et FreeBSD
+        if self.disk_busy_ceiling is None:
+            return None
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        busy = {disk: counter.busy_time for disk, counter in counters.items() if hasattr(counter, "busy_time")}
+        return (time.monotonic(), busy) if busy else None
+
+    def _adjust(self, samples):
+        """Diminution multiplicative au-delà d'un plafond, augmentation progressive sous le seuil de reprise"""
+        levels = [
+            (samples["cpu_percent"], self.cpu_ceiling),
+            (samples["disk_busy_percent"], self.disk_busy_ceiling),
+            (samples["memory_percent"], self.memory_ceiling),
+        ]
+        levels = [(value, ceiling) for value, ceiling in levels if value is not None and ceiling is not None]
+        overloaded = any(value > ceiling for value, ceiling in levels)
+        relaxed = all(value < ceiling * RECOVERY_RATIO for value, ceiling in levels)
+        memory_pressure = (samples["memory_percent"] is not None and self.memory_ceiling is not None
+                           and samples["memory_percent"] > self.memory_ceiling)
+        disk_saturated = (samples["disk_busy_percent"] is not None and self.disk_busy_ceiling is not None
+                          and samples["disk_busy_percent"] > self.disk_busy_ceiling)
+
+        with self.condition:
+            self.samples = samples
+            self.stats["samples"] += 1
+            if overloaded:
+                self.stats["slowdowns"] += 1
+                # Pression mémoire: un seul lot à la fois (chaque lot garde ses tampons de lecture)
+                self.worker_limit = 1 if memory_pressure else max(1, self.worker_limit // 2)
+            elif relaxed and self.worker_limit < self.max_workers:
+                self.worker_limit += 1
+                self.condition.notify_all()
+            self.stats["min_worker_limit"] = min(self.stats["min_worker_limit"], self.worker_limit)
+
+        if self.io_bucket is not None:
+            if disk_saturated:
+                self.io_bucket.set_rate(max(MIN_IO_RATE, self.io_bucket.rate / 2))
+            elif relaxed and self.io_bucket.rate < self.max_io_rate:
+                self.io_bucket.set_rate(min(self.max_io_rate, self.io_bucket.rate * 1.25))
@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+from src.hashing import compute_file_digests, compute_prehash
+
+# Condensat complet comparé avant de reprendre le résultat d'une copie
+CONTENT_DIGEST = "sha256"
+
+# Nombre maximal de contenus mémorisés pendant un scan (les plus anciens sont oubliés):
+# chaque entrée garde les condensats et résultats d'étapes d'un fichier
+MAX_DEDUPE_ENTRIES = 4096
+
+class _SharedRead:
+    """Lecture d'un contenu en cours par un thread, attendue par les autres chemins"""
+
+    __slots__ = ("event", "value", "remaining")
+
+    def __init__(self, remaining=None):
+        self.event = threading.Event()
+        self.value = None
+        # Autres chemins attendus (liens physiques restants), None si inconnu
+        self.remaining = remaining
+
+    def publish(self, value):
+        self.value = value
+        self.event.set()
+
+    def wait(self):
+        self.event.wait()
+        return self.value
+
+class ScanDeduplicator:
+    """Partage, pendant un scan, la lecture d'un même contenu entre plusieurs chemins
+
+    La clé (st_dev, st_ino) regroupe les liens physiques: seuls les fichiers à
+    plusieurs liens (st_nlink > 1) sont suivis, et l'entrée est libérée dès que
+    tous leurs liens ont été vus. Avec all_inodes, tous les inodes sont suivis
+    (arborescences montées plusieurs fois, où st_nlink vaut 1).
+
+    Avec by_content, les fichiers de même taille et de même préhachage deviennent
+    candidats (copies de couches de conteneurs, sauvegardes), mais un candidat ne
+    reprend le résultat du premier chemin qu'après comparaison de son propre
+    sha256 complet: le préhachage ne couvre pas le milieu des gros fichiers.
+    read() doit alors retourner (condensats, résultats) avec le condensat
+    CONTENT_DIGEST. Compromis: chaque fichier coûte en plus un préhachage, et une
+    copie est relue en entier pour son sha256; seules les étapes d'analyse du
+    contenu (signatures, condensat flou, entropie) sont évitées.
+    """
+
+    def __init__(self, by_content=False, all_inodes=False, max_entries=MAX_DEDUPE_ENTRIES):
+        self.by_content = by_content
+        self.all_inodes = all_inodes
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.stats = {"inode_hits": 0, "content_hits": 0, "content_mismatches": 0}
+
+    def read_once(self, file_path, file_stat, read):
+        """(résultat de read(), partagé) pour ce contenu: calculé par le premier chemin, repris ensuite
+
+        partagé vaut True quand le résultat provient d'un autre chemin; l'appelant
+        ne doit pas l'enregistrer comme résultat propre de ce fichier (cache).
+        """
+        owned = []
+        try:
+            inode_key = self._inode_key(file_stat)
+            if inode_key is not None:
+                # Liens restant à voir après ce chemin (inconnu pour un inode à lien unique)
+                links = file_stat.st_nlink - 1 if file_stat.st_nlink > 1 else None
+                shared, owner = self._claim(inode_key, links)
+                if owner:
+                    owned.append(shared)
+                else:
+                    value = shared.wait()
+                    if value is not None:
+                        # Même inode: même contenu, le résultat est repris tel quel
+                        self._count("inode_hits")
+                        return value, True
+
+            if self.by_content and file_stat.st_size > 0:
+                content_key = self._content_key(file_path, file_stat)
+                if content_key is not None:
+                    shared, owner = self._claim(content_key)
+                    if owner:
+                        owned.append(shared)
+                    else:
+                        value = shared.wait()
+                        if value is not None and self._same_content(file_path, value):
+                            self._count("content_hits")
+                            self._publish(owned, value)
+                            owned = []
+                            return value, True
+                        self._count("content_mismatches")
+            value = read()
+        except BaseException:
+            # Échec de la lecture: les chemins en attente liront le fichier eux-mêmes
+            self._publish(owned, None)
+            raise
+        self._publish(owned, value)
+        return value, False
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, tracked=len(self.entries))
+
+    def _inode_key(self, file_stat):
+        # Certains systèmes de fichiers ne fournissent pas de numéro d'inode (0)
+        if not file_stat.st_ino:
+            return None
+        if file_stat.st_nlink <= 1 and not self.all_inodes:
+            return None
+        return ("inode", file_stat.st_dev, file_stat.st_ino)
+
+    def _content_key(self, file_path, file_stat):
+        try:
+            return ("content", file_stat.st_size, compute_prehash(file_path))
+        except OSError:
+            return None
+
+    def _same_content(self, file_path, value):
+        """Compare le sha256 complet du fichier à celui du résultat partagé"""
+        expected = value[0].get(CONTENT_DIGEST) if value[0] else None
+        if not expected:
+            return False
+        try:
+            return compute_file_digests(file_path, (CONTENT_DIGEST,)).get(CONTENT_DIGEST) == expected
+        except OSError:
+            return False
+
+    def _publish(self, entries, value):
+        for entry in entries:
+            entry.publish(value)
+
+    def _claim(self, key, remaining=None):
+        with self.lock:
+            shared = self.entries.get(key)
+            if shared is not None:
+                if shared.remaining is not None:
+                    shared.remaining -= 1
+                    if shared.remaining <= 0:
+                        # Dernier lien attendu: l'entrée n'a plus d'utilité
+                        del self.entries[key]
+                        return shared, False
+                self.entries.move_to_end(key)
+                return shared, False
+            shared = _SharedRead(remaining)
+            self.entries[key] = shared
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return shared, True
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
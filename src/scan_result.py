@@ -0,0 +1,228 @@
+from array import array
+
+# Clés exposées par la vue dictionnaire (compatibilité avec l'ancien format)
+RESULT_KEYS = (
+    "file", "hash_md5", "hash_sha1", "hash_sha256", "malware_detected", "malware_info",
+    "risk_level", "content_matches", "behavior_analysis", "cloud_reputation", "heuristic_analysis",
+    "fuzzy_hash", "similarity"
+)
+ERROR_KEYS = ("file", "error", "malware_detected")
+
+# Champs identiques dans la vue dictionnaire et dans les attributs
+PLAIN_FIELDS = ("malware_detected", "malware_info", "risk_level", "content_matches",
+                "behavior_analysis", "cloud_reputation", "heuristic_analysis", "fuzzy_hash", "similarity", "error")
+
+# Taille des condensats binaires
+DIGEST_SIZES = {"md5": 16, "sha1": 20, "sha256": 32}
+
+def _hex(digest):
+    return digest.hex() if digest is not None else None
+
+def _raw(hex_digest):
+    return bytes.fromhex(hex_digest) if hex_digest else None
+
+class ScanResult:
+    """Résultat compact du scan d'un fichier
+
+    Les condensats sont stockés en octets bruts et les sous-résultats d'analyse
+    restent à None tant qu'ils ne sont pas calculés. Une vue dictionnaire
+    (result["hash_md5"], result.get(...), to_dict()) reste disponible pour le
+    code existant.
+    """
+
+    __slots__ = ("file", "md5", "sha1", "sha256", "malware_detected", "malware_info", "risk_level",
+                 "content_matches", "behavior_analysis", "cloud_reputation", "heuristic_analysis",
+                 "fuzzy_hash", "similarity", "error")
+
+    def __init__(self, file, md5=None, sha1=None, sha256=None, malware_detected=False, malware_info=None,
+                 risk_level=0, content_matches=None, behavior_analysis=None, cloud_reputation=None,
+                 heuristic_analysis=None, fuzzy_hash=None, similarity=None, error=None):
+        self.file = file
+        self.md5 = md5
+        self.sha1 = sha1
+        self.sha256 = sha256
+        self.malware_detected = malware_detected
+        self.malware_info = malware_info
+        self.risk_level = risk_level
+        self.content_matches = content_matches
+        self.behavior_analysis = behavior_analysis
+        self.cloud_reputation = cloud_reputation
+        self.heuristic_analysis = heuristic_analysis
+        self.fuzzy_hash = fuzzy_hash
+        self.similarity = similarity
+        self.error = error
+
+    @classmethod
+    def from_digests(cls, file, digests, **fields):
+        """Crée un résultat à partir de condensats hexadécimaux"""
+        return cls(file, md5=_raw(digests.get("md5")), sha1=_raw(digests.get("sha1")),
+                   sha256=_raw(digests.get("sha256")), **fields)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Crée un résultat à partir de l'ancien format dictionnaire"""
+        return cls.from_digests(
+            data.get("file"),
+            {name: data.get(f"hash_{name}") for name in DIGEST_SIZES},
+            **{key: data[key] for key in PLAIN_FIELDS if key in data}
+        )
+
+    @classmethod
+    def from_error(cls, file, error):
+        """Résultat d'un fichier dont le scan a échoué"""
+        return cls(file, error=str(error))
+
+    def keys(self):
+        return ERROR_KEYS if self.error is not None else RESULT_KEYS
+
+    def __getitem__(self, key):
+        if key not in self.keys():
+            raise KeyError(key)
+        if key.startswith("hash_"):
+            return _hex(getattr(self, key[5:]))
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key.startswith("hash_"):
+            setattr(self, key[5:], _raw(value))
+        elif key == "file" or key in PLAIN_FIELDS:
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """Vue dictionnaire complète (ancien format des résultats)"""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"ScanResult({self.to_dict()!r})"
+
+class _DigestColumn:
+    """Colonne de condensats de taille fixe dans un seul tampon"""
+
+    def __init__(self, size):
+        self.size = size
+        self.data = bytearray()
+        self.present = bytearray()
+
+    def append(self, digest):
+        if digest is None:
+            self.data.extend(bytes(self.size))
+            self.present.append(0)
+        else:
+            self.data.extend(digest)
+            self.present.append(1)
+
+    def __getitem__(self, index):
+        if not self.present[index]:
+            return None
+        start = index * self.size
+        return bytes(self.data[start:start + self.size])
+
+class ScanResultSet:
+    """Conteneur en colonnes des résultats d'un scan complet
+
+    Chemins, condensats et verdicts sont stockés par colonne; les détails
+    (analyses, erreurs) ne sont conservés que pour les lignes qui en ont.
+    L'itération produit des ScanResult reconstruits à la demande.
+    """
+
+    def __init__(self):
+        self.files = []
+        self.fuzzy_hashes = []
+        self.digests = {name: _DigestColumn(size) for name, size in DIGEST_SIZES.items()}
+        self.flags = array("b")
+        self.risk_levels = array("b")
+        # index -> (malware_info, content_matches, behavior, cloud, heuristic, similarity, error)
+        self.details = {}
+        # Sous-résultats identiques partagés entre les lignes (analyses sans alerte)
+        self.shared = {}
+
+    def append(self, result):
+        if isinstance(result, dict):
+            result = ScanResult.from_dict(result)
+        index = len(self.files)
+        self.files.append(result.file)
+        self.fuzzy_hashes.append(result.fuzzy_hash)
+        for name, column in self.digests.items():
+            column.append(getattr(result, name))
+        self.flags.append(1 if result.malware_detected else 0)
+        self.risk_levels.append(max(-128, min(127, int(result.risk_level or 0))))
+        details = (result.malware_info, self._share(result.content_matches), self._share(result.behavior_analysis),
+                   result.cloud_reputation, result.heuristic_analysis, result.similarity, result.error)
+        if any(value is not None for value in details):
+            self.details[index] = details
+
+    def _share(self, value):
+        if isinstance(value, list) and not value:
+            key = ("list",)
+        elif isinstance(value, dict) and value.keys() == {"score", "reasons", "suspicious"}:
+            key = ("behavior", value["score"], tuple(value["reasons"]), value["suspicious"])
+        else:
+            return value
+        return self.shared.setdefault(key, value)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.files)
+        if not 0 <= index < len(self.files):
+            raise IndexError(index)
+        malware_info, content_matches, behavior, cloud, heuristic, similarity, error = self.details.get(index, (None,) * 7)
+        return ScanResult(
+            self.files[index],
+            md5=self.digests["md5"][index],
+            sha1=self.digests["sha1"][index],
+            sha256=self.digests["sha256"][index],
+            malware_detected=bool(self.flags[index]),
+            malware_info=malware_info,
+            risk_level=self.risk_levels[index],
+            content_matches=content_matches,
+            behavior_analysis=behavior,
+            cloud_reputation=cloud,
+            heuristic_analysis=heuristic,
+            fuzzy_hash=self.fuzzy_hashes[index],
+            similarity=similarity,
+            error=error
+        )
+
+    def __iter__(self):
+        for index in range(len(self.files)):
+            yield self[index]
+
+    def threat_indices(self):
+        """Indices des fichiers détectés comme malveillants (sans reconstruire les lignes)"""
+        return [index for index, flag in enumerate(self.flags) if flag]
+
+    def threats(self):
+        return [self[index] for index in self.threat_indices()]
+
+    def summary(self):
+        """Statistiques du scan calculées directement sur les colonnes"""
+        risk_distribution = {}
+        for index in self.threat_indices():
+            level = self.risk_levels[index]
+            risk_distribution[level] = risk_distribution.get(level, 0) + 1
+        return {
+            "files": len(self.files),
+            "threats": sum(self.flags),
+            "errors": sum(1 for details in self.details.values() if details[6] is not None),
+            "risk_distribution": risk_distribution
+        }
@@ -0,0 +1,119 @@
+import fnmatch
+import os
+import re
+
+# Raisons d'exclusion comptabilisées par le parcours
+SKIP_REASONS = ("pattern", "include", "size", "mount_point")
+
+def _compile_globs(patterns):
+    """Regroupe des motifs glob en une seule expression (None si aucun motif)"""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(os.path.normcase(pattern))})" for pattern in patterns))
+
+def _compile_regexes(patterns):
+    """Regroupe des expressions régulières en une seule alternative (None si aucune)"""
+    if not patterns:
+        return None
+    try:
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+    except re.error as e:
+        raise ValueError(f"Expression régulière d'exclusion invalide: {e}")
+
+def _split_patterns(value):
+    # Options acceptées sous forme de liste ou de chaîne séparée par des virgules
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [pattern.strip() for pattern in value if pattern and pattern.strip()]
+
+class ScanRules:
+    """Règles d'exclusion et d'inclusion compilées une fois pour tout un parcours
+
+    Un motif glob sans séparateur ("node_modules", "*.iso") porte sur le nom de
+    l'entrée; un motif avec "/" ("*/backups/*") porte sur le chemin complet. Les
+    expressions régulières sont recherchées dans le chemin complet. Les exclusions
+    s'appliquent aussi aux répertoires (chemin suivi de "/"), élagués avant d'être
+    listés; les inclusions et les bornes de taille ne concernent que les fichiers.
+    """
+
+    def __init__(self, exclude=(), include=(), exclude_regex=(), include_regex=(),
+                 min_size=None, max_size=None, one_filesystem=False):
+        exclude = _split_patterns(exclude)
+        include = _split_patterns(include)
+        self.exclude_names = _compile_globs([p for p in exclude if "/" not in p])
+        self.exclude_paths = _compile_globs([p for p in exclude if "/" in p])
+        self.exclude_regex = _compile_regexes(_split_patterns(exclude_regex))
+        self.include_names = _compile_globs([p for p in include if "/" not in p])
+        self.include_paths = _compile_globs([p for p in include if "/" in p])
+        self.include_regex = _compile_regexes(_split_patterns(include_regex))
+        self.has_includes = any(rule is not None for rule in (self.include_names, self.include_paths, self.include_regex))
+        self.min_size = min_size
+        self.max_size = max_size
+        self.one_filesystem = one_filesystem
+        self.root_device = None
+
+    @classmethod
+    def from_options(cls, scan_options):
+        """Règles décrites par les options de scan (None si aucune règle n'est définie)"""
+        keys = ("exclude", "include", "exclude_regex", "include_regex", "min_size", "max_size", "one_filesystem")
+        settings = {key: scan_options.get(key) for key in keys if scan_options.get(key)}
+        if not settings:
+            return None
+        return cls(**settings)
+
+    def start(self, root):
+        """Mémorise le système de fichiers de la racine du parcours"""
+        if self.one_filesystem:
+            try:
+                self.root_device = os.stat(root).st_dev
+            except OSError:
+                self.root_device = None
+
+    def _excluded(self, name, path):
+        name = os.path.normcase(name)
+        path = os.path.normcase(path).replace(os.sep, "/")
+        if self.exclude_names is not None and self.exclude_names.match(name):
+            return True
+        if self.exclude_paths is not None and self.exclude_paths.match(path):
+            return True
+        return self.exclude_regex is not None and self.exclude_regex.search(path) is not None
+
+    def _included(self, name, path):
+        name = os.path.normcase(name)
+        path = os.path.normcase(path).replace(os.sep, "/")
+        if self.include_names is not None and self.include_names.match(name):
+            return True
+        if self.include_paths is not None and self.include_paths.match(path):
+            return True
+        return self.include_regex is not None and self.include_regex.search(path) is not None
+
+    def skip_directory(self, entry):
+        """Raison d'élaguer un répertoire avant sa descente (None pour le parcourir)"""
+        # Chemin terminé par un séparateur: "*/backups/*" élague le répertoire lui-même
+        if self._excluded(entry.name, entry.path + os.sep):
+            return "pattern"
+        if self.root_device is not None:
+            try:
+                if entry.stat(follow_symlinks=False).st_dev != self.root_device:
+                    return "mount_point"
+            except OSError:
+                return None
+        return None
+
+    def skip_file_name(self, entry):
+        """Raison d'exclure un fichier d'après son nom et son chemin (sans appel stat)"""
+        if self._excluded(entry.name, entry.path):
+            return "pattern"
+        if self.has_includes and not self._included(entry.name, entry.path):
+            return "include"
+        return None
+
+    def skip_file_size(self, file_stat):
+        """Raison d'exclure un fichier d'après sa taille"""
+        if self.min_size is not None and file_stat.st_size < self.min_size:
+            return "size"
+        if self.max_size is not None and file_stat.st_size > self.max_size:
+            return "size"
+        return None
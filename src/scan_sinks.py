@@ -0,0 +1,85 @@
+import json
+import os
+import sqlite3
+
+def _as_dict(result):
+    """Vue dictionnaire d'un résultat (ScanResult ou ancien format)"""
+    return result.to_dict() if hasattr(result, "to_dict") else result
+
+class NdjsonSink:
+    """Écrit chaque résultat de scan sur une ligne JSON (NDJSON) dès qu'il est produit"""
+
+    def __init__(self, file_path):
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(file_path, "w", encoding="utf-8")
+
+    def write(self, result):
+        self.file.write(json.dumps(_as_dict(result), default=str, ensure_ascii=False))
+        self.file.write("\n")
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+class SqliteSink:
+    """Enregistre le flux de résultats dans une base SQLite (insertions groupées)"""
+
+    # Nombre de résultats insérés par transaction
+    COMMIT_BATCH_SIZE = 500
+
+    def __init__(self, db_file, table="scan_results"):
+        if not table.isidentifier():
+            raise ValueError(f"Nom de table invalide: {table}")
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.table = table
+        self.conn = sqlite3.connect(db_file, timeout=30)
+        self.conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file TEXT,
+            malware_detected BOOLEAN,
+            malware_info TEXT,
+            risk_level INTEGER,
+            hash_md5 TEXT,
+            hash_sha256 TEXT,
+            error TEXT,
+            details TEXT,
+            scan_date DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        self.pending = []
+
+    def write(self, result):
+        self.pending.append((
+            result.get("file"),
+            bool(result.get("malware_detected")),
+            result.get("malware_info"),
+            result.get("risk_level", 0),
+            result.get("hash_md5"),
+            result.get("hash_sha256"),
+            result.get("error"),
+            json.dumps(_as_dict(result), default=str, ensure_ascii=False)
+        ))
+        if len(self.pending) >= self.COMMIT_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.conn.executemany(f'''
+        INSERT INTO {self.table} (file, malware_detected, malware_info, risk_level, hash_md5, hash_sha256, error, details)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', self.pending)
+        self.conn.commit()
+        self.pending = []
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
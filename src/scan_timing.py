@@ -0,0 +1,170 @@
+import heapq
+import threading
+from time import perf_counter
+
+# Étapes mesurées dans le scan d'un fichier
+STAGES = ("cache", "prefilter", "read", "lookup", "reputation", "behavior", "archive")
+
+# Histogramme en puissances de deux de microsecondes: le seau i compte les durées < 2^i µs
+HISTOGRAM_BUCKETS = 25
+
+# Nombre de fichiers les plus lents conservés par défaut lorsque la mesure est activée
+DEFAULT_SLOWEST_FILES = 10
+
+class NullScanTiming:
+    """Mesure désactivée: chaque appel ne coûte qu'un appel de méthode vide"""
+
+    enabled = False
+
+    def start(self):
+        return 0.0
+
+    def stop(self, stage, started, timings=None):
+        pass
+
+    def stop_batch(self, stage, started, contexts):
+        pass
+
+    def new_file(self):
+        return None
+
+    def file_done(self, file_path, timings):
+        pass
+
+    def report(self):
+        return None
+
+NULL_SCAN_TIMING = NullScanTiming()
+
+class ScanTiming:
+    """Temps cumulé, nombre d'appels et histogramme de latence par étape pendant un scan
+
+    Chaque thread de scan accumule dans ses propres compteurs, sans verrou sur le
+    chemin critique; le verrou ne sert qu'à enregistrer une nouvelle étape et à
+    tenir la liste des fichiers les plus lents. Les étapes groupées par lot
+    (vérification des signatures, réputation cloud) sont réparties à parts égales
+    entre les fichiers du lot.
+    """
+
+    enabled = True
+
+    def __init__(self, slowest=DEFAULT_SLOWEST_FILES):
+        self.slowest = max(0, slowest)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.thread_stats = []
+        self.slow_files = []
+        self.sequence = 0
+        self.started = perf_counter()
+
+    @classmethod
+    def from_options(cls, scan_options):
+        """Mesure demandée par les options de scan (timing, timing_slowest), sinon NULL_SCAN_TIMING"""
+        if not scan_options.get("timing", False):
+            return NULL_SCAN_TIMING
+        slowest = scan_options.get("timing_slowest")
+        return cls(DEFAULT_SLOWEST_FILES if slowest is None else int(slowest))
+
+    def start(self):
+        return perf_counter()
+
+    def stop(self, stage, started, timings=None):
+        """Enregistre la durée d'une étape (et l'ajoute au détail du fichier si fourni)"""
+        elapsed = perf_counter() - started
+        self._record(stage, elapsed, 1)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+        return elapsed
+
+    def stop_batch(self, stage, started, contexts):
+        """Enregistre une étape exécutée une fois pour tout un lot de fichiers"""
+        elapsed = perf_counter() - started
+        count = len(contexts)
+        if not count:
+            return elapsed
+        self._record(stage, elapsed, count)
+        share = elapsed / count
+        for context in contexts:
+            timings = context.get("timings")
+            if timings is not None:
+                timings[stage] = timings.get(stage, 0.0) + share
+        return elapsed
+
+    def new_file(self):
+        """Détail par étape d'un fichier (None si les fichiers lents ne sont pas conservés)"""
+        return {} if self.slowest else None
+
+    def file_done(self, file_path, timings):
+        """Conserve le détail du fichier s'il fait partie des plus lents"""
+        if not timings:
+            return
+        total = sum(timings.values())
+        # Lecture sans verrou: la plupart des fichiers sont écartés sans contention
+        if len(self.slow_files) >= self.slowest and total <= self.slow_files[0][0]:
+            return
+        with self.lock:
+            self.sequence += 1
+            entry = (total, self.sequence, file_path, timings)
+            if len(self.slow_files) < self.slowest:
+                heapq.heappush(self.slow_files, entry)
+            elif total > self.slow_files[0][0]:
+                heapq.heapreplace(self.slow_files, entry)
+
+    def report(self):
+        """Synthèse par étape et fichiers les plus lents (durées en millisecondes)"""
+        merged = {}
+        with self.lock:
+            thread_stats = [dict(stats) for stats in self.thread_stats]
+            slow_files = sorted(self.slow_files, reverse=True)
+        for stats in thread_stats:
+            for stage, (total, calls, longest, histogram) in stats.items():
+                entry = merged.setdefault(stage, [0.0, 0, 0.0, [0] * HISTOGRAM_BUCKETS])
+                entry[0] += total
+                entry[1] += calls
+                entry[2] = max(entry[2], longest)
+                entry[3] = [a + b for a, b in zip(entry[3], histogram)]
+
+        stages = {}
+        for stage in sorted(merged, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES)):
+            total, calls, longest, histogram = merged[stage]
+            stages[stage] = {
+                "total_seconds": round(total, 6),
+                "calls": calls,
+                "mean_ms": round(total / calls * 1000.0, 4) if calls else 0.0,
+                "max_ms": round(longest * 1000.0, 4),
+                # Seaux non vides: [borne supérieure en ms, nombre d'appels]
+                "histogram": [
+                    [(2 ** index) / 1000.0 if index < HISTOGRAM_BUCKETS - 1 else "inf", count]
+                    for index, count in enumerate(histogram) if count
+                ]
+            }
+        return {
+            "wall_seconds": round(perf_counter() - self.started, 6),
+            "stages": stages,
+            "slowest_files": [
+                {
+                    "file": file_path,
+                    "total_ms": round(total * 1000.0, 4),
+                    "stages": {stage: round(elapsed * 1000.0, 4) for stage, elapsed in timings.items()}
+                }
+                for total, _, file_path, timings in slow_files
+            ]
+        }
+
+    def _record(self, stage, elapsed, count):
+        stats = getattr(self.local, "stats", None)
+        if stats is None:
+            stats = self.local.stats = {}
+            with self.lock:
+                self.thread_stats.append(stats)
+        entry = stats.get(stage)
+        if entry is None:
+            # Nouvelle clé sous verrou: report() peut parcourir le dictionnaire en même temps
+            with self.lock:
+                entry = stats[stage] = [0.0, 0, 0.0, [0] * HISTOGRAM_BUCKETS]
+        per_call = elapsed / count
+        entry[0] += elapsed
+        entry[1] += count
+        if per_call > entry[2]:
+            entry[2] = per_call
+        entry[3][min(HISTOGRAM_BUCKETS - 1, int(per_call * 1000000.0).bit_length())] += count
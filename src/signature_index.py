@@ -0,0 +1,238 @@
+import threading
+import time
+from src.database import get_db_connection, get_signature_version, get_local_signature_changes, get_content_signatures
+from src.content_signatures import AhoCorasickAutomaton
+from src.fuzzy_hash import FuzzyIndex
+
+# Longueur des condensats binaires -> algorithme
+DIGEST_ALGORITHMS = {16: "md5", 20: "sha1", 32: "sha256"}
+
+class BloomFilter:
+    """Filtre de Bloom sur des condensats binaires (déjà uniformément répartis)"""
+
+    def __init__(self, capacity, bits_per_entry=10, num_hashes=7):
+        self.num_bits = max(64, capacity * bits_per_entry)
+        self.num_hashes = num_hashes
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, digest):
+        # Double hachage à partir des octets du condensat
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+        for position in self._positions(digest):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+class PrefilterIndex:
+    """Tailles et préhachages des signatures de condensats (préfiltre avant le hachage complet)
+
+    Une signature avec préhachage n'impose la lecture complète qu'aux fichiers dont
+    le préhachage est identique; une signature avec taille seule, à ceux de cette
+    taille; une signature sans l'un ni l'autre, à tous les fichiers.
+    """
+
+    def __init__(self):
+        self.unconstrained = False
+        self.full_hash_sizes = set()
+        self.prehashes = set()
+        self.prehash_sizes = set()
+        self.prehash_any_size = False
+
+    def add(self, file_size, prehash):
+        if prehash:
+            self.prehashes.add(prehash.lower())
+            if file_size is None:
+                self.prehash_any_size = True
+            else:
+                self.prehash_sizes.add(file_size)
+        elif file_size is not None:
+            self.full_hash_sizes.add(file_size)
+        else:
+            self.unconstrained = True
+
+    def size_may_match(self, file_size):
+        """Indique si une signature peut correspondre à un fichier de cette taille"""
+        return (self.unconstrained or self.prehash_any_size or file_size in self.full_hash_sizes
+                or file_size in self.prehash_sizes)
+
+    def needs_prehash(self, file_size):
+        """Indique si le préhachage suffit à décider de la lecture complète"""
+        return not self.unconstrained and file_size not in self.full_hash_sizes
+
+    def prehash_may_match(self, prehash):
+        return prehash in self.prehashes
+
+class SignatureIndex:
+    """Index en mémoire de la table malware_hashes
+
+    Chargé une fois par moteur puis consulté sans accès SQLite. L'index (et l'automate
+    des signatures de contenu) est reconstruit puis remplacé d'un seul bloc lorsque la
+    version des signatures change.
+    """
+
+    def __init__(self, use_bloom_filter=False, refresh_interval=5.0):
+        self.use_bloom_filter = use_bloom_filter
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.last_check = 0.0
+        self.local_changes = get_local_signature_changes()
+        # (entrées, filtre de Bloom, version, automate de contenu, index flou, préfiltre): remplacé atomiquement
+        self.state = None
+
+    def load(self):
+        """Charge (ou recharge) toutes les signatures depuis la base"""
+        self.local_changes = get_local_signature_changes()
+        version = get_signature_version()
+        entries = {}
+        fuzzy_index = FuzzyIndex()
+        prefilter = PrefilterIndex()
+        try:
+            conn = get_db_connection()
+            if conn is None:
+                return False
+
+            cursor = conn.cursor()
+            cursor.execute('SELECT hash_value, malware_name, risk_level, fuzzy_hash, file_size, prehash FROM malware_hashes')
+            for row in cursor:
+                if row['fuzzy_hash']:
+                    fuzzy_index.add(row['fuzzy_hash'], (row['malware_name'], row['risk_level']))
+                try:
+                    digest = bytes.fromhex(row['hash_value'])
+                except (TypeError, ValueError):
+                    continue
+                entries[digest] = (row['malware_name'], row['risk_level'])
+                prefilter.add(row['file_size'], row['prehash'])
+            conn.close()
+        except Exception as e:
+            print(f"Erreur lors du chargement de l'index des signatures: {e}")
+            return False
+
+        bloom = None
+        if self.use_bloom_filter:
+            bloom = BloomFilter(len(entries))
+            for digest in entries:
+                bloom.add(digest)
+
+        signatures = get_content_signatures()
+        automaton = None
+        if signatures:
+            automaton = AhoCorasickAutomaton((pattern, (name, risk_level)) for pattern, name, risk_level in signatures)
+
+        self.state = (entries, bloom, version, automaton, fuzzy_index if len(fuzzy_index) else None,
+                      prefilter)
+        self.last_check = time.monotonic()
+        return True
+
+    def refresh_if_stale(self, force=False):
+        """Recharge l'index si la base de signatures a changé depuis le chargement
+
+        La version en base n'est relue qu'après refresh_interval, sauf si ce
+        processus a lui-même modifié les signatures depuis le chargement.
+        """
+        now = time.monotonic()
+        if (not force and self.state is not None and now - self.last_check < self.refresh_interval
+                and get_local_signature_changes() == self.local_changes):
+            return False
+        with self.lock:
+            if self.state is None:
+                return self.load()
+            self.last_check = now
+            if get_signature_version() != self.state[2]:
+                return self.load()
+        return False
+
+    def version(self):
+        """Version des signatures chargées (None si l'index n'est pas chargé)"""
+        state = self.state
+        return state[2] if state is not None else None
+
+    def ensure_loaded(self):
+        if self.state is None:
+            with self.lock:
+                if self.state is None:
+                    self.load()
+        return self.state is not None
+
+    def lookup(self, hash_value):
+        """Vérifie un condensat hexadécimal (même retour que check_hash)"""
+        if not hash_value or not self.ensure_loaded():
+            return False, None, 0
+        entries, bloom = self.state[:2]
+        try:
+            digest = bytes.fromhex(hash_value)
+        except ValueError:
+            return False, None, 0
+        if bloom is not None and digest not in bloom:
+            return False, None, 0
+        entry = entries.get(digest)
+        if entry is None:
+            return False, None, 0
+        return True, entry[0], entry[1]
+
+    def lookup_many(self, hash_values):
+        """Vérifie plusieurs condensats (même retour que check_hashes)"""
+        if not self.ensure_loaded():
+            return {}
+        entries, bloom = self.state[:2]
+        matches = {}
+        for hash_value in hash_values:
+            if not hash_value:
+                continue
+            try:
+                digest = bytes.fromhex(hash_value)
+            except ValueError:
+                continue
+            if bloom is not None and digest not in bloom:
+                continue
+            entry = entries.get(digest)
+            if entry is not None:
+                matches[hash_value] = entry
+        return matches
+
+    def prefilter(self):
+        """Préfiltre par taille et préhachage des signatures de condensats (None si non chargé)"""
+        if not self.ensure_loaded():
+            return None
+        return self.state[5]
+
+    def content_automaton(self):
+        """Automate Aho-Corasick des signatures de contenu (None si aucune)"""
+        if not self.ensure_loaded():
+            return None
+        return self.state[3]
+
+    def fuzzy_index(self):
+        """Index LSH des condensats flous des signatures (None si aucun)"""
+        if not self.ensure_loaded():
+            return None
+        return self.state[4]
+
+    def closest_family(self, fuzzy_hash, min_score=1):
+        """Famille connue la plus proche d'un condensat flou: (nom, niveau de risque, score) ou None"""
+        index = self.fuzzy_index()
+        if index is None or not fuzzy_hash:
+            return None
+        best = index.closest(fuzzy_hash, min_score)
+        if best is None:
+            return None
+        (name, risk_level), score = best
+        return name, risk_level, score
+
+    def required_algorithms(self):
+        """Algorithmes nécessaires pour couvrir toutes les signatures chargées"""
+        if not self.ensure_loaded():
+            return ()
+        lengths = {len(digest) for digest in self.state[0]}
+        return tuple(name for length, name in sorted(DIGEST_ALGORITHMS.items()) if length in lengths)
+
+    def __len__(self):
+        return len(self.state[0]) if self.state is not None else 0
@@ -0,0 +1,190 @@
+import os
+from src.scan_rules import SKIP_REASONS
+
+class DirectoryWalker:
+    """Parcours unique d'une arborescence avec os.scandir
+
+    Les fichiers sont produits au fur et à mesure du parcours (ordre lexicographique,
+    profondeur d'abord), avec les données stat de l'entrée pour éviter un second appel.
+    Le nombre total de fichiers est estimé pendant le parcours pour la progression.
+
+    Reprise (resume_after): l'ordre du parcours étant l'ordre lexicographique des
+    composantes du chemin, tout ce qui précède le dernier fichier terminé est
+    élagué sans être listé; seuls les répertoires sur le chemin de ce fichier sont
+    filtrés entrée par entrée.
+
+    Règles (rules, voir ScanRules): les répertoires exclus sont élagués avant
+    d'être listés et les fichiers exclus ne sont ni comptés ni produits.
+    """
+
+    def __init__(self, root, resume_after=None, rules=None):
+        self.root = root
+        self.rules = rules
+        self.skipped = dict.fromkeys(SKIP_REASONS, 0)
+        self.skipped_directories = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.resume_parts = None
+        if resume_after is not None and os.path.isdir(root):
+            relative = os.path.relpath(resume_after, root)
+            if relative != os.curdir and not relative.startswith(os.pardir):
+                self.resume_parts = relative.split(os.sep)
+        self.files_found = 0
+        self.dirs_listed = 0
+        self.dirs_pending = 0
+        self.errors = 0
+        self.finished = False
+        self.resume_frames = 0
+
+    def __iter__(self):
+        """Produit des tuples (chemin, stat) pour chaque fichier régulier"""
+        self.finished = False
+
+        if not os.path.isdir(self.root):
+            try:
+                file_stat = os.stat(self.root)
+                self.files_found += 1
+                yield self.root, file_stat
+            except OSError:
+                self.errors += 1
+            self.finished = True
+            return
+
+        if self.rules is not None:
+            self.rules.start(self.root)
+        self.dirs_pending = 1
+        stack = [self._list_directory(self.root, 0 if self.resume_parts else None)]
+        # Nombre de niveaux de la pile situés sur le chemin du point de reprise
+        self.resume_frames = 1 if self.resume_parts else 0
+        while stack:
+            try:
+                entry = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                self.resume_frames = min(self.resume_frames, len(stack))
+                continue
+
+            try:
+                if entry.is_dir():
+                    # Comme os.walk, ne pas suivre les liens symboliques vers des répertoires
+                    if not entry.is_symlink():
+                        resume_depth = self._resume_depth(entry, len(stack))
+                        stack.append(self._list_directory(entry.path, resume_depth))
+                        if resume_depth is not None:
+                            self.resume_frames += 1
+                    continue
+                if not entry.is_file():
+                    # Ignorer les FIFO, sockets et périphériques (lecture bloquante)
+                    continue
+            except OSError:
+                self.errors += 1
+                continue
+
+            try:
+                file_stat = entry.stat()
+            except OSError:
+                # Fichier compté lors du listage mais disparu depuis
+                self.errors += 1
+                self.files_found -= 1
+                continue
+
+            if self.rules is not None:
+                reason = self.rules.skip_file_size(file_stat)
+                if reason is not None:
+                    self._skip(reason, file_stat.st_size)
+                    self.files_found -= 1
+                    continue
+
+            yield entry.path, file_stat
+
+        self.finished = True
+
+    def _resume_depth(self, entry, depth):
+        # Répertoire sur le chemin du point de reprise: ses entrées sont filtrées à leur tour
+        if (self.resume_parts is not None and self.resume_frames == depth and depth < len(self.resume_parts)
+                and entry.name == self.resume_parts[depth - 1]):
+            return depth
+        return None
+
+    def _list_directory(self, path, resume_depth=None):
+        """Liste un répertoire trié par nom et met à jour l'estimation"""
+        self.dirs_pending -= 1
+        self.dirs_listed += 1
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            self.errors += 1
+            entries = []
+
+        if resume_depth is not None:
+            entries = self._resume_entries(entries, resume_depth)
+
+        # Les types d'entrée viennent de scandir: pas d'appel stat supplémentaire
+        kept = []
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        if self.rules is not None:
+                            reason = self.rules.skip_directory(entry)
+                            if reason is not None:
+                                # Sous-arborescence élaguée: jamais listée
+                                self._skip(reason)
+                                continue
+                        self.dirs_pending += 1
+                elif entry.is_file():
+                    if self.rules is not None:
+                        reason = self.rules.skip_file_name(entry)
+                        if reason is not None:
+                            self._skip(reason, 0)
+                            continue
+                    self.files_found += 1
+            except OSError:
+                pass
+            kept.append(entry)
+        return iter(kept)
+
+    def _skip(self, reason, size=None):
+        """Compte une entrée exclue (size=None pour un répertoire)"""
+        self.skipped[reason] += 1
+        if size is None:
+            self.skipped_directories += 1
+        else:
+            self.skipped_files += 1
+            self.skipped_bytes += size
+
+    def skip_stats(self):
+        """Compteurs des exclusions (octets connus seulement pour les exclusions par taille)"""
+        return dict(self.skipped, directories=self.skipped_directories, files=self.skipped_files,
+                    bytes=self.skipped_bytes)
+
+    def _resume_entries(self, entries, depth):
+        """Entrées restant à parcourir dans un répertoire situé sur le chemin du point de reprise"""
+        name = self.resume_parts[depth]
+        last = depth == len(self.resume_parts) - 1
+        remaining = []
+        for entry in entries:
+            if entry.name > name:
+                remaining.append(entry)
+            elif entry.name == name and not last:
+                # Répertoire contenant le point de reprise: parcouru partiellement
+                remaining.append(entry)
+        return remaining
+
+    def estimated_total(self):
+        """Estime le nombre total de fichiers à partir des répertoires déjà listés"""
+        if self.finished or self.dirs_listed == 0:
+            return self.files_found
+        files_per_dir = self.files_found / self.dirs_listed
+        return self.files_found + int(self.dirs_pending * files_per_dir)
+
+    def progress(self, scanned_files):
+        """Pourcentage de progression estimé (100 seulement à la fin du parcours)"""
+        total = self.estimated_total()
+        # Tous les répertoires sont listés: le total est exact
+        if (self.finished or self.dirs_pending == 0) and scanned_files >= total:
+            return 100
+        if total <= 0:
+            return 0
+        return min(99, int((scanned_files / total) * 100))
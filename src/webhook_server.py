@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 import stripe
 import os
 from datetime import datetime, timedelta
@@ -44,6 +44,9 @@ DATABASE_FILE = os.environ.get('DATABASE_FILE', 'data/users.db')
 MAX_SCAN_FILES = int(os.environ.get('MAX_SCAN_FILES', 1000))
 MAX_CACHE_SIZE = int(os.environ.get('MAX_CACHE_SIZE', 1000))
 CACHE_TTL = int(os.environ.get('CACHE_TTL', 300))  # 5 minutes
+MAX_BATCH_HASHES = int(os.environ.get('MAX_BATCH_HASHES', 5000))
+# Le moteur envoie une requête par lot de fichiers: la limite par défaut (60/min) bloquerait les scans cloud
+BATCH_REQUESTS_PER_MINUTE = int(os.environ.get('BATCH_REQUESTS_PER_MINUTE', 1200))
 
 stripe.api_key = STRIPE_SECRET_KEY
 
@@ -54,14 +57,70 @@ SUBSCRIPTION_PLANS = {
     "lifetime": {"days": 365*10, "price": 259.00, "name": "Accès Permanent", "stripe_price_id": "price_lifetime_test"}
 }
 
+# Métriques exposées sur /metrics (compteurs et histogrammes en mémoire, sans accès à la base)
+from src.metrics import REGISTRY, CONTENT_TYPE, QUERY_LATENCY_BUCKETS, PROCESS_START_TIME
+
+http_requests_total = REGISTRY.counter(
+    'samshakkur_http_requests_total', 'Requêtes HTTP traitées', ('method', 'route', 'status'))
+http_request_duration = REGISTRY.histogram(
+    'samshakkur_http_request_duration_seconds', 'Durée de traitement des requêtes HTTP', ('method', 'route'))
+rate_limit_rejections = REGISTRY.counter(
+    'samshakkur_rate_limit_rejections_total', 'Requêtes refusées par la limitation de débit', ('route',))
+hash_cache_lookups = REGISTRY.counter(
+    'samshakkur_hash_cache_lookups_total', 'Consultations du cache de hashs (hit ou miss)', ('result',))
+hash_cache_evictions = REGISTRY.counter(
+    'samshakkur_hash_cache_evictions_total', 'Entrées retirées du cache de hashs (capacity ou expired)', ('reason',))
+sqlite_query_duration = REGISTRY.histogram(
+    'samshakkur_sqlite_query_duration_seconds', 'Durée des requêtes SQLite', ('operation',), QUERY_LATENCY_BUCKETS)
+webhook_events = REGISTRY.counter(
+    'samshakkur_webhook_events_total', 'Événements Stripe reçus par type et issue', ('type', 'outcome'))
+
+class MeteredTTLCache(TTLCache):
+    """TTLCache comptant les entrées retirées par manque de place ou par expiration"""
+
+    def popitem(self):
+        item = super().popitem()
+        hash_cache_evictions.inc('capacity')
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        if expired:
+            hash_cache_evictions.inc('expired', amount=len(expired))
+        return expired
+
 # Cache avec limite de taille et expiration
-hash_cache = TTLCache(maxsize=MAX_CACHE_SIZE, ttl=CACHE_TTL)
+hash_cache = MeteredTTLCache(maxsize=MAX_CACHE_SIZE, ttl=CACHE_TTL)
+
+REGISTRY.gauge('samshakkur_hash_cache_entries', 'Entrées présentes dans le cache de hashs', lambda: len(hash_cache))
+REGISTRY.gauge('samshakkur_process_start_time_seconds', 'Date de démarrage du serveur (epoch)', lambda: PROCESS_START_TIME)
 
 # Validation email avec regex
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
 # Import des fonctions de base de données
-from src.database import init_database, get_db_connection, update_user_subscription, check_hash, add_malware_hash, add_scan_history, get_user_subscription_status
+from src.database import init_database, get_db_connection, update_user_subscription, check_hash, check_hashes, add_malware_hash, add_scan_history, get_user_subscription_status, set_query_observer
+from src.fuzzy_hash import parse_fuzzy_hash, FUZZY_HASH_FORMAT
+
+# Durée de chaque requête SQLite du serveur, par type d'opération
+set_query_observer(lambda operation, elapsed: sqlite_query_duration.observe(elapsed, operation))
+
+def route_label():
+    """Route Flask de la requête courante (modèle d'URL, pour limiter le nombre de séries)"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    route = route_label()
+    if started is not None:
+        http_request_duration.observe(time.perf_counter() - started, request.method, route)
+    http_requests_total.inc(request.method, route, response.status_code)
+    return response
 
 # Décorateur pour la validation des données utilisateur
 def validate_user_data(f):
@@ -126,7 +185,12 @@ def rate_limit(requests_per_minute=60):
             # Vérifier la limite
             if len(request_times[client_ip]) >= requests_per_minute:
                 logger.warning(f"Rate limit dépassé pour: {client_ip}")
-                return jsonify({'error': 'Trop de requêtes. Veuillez réessayer plus tard.'}), 429
+                rate_limit_rejections.inc(route_label())
+                # Délai avant que la plus ancienne requête sorte de la fenêtre
+                oldest = request_times[client_ip][0] if request_times[client_ip] else current_time
+                retry_after = max(1, int(60 - (current_time - oldest)) + 1)
+                return (jsonify({'error': 'Trop de requêtes. Veuillez réessayer plus tard.'}), 429,
+                        {'Retry-After': str(retry_after)})
             
             # Ajouter la requête actuelle
             request_times[client_ip].append(current_time)
@@ -144,12 +208,15 @@ def webhook_received():
     
     if not sig_header:
         logger.error("Signature Stripe manquante")
+        webhook_events.inc('unknown', 'rejected')
         return 'Signature manquante', 400
     
+    event_type = 'unknown'
     try:
         event = stripe.Webhook.construct_event(
             payload, sig_header, STRIPE_WEBHOOK_SECRET
         )
+        event_type = event['type']
         logger.info(f"Webhook reçu: {event['type']}")
         
         # Vérifier le timestamp pour prévenir les replay attacks
@@ -157,19 +224,24 @@ def webhook_received():
         current_time = time.time()
         if abs(current_time - event_time) > 300:  # 5 minutes de tolérance
             logger.warning(f"Webhook trop ancien: {event_time}, rejeté")
+            webhook_events.inc(event['type'], 'rejected')
             return 'Webhook trop ancien', 400
             
     except ValueError as e:
         logger.error(f"Payload invalide: {e}")
+        webhook_events.inc('unknown', 'rejected')
         return 'Invalid payload', 400
     except stripe.error.SignatureVerificationError as e:
         logger.error(f"Signature invalide: {e}")
+        webhook_events.inc('unknown', 'rejected')
         return 'Invalid signature', 400
     except Exception as e:
         logger.error(f"Erreur lors du traitement du webhook: {e}")
+        webhook_events.inc(event_type, 'error')
         return 'Server error', 500
 
     # Gérer les différents types d'événements
+    outcome = 'handled'
     try:
         if event['type'] == 'checkout.session.completed':
             handle_checkout_session(event['data']['object'])
@@ -181,10 +253,13 @@ def webhook_received():
             handle_subscription_updated(event['data']['object'])
         else:
             logger.info(f"Événement non traité: {event['type']}")
+            outcome = 'ignored'
     except Exception as e:
         logger.error(f"Erreur lors du traitement de l'événement {event['type']}: {e}")
+        webhook_events.inc(event['type'], 'error')
         return 'Server error', 500
     
+    webhook_events.inc(event['type'], outcome)
     return jsonify(success=True)
 
 def handle_checkout_session(session):
@@ -371,6 +446,37 @@ def check_hash_endpoint(hash_value):
         logger.error(f"Erreur lors de la vérification du hash: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
+@app.route('/hash/check/batch', methods=['POST'])
+@handle_db_errors
+@rate_limit(BATCH_REQUESTS_PER_MINUTE)
+def check_hash_batch_endpoint():
+    """Endpoint pour vérifier un lot de hashs en une seule requête"""
+    try:
+        data = request.get_json(silent=True)
+        hashes = data.get('hashes') if isinstance(data, dict) else None
+        
+        # Validation du lot
+        if not isinstance(hashes, list) or not hashes:
+            return jsonify({'error': 'Liste de hashs requise'}), 400
+            
+        if len(hashes) > MAX_BATCH_HASHES:
+            return jsonify({'error': f'Trop de hashs (maximum {MAX_BATCH_HASHES})'}), 400
+            
+        if not all(isinstance(h, str) and len(h) in [32, 40, 64] for h in hashes):
+            return jsonify({'error': 'Format de hash invalide'}), 400
+        
+        matches = check_hashes(hashes)
+        return jsonify({
+            'checked': len(hashes),
+            'matches': {
+                hash_value: {'malware_name': malware_name, 'risk_level': risk_level}
+                for hash_value, (malware_name, risk_level) in matches.items()
+            }
+        })
+    except Exception as e:
+        logger.error(f"Erreur lors de la vérification groupée des hashs: {e}")
+        return jsonify({'error': 'Erreur serveur'}), 500
+
 @app.route('/hash/add', methods=['POST'])
 @validate_user_data
 @handle_db_errors
@@ -382,6 +488,9 @@ def add_hash_endpoint():
         hash_value = data.get('hash')
         malware_name = data.get('malware_name', 'Unknown')
         risk_level = data.get('risk_level', 5)
+        fuzzy_hash = data.get('fuzzy_hash')
+        file_size = data.get('file_size')
+        prehash = data.get('prehash')
         
         # Validation des données
         if not hash_value or not isinstance(hash_value, str) or len(hash_value) not in [32, 40, 64]:
@@ -393,7 +502,16 @@ def add_hash_endpoint():
         if not isinstance(risk_level, int) or risk_level < 1 or risk_level > 10:
             return jsonify({'error': 'Niveau de risque invalide (1-10)'}), 400
         
-        success = add_malware_hash(hash_value, malware_name, risk_level)
+        if fuzzy_hash is not None and parse_fuzzy_hash(fuzzy_hash) is None:
+            return jsonify({'error': f'Condensat flou invalide (format {FUZZY_HASH_FORMAT} attendu, ssdeep non supporté)'}), 400
+        
+        if file_size is not None and (not isinstance(file_size, int) or isinstance(file_size, bool) or file_size < 0):
+            return jsonify({'error': 'Taille de fichier invalide'}), 400
+        
+        if prehash is not None and (not isinstance(prehash, str) or not re.fullmatch(r'[0-9a-fA-F]{64}', prehash)):
+            return jsonify({'error': 'Préhachage invalide'}), 400
+        
+        success = add_malware_hash(hash_value, malware_name, risk_level, fuzzy_hash, file_size, prehash)
         
         return jsonify({
             'success': success,
@@ -423,7 +541,7 @@ def add_scan_history_endpoint():
             return jsonify({'error': 'Données manquantes'}), 400
             
         if not isinstance(files_scanned, int) or files_scanned < 0:
-            return jsonify({'error': 'Nombre de fichiers scannés invalide'), 400
+            return jsonify({'error': 'Nombre de fichiers scannés invalide'}), 400
             
         if not isinstance(threats_detected, int) or threats_detected < 0:
             return jsonify({'error': 'Nombre de menaces détectées invalide'}), 400
@@ -522,6 +640,11 @@ def health_check():
             'error': str(e)
         }), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Endpoint des métriques au format texte de Prometheus (aucune requête SQLite)"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @app.route('/hash/check/cached/<hash_value>', methods=['GET'])
 @handle_db_errors
 @rate_limit()
@@ -534,12 +657,14 @@ def check_hash_cached_endpoint(hash_value):
         
         # Vérifier le cache
         if hash_value in hash_cache:
+            hash_cache_lookups.inc('hit')
             logger.info(f"Hash {hash_value} servi depuis le cache")
             result = hash_cache[hash_value]
             result['cached'] = True
             return jsonify(result)
         
         # Si pas dans le cache, faire la vérification
+        hash_cache_lookups.inc('miss')
         is_malicious, malware_name, risk_level = check_hash(hash_value)
         result = {
             'hash': hash_value,
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Base SQLite temporaire (data/users.db n'est jamais modifiée)"""
+    monkeypatch.setenv("DATABASE_FILE", str(tmp_path / "db" / "users.db"))
+    from src.database import init_database
+    assert init_database()
+    return tmp_path / "db" / "users.db"
+
+@pytest.fixture
+def engine(database):
+    from src.antivirus_engine import SamShakkurAntivirus
+    return SamShakkurAntivirus()
+
+@pytest.fixture
+def webhook_client(database, tmp_path, monkeypatch):
+    """Client de test Flask du serveur webhook (clés Stripe factices)"""
+    for name in ("STRIPE_SECRET_KEY", "STRIPE_PUBLISHABLE_KEY", "STRIPE_WEBHOOK_SECRET"):
+        monkeypatch.setenv(name, "test")
+    # Le serveur écrit son journal dans le dossier courant
+    monkeypatch.chdir(tmp_path)
+    import importlib
+    return importlib.import_module("src.webhook_server").app.test_client()
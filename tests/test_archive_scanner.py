@@ -0,0 +1,88 @@
+import gzip
+import io
+import random
+import tarfile
+import zipfile
+
+def _corrupt_zip(path):
+    """Zip dont le premier membre a des données deflate corrompues"""
+    text = b"".join(b"line %d of a compressible member\n" % index for index in range(5000))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("broken.txt", text)
+        archive.writestr("inner.bin", b"hello")
+    data = bytearray(path.read_bytes())
+    start = 30 + len("broken.txt")
+    for offset in range(start + 20, start + 220):
+        data[offset] ^= 0x5A
+    path.write_bytes(bytes(data))
+
+def test_corrupted_zip_does_not_stop_the_scan(engine, tmp_path):
+    target = tmp_path / "scan"
+    target.mkdir()
+    _corrupt_zip(target / "a_corrupt.zip")
+    (target / "b_sample.bin").write_bytes(b"abc123")
+
+    success, message = engine.scan_directory(str(target), {"profile": "full"})
+    assert success, message
+    results = {result.file.split(str(target) + "/", 1)[1]: result for result in engine.scan_results}
+
+    assert results["b_sample.bin"].malware_detected
+    assert results["a_corrupt.zip"].error is None
+    assert results["a_corrupt.zip!broken.txt"].error.startswith("Membre illisible")
+    # Les membres suivants de l'archive restent analysés
+    assert results["a_corrupt.zip!inner.bin"].malware_detected
+
+def test_archive_failure_is_reported_on_the_file(engine, tmp_path, monkeypatch):
+    target = tmp_path / "scan"
+    target.mkdir()
+    with zipfile.ZipFile(target / "a.zip", "w") as archive:
+        archive.writestr("member.txt", b"data")
+    (target / "b_sample.bin").write_bytes(b"abc123")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(engine, "scan_archive_members", fail)
+
+    success, message = engine.scan_directory(str(target), {"profile": "full"})
+    assert success, message
+    results = {result.file.rsplit("/", 1)[1]: result for result in engine.scan_results}
+    assert "boom" in results["a.zip"].error
+    assert results["b_sample.bin"].malware_detected
+
+def _tar_gz(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def test_truncated_tar_gz_reports_the_unreadable_member(engine, tmp_path):
+    target = tmp_path / "scan"
+    target.mkdir()
+    filler = random.Random(5).randbytes(256 * 1024)
+    data = _tar_gz([("first.bin", b"abc123"), ("big.bin", filler), ("last.bin", b"abc123")])
+    (target / "a_truncated.tar.gz").write_bytes(data[:len(data) // 2])
+    (target / "b_sample.bin").write_bytes(b"abc123")
+
+    success, message = engine.scan_directory(str(target), {"profile": "full"})
+    assert success, message
+    results = {result.file.split(str(target) + "/", 1)[1]: result for result in engine.scan_results}
+
+    assert results["a_truncated.tar.gz!first.bin"].malware_detected
+    assert results["a_truncated.tar.gz!big.bin"].error.startswith("Membre illisible")
+    assert results["b_sample.bin"].malware_detected
+
+def test_gzip_crc_error_is_reported(tmp_path):
+    from src.archive_scanner import ArchiveScanner
+    from src.scan_result import ScanResult
+    data = bytearray(gzip.compress(b"payload " * 1000))
+    data[-8] ^= 0xFF  # CRC32 du flux
+    path = tmp_path / "payload.bin.gz"
+    path.write_bytes(bytes(data))
+
+    scanner = ArchiveScanner(lambda member_path, chunks, size: (list(chunks), ScanResult(member_path))[1])
+    (result,) = scanner.scan(str(path))
+    assert result.file == f"{path}!payload.bin"
+    assert result.error.startswith("Membre illisible")
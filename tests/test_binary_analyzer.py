@@ -0,0 +1,73 @@
+import random
+import struct
+
+from src.binary_analyzer import analyze_binary, binary_heuristics
+
+def dos_header(e_lfanew, size=0x80):
+    data = bytearray(b"MZ" + b"\0" * (size - 2))
+    struct.pack_into("<I", data, 0x3C, e_lfanew)
+    return data
+
+def test_mz_prefix_without_pe_header_is_not_an_executable(tmp_path):
+    samples = {
+        "notes.txt": b"MZ is how this text file happens to start",
+        "short.dat": b"MZ" + b"\0" * 0x30,
+        "outside.dat": bytes(dos_header(0x10000)),
+        "no_signature.dat": bytes(dos_header(0x40)),
+        "bad_elf.dat": b"\x7fELF" + b"\x07\x09\x01" + b"\0" * 64,
+        "short_elf.dat": b"\x7fELF\x02\x01\x01" + b"\0" * 20,
+    }
+    for name, content in samples.items():
+        path = tmp_path / name
+        path.write_bytes(content)
+        assert analyze_binary(str(path)) is None, name
+
+def test_confirmed_pe_header_with_broken_tables_is_malformed(tmp_path):
+    data = dos_header(0x40)
+    data[0x40:0x44] = b"PE\0\0"
+    path = tmp_path / "broken.exe"
+    path.write_bytes(bytes(data))
+
+    features = analyze_binary(str(path))
+    assert features["format"] == "PE"
+    assert features["malformed"]
+
+def test_text_starting_with_mz_gets_no_binary_score(engine, tmp_path):
+    path = tmp_path / "readme.txt"
+    path.write_bytes(b"MZ: notes de version\n" * 10)
+
+    analysis = engine.analyze_file_behavior(str(path))
+    assert "binary" not in analysis
+    assert analysis["score"] == 0.0 and analysis["reasons"] == []
+
+def minimal_pe(section_data):
+    """PE32 à une section exécutable .text (en-têtes sur 0x200 octets)"""
+    data = dos_header(0x40, size=0x200)
+    data[0x40:0x44] = b"PE\0\0"
+    struct.pack_into("<HHIIIHH", data, 0x44, 0x14C, 1, 0, 0, 0, 224, 0x102)
+    optional = 0x58
+    struct.pack_into("<H", data, optional, 0x10B)
+    struct.pack_into("<I", data, optional + 16, 0x1000)
+    struct.pack_into("<I", data, optional + 60, 0x200)
+    struct.pack_into("<I", data, optional + 92, 16)
+    struct.pack_into("<8sIIIII", data, optional + 224, b".text", len(section_data), 0x1000, len(section_data), 0x200, 0)
+    struct.pack_into("<I", data, optional + 224 + 36, 0x60000020)
+    return bytes(data) + section_data
+
+def test_section_entropy_flags_packed_code(tmp_path):
+    packed = tmp_path / "packed.exe"
+    packed.write_bytes(minimal_pe(random.Random(4).randbytes(0x4000)))
+    plain = tmp_path / "plain.exe"
+    plain.write_bytes(minimal_pe(b"\x55\x89\xe5\x90\xc3" * 0x800))
+
+    features = analyze_binary(str(packed))
+    assert not features["malformed"]
+    (section,) = features["sections"]
+    assert section["name"] == ".text" and section["executable"] and section["entropy"] > 7.5
+    _, reasons = binary_heuristics(features, packed.stat().st_size)
+    assert any("haute entropie" in reason for reason in reasons)
+
+    features = analyze_binary(str(plain))
+    assert features["sections"][0]["entropy"] < 3
+    _, reasons = binary_heuristics(features, plain.stat().st_size)
+    assert not any("haute entropie" in reason for reason in reasons)
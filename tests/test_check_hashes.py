@@ -0,0 +1,34 @@
+import hashlib
+
+import src.database as db
+from src.database import add_malware_hash, check_hash, check_hashes
+
+def test_check_hashes_matches_check_hash_across_batches(database, monkeypatch):
+    known = [hashlib.sha256(b"sample %d" % index).hexdigest() for index in range(0, 2500, 250)]
+    for index, hash_value in enumerate(known):
+        assert add_malware_hash(hash_value, f"Sample {index}", index % 10)
+    # Plus de hashs que la limite de paramètres SQLite, avec doublons et valeurs vides
+    candidates = [hashlib.sha256(b"sample %d" % index).hexdigest() for index in range(2500)]
+    candidates += known + ["", None]
+
+    queries = []
+    monkeypatch.setattr(db, "_query_observer", lambda operation, elapsed: queries.append(operation))
+    matches = check_hashes(candidates)
+
+    assert queries == ["SELECT"] * 5
+    assert matches == {hash_value: check_hash(hash_value)[1:] for hash_value in known}
+
+def test_check_hashes_without_candidates(database):
+    assert check_hashes([]) == {}
+    assert check_hashes(["", None]) == {}
+
+def test_batch_endpoint(webhook_client):
+    clean = hashlib.md5(b"clean").hexdigest()
+    hello = hashlib.md5(b"hello").hexdigest()
+
+    response = webhook_client.post("/hash/check/batch", json={"hashes": [clean, hello]})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"checked": 2, "matches": {
+        hello: {"malware_name": "Another test signature", "risk_level": 7}}}
+    assert webhook_client.post("/hash/check/batch", json={"hashes": ["xyz"]}).status_code == 400
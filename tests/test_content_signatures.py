@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from src.content_signatures import AhoCorasickAutomaton, AnchoredContentMatcher, ContentMatcher
+from src.database import add_content_signature
+
+def _patterns(rng, count, min_length, max_length):
+    patterns = set()
+    while len(patterns) < count:
+        patterns.add(bytes(rng.choice(b"abcd") for _ in range(rng.randint(min_length, max_length))))
+    return sorted(patterns)
+
+def _naive(data, patterns):
+    # Première occurrence de chaque motif (bytes.find)
+    return {f"sig{index}": data.find(pattern) for index, pattern in enumerate(patterns) if pattern in data}
+
+def _matches(automaton, data, chunk_size):
+    matcher = automaton.matcher()
+    for start in range(0, len(data), chunk_size):
+        matcher.update(data[start:start + chunk_size])
+    return matcher, {match["name"]: match["offset"] for match in matcher.finish()}
+
+@pytest.mark.parametrize("min_length, matcher_class", [(1, ContentMatcher), (4, AnchoredContentMatcher)])
+def test_matchers_agree_with_bytes_find(min_length, matcher_class):
+    rng = random.Random(min_length)
+    for _ in range(20):
+        patterns = _patterns(rng, 12, min_length, 9)
+        automaton = AhoCorasickAutomaton((pattern, (f"sig{index}", 5)) for index, pattern in enumerate(patterns))
+        data = bytes(rng.choice(b"abcdxyz") for _ in range(rng.randint(0, 400)))
+        expected = _naive(data, patterns)
+
+        # Motifs à cheval sur plusieurs blocs quelle que soit la taille des blocs
+        for chunk_size in (1, 3, 7, 64, max(1, len(data))):
+            matcher, found = _matches(automaton, data, chunk_size)
+            assert isinstance(matcher, matcher_class)
+            assert found == expected, (patterns, data, chunk_size)
+
+def test_payload_and_empty_patterns():
+    automaton = AhoCorasickAutomaton([(b"", ("empty", 1)), (b"EVIL", ("Evil", 9)), (b"VIL!", ("Vil", 3))])
+    assert len(automaton) == 2
+
+    _, found = _matches(automaton, b"..EVIL!..EVIL", 5)
+    assert found == {"Evil": 2, "Vil": 3}
+    matcher = automaton.matcher()
+    matcher.update(b"xxEVIL")
+    assert matcher.finish() == [{"name": "Evil", "risk_level": 9, "offset": 2}]
+
+def test_scan_file_reports_content_matches(engine, tmp_path):
+    assert add_content_signature(b"\xde\xad\xbe\xefPAYLOAD", "Embedded payload", 8)
+    path = tmp_path / "dropper.bin"
+    path.write_bytes(b"\0" * 100000 + b"\xde\xad\xbe\xefPAYLOAD" + b"\0" * 100)
+
+    result = engine.scan_file(str(path), {"profile": "full", "incremental": False})
+
+    assert result.malware_detected and result.malware_info == "Embedded payload"
+    assert result.content_matches == [{"name": "Embedded payload", "risk_level": 8, "offset": 100000}]
@@ -0,0 +1,50 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from src.entropy import ENTROPY_STEP, ENTROPY_WINDOW, EntropyAnalyzer, entropy_heuristics
+
+def _naive_entropy(data):
+    return -sum(count / len(data) * math.log2(count / len(data)) for count in Counter(data).values())
+
+def _sample():
+    rng = random.Random(14)
+    text = b"".join(b"ligne de journal %d: tout va bien\n" % index for index in range(4000))
+    return text[:50000] + rng.randbytes(40000) + text[:30001]
+
+def _analyze(data, chunk_size):
+    analyzer = EntropyAnalyzer()
+    for start in range(0, len(data), chunk_size):
+        analyzer.update(data[start:start + chunk_size])
+    return analyzer.finish()
+
+def test_statistics_do_not_depend_on_chunking():
+    data = _sample()
+    reference = _analyze(data, len(data))
+    for chunk_size in (1000, 4095, ENTROPY_STEP, 5000, 65536):
+        assert _analyze(data, chunk_size) == reference, chunk_size
+
+def test_statistics_match_a_naive_computation():
+    data = _sample()
+    windows = [_naive_entropy(data[offset:offset + ENTROPY_WINDOW])
+               for offset in range(0, len(data) - ENTROPY_WINDOW + 1, ENTROPY_STEP)]
+    stats = _analyze(data, 10000)
+
+    assert stats["entropy"] == pytest.approx(_naive_entropy(data), abs=1e-3)
+    assert stats["max_window_entropy"] == pytest.approx(max(windows), abs=1e-3)
+    high = [offset for offset, value in zip(range(0, len(data), ENTROPY_STEP), windows) if value >= 7.2]
+    assert stats["high_entropy_ratio"] == round(len(high) / len(windows), 3)
+    # Une seule région couvrant le bloc aléatoire (octets 50000 à 90000)
+    assert stats["high_entropy_region_count"] == 1
+    region = stats["high_entropy_regions"][0]
+    assert region["offset"] == high[0] and region["offset"] + region["length"] == high[-1] + ENTROPY_WINDOW
+    assert region["offset"] <= 50000 + ENTROPY_STEP and region["offset"] + region["length"] >= 90000 - ENTROPY_STEP
+
+def test_heuristics():
+    assert _analyze(b"", 10)["entropy"] == 0.0
+    stats = _analyze(random.Random(1).randbytes(20000), 4096)
+    assert entropy_heuristics(stats, "notes.txt")[0] == 0.3
+    assert entropy_heuristics(stats, "setup.exe", binary={})[0] == 0.3
+    assert entropy_heuristics(_analyze(_sample()[:20000], 4096), "notes.txt") == (0.0, [])
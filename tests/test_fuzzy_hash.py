@@ -0,0 +1,39 @@
+import random
+
+from src.fuzzy_hash import FUZZY_HASH_FORMAT, FuzzyHasher, compare, parse_fuzzy_hash
+
+SSDEEP_DIGEST = "96:s4Ud3HxrQ9XGr6ksMq0FUmSr6F2fAZzzs:s4Ud3HxrQ9XGr6ksMqsFUm8fAZzzs"
+
+def fuzzy_digest(data):
+    hasher = FuzzyHasher(len(data))
+    hasher.update(data)
+    return hasher.hexdigest()
+
+def test_digest_carries_its_own_format_marker():
+    data = random.Random(1).randbytes(60000)
+    digest = fuzzy_digest(data)
+    marker, blocksize, _, _ = digest.split(":")
+    assert marker == FUZZY_HASH_FORMAT
+    assert parse_fuzzy_hash(digest)[0] == int(blocksize)
+
+    variant = data[:30000] + b"\x00" * 200 + data[30200:]
+    assert compare(digest, fuzzy_digest(variant)) > 50
+
+def test_foreign_or_malformed_digests_are_rejected():
+    assert parse_fuzzy_hash(SSDEEP_DIGEST) is None
+    assert parse_fuzzy_hash("ssdeep:" + SSDEEP_DIGEST) is None
+    assert parse_fuzzy_hash(f"{FUZZY_HASH_FORMAT}:100:abc:def") is None
+    assert parse_fuzzy_hash(f"{FUZZY_HASH_FORMAT}:96:ab$c:def") is None
+    assert parse_fuzzy_hash(None) is None
+    assert compare(SSDEEP_DIGEST, SSDEEP_DIGEST) == 0
+
+def test_hash_add_rejects_ssdeep_digests(webhook_client):
+    client = webhook_client
+    payload = {"hash": "a" * 32, "malware_name": "Test.Family", "risk_level": 7}
+
+    response = client.post("/hash/add", json=dict(payload, fuzzy_hash=SSDEEP_DIGEST))
+    assert response.status_code == 400
+
+    digest = fuzzy_digest(random.Random(2).randbytes(4096))
+    response = client.post("/hash/add", json=dict(payload, fuzzy_hash=digest))
+    assert response.status_code == 200
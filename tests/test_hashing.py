@@ -0,0 +1,44 @@
+import hashlib
+import random
+
+from src import hashing
+from src.hashing import READ_BUFFER_SIZE, SUPPORTED_ALGORITHMS, compute_file_digests, compute_stream_digests
+
+class ChunkRecorder:
+    def __init__(self):
+        self.data = bytearray()
+
+    def update(self, chunk):
+        self.data.extend(chunk)
+
+def test_all_digests_come_from_a_single_read(tmp_path, monkeypatch):
+    data = random.Random(1).randbytes(2 * READ_BUFFER_SIZE + 12345)
+    path = tmp_path / "sample.bin"
+    path.write_bytes(data)
+    opened = []
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return open(*args, **kwargs)
+    monkeypatch.setattr(hashing, "open", counting_open, raising=False)
+
+    recorder = ChunkRecorder()
+    digests = compute_file_digests(str(path), SUPPORTED_ALGORITHMS, [recorder])
+
+    assert opened == [str(path)]
+    assert digests == {name: hashlib.new(name, data).hexdigest() for name in SUPPORTED_ALGORITHMS}
+    # Les consommateurs voient exactement le même contenu que les condensats
+    assert bytes(recorder.data) == data
+
+def test_stream_digests_match_file_digests(tmp_path):
+    data = random.Random(2).randbytes(300000)
+    path = tmp_path / "sample.bin"
+    path.write_bytes(data)
+    chunks = [data[start:start + 4096] for start in range(0, len(data), 4096)]
+
+    assert compute_stream_digests(chunks, ("md5", "sha256")) == compute_file_digests(str(path), ("md5", "sha256"))
+
+def test_engine_hashes_only_the_profile_algorithms(engine, tmp_path):
+    path = tmp_path / "sample.bin"
+    path.write_bytes(b"abc123")
+    assert engine.calculate_file_hashes(str(path), ("md5",)) == {"md5": hashlib.md5(b"abc123").hexdigest()}
+    assert engine.calculate_file_hashes(str(tmp_path / "missing.bin")) == {}
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from src.metrics import MetricsRegistry
+
+def test_text_exposition_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Requêtes traitées", ("route", "status"))
+    latency = registry.histogram("app_latency_seconds", "Durée\n\"des\" requêtes", ("route",), buckets=(0.5, 0.1))
+    registry.gauge("app_start_time_seconds", "Démarrage", lambda: 12.5)
+
+    requests.inc("/hash", 200)
+    requests.inc("/hash", 200, amount=2)
+    requests.inc('/a"b\\c', 404)
+    for value in (0.05, 0.1, 0.3, 2.0):
+        latency.observe(value, "/hash")
+
+    assert registry.render() == "\n".join([
+        "# HELP app_requests_total Requêtes traitées",
+        "# TYPE app_requests_total counter",
+        'app_requests_total{route="/a\\"b\\\\c",status="404"} 1',
+        'app_requests_total{route="/hash",status="200"} 3',
+        '# HELP app_latency_seconds Durée\\n\\"des\\" requêtes',
+        "# TYPE app_latency_seconds histogram",
+        'app_latency_seconds_bucket{route="/hash",le="0.1"} 2',
+        'app_latency_seconds_bucket{route="/hash",le="0.5"} 3',
+        'app_latency_seconds_bucket{route="/hash",le="+Inf"} 4',
+        'app_latency_seconds_sum{route="/hash"} 2.45',
+        'app_latency_seconds_count{route="/hash"} 4',
+        "# HELP app_start_time_seconds Démarrage",
+        "# TYPE app_start_time_seconds gauge",
+        "app_start_time_seconds 12.5",
+    ]) + "\n"
+    assert requests.value("/hash", 200) == 3 and requests.value("/other", 200) == 0
+
+def test_registration_and_label_errors():
+    registry = MetricsRegistry()
+    counter = registry.counter("events_total", "Événements", ("type",))
+    with pytest.raises(ValueError):
+        registry.histogram("events_total", "Doublon")
+    with pytest.raises(ValueError):
+        counter.inc()
+
+def test_concurrent_increments():
+    counter = MetricsRegistry().counter("hits_total", "Accès")
+    def hit():
+        for _ in range(1000):
+            counter.inc()
+    threads = [threading.Thread(target=hit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value() == 8000
@@ -0,0 +1,41 @@
+import os
+import random
+import time
+
+def test_pooled_results_keep_the_input_order(engine, tmp_path, monkeypatch):
+    files = []
+    for index in range(40):
+        path = tmp_path / f"file{index:02d}.bin"
+        path.write_bytes(b"abc123" if index % 7 == 0 else b"content %d" % index)
+        files.append((str(path), os.stat(path)))
+
+    # Lots terminés dans le désordre
+    rng = random.Random(3)
+    original = engine._scan_batch
+    def slow_batch(*args):
+        time.sleep(rng.random() * 0.01)
+        return original(*args)
+    monkeypatch.setattr(engine, "_scan_batch", slow_batch)
+
+    profile = engine.get_scan_profile({"profile": "full", "workers": 6, "batch_size": 3})
+    results = list(engine._iter_scan_results(iter(files), {"incremental": False}, profile))
+
+    assert [file_path for file_path, _ in results] == [file_path for file_path, _ in files]
+    assert [result.file for _, result in results] == [file_path for file_path, _ in files]
+    assert [index for index, (_, result) in enumerate(results) if result.malware_detected] == list(range(0, 40, 7))
+
+def test_parallel_and_serial_directory_scans_agree(engine, tmp_path):
+    target = tmp_path / "scan"
+    for index in range(30):
+        directory = target / f"dir{index % 4}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"f{index}.bin").write_bytes(b"hello" if index % 5 == 0 else os.urandom(100))
+
+    reports = []
+    for workers in (1, 8):
+        success, message = engine.scan_directory(str(target), {"profile": "full", "workers": workers,
+                                                               "batch_size": 2, "incremental": False})
+        assert success, message
+        reports.append([(result.file, result.malware_detected) for result in engine.scan_results])
+    assert reports[0] == reports[1]
+    assert sum(detected for _, detected in reports[0]) == 6
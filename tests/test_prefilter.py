@@ -0,0 +1,75 @@
+import hashlib
+import os
+
+import pytest
+
+from src.database import add_malware_hash
+from src.hashing import PREHASH_SPAN, compute_prehash, prehash_bytes
+
+def _corpus(root, samples):
+    root.mkdir()
+    contents = list(samples) + [b"hellp", b"abc124", b"x" * 3000, b"clean file", b"", os.urandom(5000)]
+    for index, data in enumerate(contents):
+        (root / f"f{index:02d}.bin").write_bytes(data)
+    return str(root)
+
+def _scan(engine, target, monkeypatch, **options):
+    reads = []
+    original = engine._read_file
+    def counting_read(file_path, *args):
+        reads.append(os.path.basename(file_path))
+        return original(file_path, *args)
+    monkeypatch.setattr(engine, "_read_file", counting_read)
+    success, message = engine.scan_directory(target, dict({"profile": "quick", "incremental": False}, **options))
+    monkeypatch.setattr(engine, "_read_file", original)
+    assert success, message
+    return [(result.file, result.malware_detected, result.malware_info) for result in engine.scan_results], reads
+
+def test_size_prefilter_gives_the_same_verdicts_as_full_hashing(engine, tmp_path, monkeypatch):
+    sample = b"y" * 3000 + b"!"
+    assert add_malware_hash(hashlib.md5(sample).hexdigest(), "Sized sample", 9, file_size=len(sample))
+    target = _corpus(tmp_path / "scan", [b"hello", b"abc123", sample])
+
+    full, full_reads = _scan(engine, target, monkeypatch, size_prefilter=False)
+    prefiltered, reads = _scan(engine, target, monkeypatch, prehash=False)
+
+    assert prefiltered == full
+    assert [info for _, detected, info in full if detected] == ["Another test signature", "Test malware signature",
+                                                                 "Sized sample", "Empty file"]
+    assert len(full_reads) == 9
+    # Seuls les fichiers ayant la taille d'une signature sont lus
+    assert sorted(reads) == ["f00.bin", "f01.bin", "f02.bin", "f03.bin", "f04.bin", "f07.bin"]
+
+def test_signature_without_size_disables_the_size_prefilter(engine, tmp_path, monkeypatch):
+    assert add_malware_hash(hashlib.md5(b"x" * 3000).hexdigest(), "Unsized sample", 4)
+    target = _corpus(tmp_path / "scan", [])
+
+    verdicts, reads = _scan(engine, target, monkeypatch, prehash=False)
+
+    assert len(reads) == 6
+    assert [info for _, detected, info in verdicts if detected] == ["Unsized sample", "Empty file"]
+
+@pytest.mark.parametrize("size", [0, 1, PREHASH_SPAN - 1, PREHASH_SPAN, PREHASH_SPAN + 1, 2 * PREHASH_SPAN,
+                                  2 * PREHASH_SPAN + 1, 5 * PREHASH_SPAN + 7])
+def test_prehash_of_a_file_and_of_its_bytes_agree(tmp_path, size):
+    data = os.urandom(size)
+    (tmp_path / "sample").write_bytes(data)
+    assert compute_prehash(str(tmp_path / "sample")) == prehash_bytes(data)
+
+def test_prehash_gives_the_same_verdicts_as_full_hashing(engine, tmp_path, monkeypatch):
+    sample = os.urandom(4 * PREHASH_SPAN)
+    assert add_malware_hash(hashlib.md5(sample).hexdigest(), "Large sample", 8, file_size=len(sample),
+                            prehash=prehash_bytes(sample))
+    middle = len(sample) // 2
+    same_ends = sample[:middle] + bytes([sample[middle] ^ 1]) + sample[middle + 1:]
+    target = _corpus(tmp_path / "scan", [sample, same_ends, os.urandom(len(sample)), b"hello"])
+
+    full, _ = _scan(engine, target, monkeypatch, size_prefilter=False)
+    prefiltered, reads = _scan(engine, target, monkeypatch)
+
+    assert prefiltered == full
+    assert [info for _, detected, info in full if detected] == ["Large sample", "Another test signature",
+                                                                 "Empty file"]
+    # Même taille mais début ou fin différents: pas de lecture complète; seule la collision de préhachage est lue
+    assert "f02.bin" not in reads
+    assert {"f00.bin", "f01.bin", "f03.bin"} <= set(reads)
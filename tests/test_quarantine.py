@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import zlib
+
+from src.quarantine import QuarantineStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_crash_before_indexing_is_recovered_on_next_start(database, tmp_path):
+    sample = tmp_path / "dropper.exe"
+    sample.write_bytes(b"malicious payload" * 100)
+    os.chmod(sample, 0o640)
+    quarantine_root = tmp_path / "quarantine"
+
+    # Processus arrêté net entre le renommage dans staging et l'insertion dans l'index
+    crash = textwrap.dedent(f"""
+        import os
+        from src import quarantine
+        quarantine.add_quarantine_item = lambda *args: os._exit(3)
+        quarantine.QuarantineStore({str(quarantine_root)!r}).quarantine({str(sample)!r}, "Test.Crash", 8)
+    """)
+    process = subprocess.run([sys.executable, "-c", crash], cwd=ROOT,
+                             env=dict(os.environ, PYTHONPATH=ROOT))
+    assert process.returncode == 3
+    assert not sample.exists()
+    assert len(os.listdir(quarantine_root / "staging")) == 2
+
+    store = QuarantineStore(str(quarantine_root))
+    assert os.listdir(quarantine_root / "staging") == []
+    (item,) = store.list_items()
+    assert item["original_path"] == str(sample) and item["verdict"] == "Test.Crash"
+
+    assert store.restore(item["id"]) == (True, str(sample))
+    assert sample.read_bytes() == b"malicious payload" * 100
+    assert oct(os.stat(sample).st_mode & 0o777) == oct(0o640)
+
+def test_identical_files_share_one_object_until_purged(database, tmp_path):
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    paths = []
+    for name, data in (("a.exe", b"same payload" * 500), ("b.exe", b"same payload" * 500), ("c.exe", b"other")):
+        (tmp_path / name).write_bytes(data)
+        paths.append(str(tmp_path / name))
+
+    results = store.quarantine_many([(path, "Test.Shared", 6) for path in paths])
+    assert [(path, success) for path, success, _ in results] == [(path, True) for path in paths]
+    assert not any(os.path.exists(path) for path in paths)
+    items = {item["original_path"]: item for item in store.list_items()}
+    assert items[paths[0]]["sha256"] == items[paths[1]]["sha256"] != items[paths[2]]["sha256"]
+    shared_object = store.object_path(items[paths[0]]["sha256"])
+    assert items[paths[0]]["stored_size"] < items[paths[0]]["size"]
+
+    # Restauration: l'objet reste tant qu'un autre élément le référence
+    assert store.restore(items[paths[0]]["id"]) == (True, paths[0])
+    assert (tmp_path / "a.exe").read_bytes() == b"same payload" * 500
+    assert os.path.exists(shared_object)
+    assert store.restore(items[paths[0]]["id"])[0] is False
+
+    assert store.purge([items[paths[1]]["id"]]) == 1
+    assert not os.path.exists(shared_object)
+    assert [item["original_path"] for item in store.list_items()] == [paths[2]]
+
+def test_restore_refuses_existing_destination_and_corrupted_objects(database, tmp_path):
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    sample = tmp_path / "tool.bin"
+    sample.write_bytes(b"payload")
+    success, item_id = store.quarantine(str(sample), "Test.Restore", 3)
+    assert success
+
+    sample.write_bytes(b"new file")
+    assert store.restore(item_id) == (False, f"{sample} existe déjà")
+    assert store.restore(item_id, destination=str(tmp_path / "copy.bin")) == (True, str(tmp_path / "copy.bin"))
+    assert (tmp_path / "copy.bin").read_bytes() == b"payload"
+
+    success, item_id = store.quarantine(str(sample), "Test.Restore", 3)
+    object_path = store.object_path(store.list_items()[0]["sha256"])
+    with open(object_path, "wb") as f:
+        f.write(zlib.compress(b"tampered"))
+    success, message = store.restore(item_id)
+    assert not success and "corrompu" in message
+    assert not sample.exists() and os.listdir(tmp_path / "quarantine" / "staging") == []
+    assert store.list_items()[0]["id"] == item_id
+
+def test_purge_older_than(database, tmp_path):
+    store = QuarantineStore(str(tmp_path / "quarantine"))
+    ids = []
+    for name in ("old.bin", "new.bin"):
+        (tmp_path / name).write_bytes(name.encode())
+        ids.append(store.quarantine(str(tmp_path / name))[1])
+    conn = sqlite3.connect(database)
+    conn.execute("UPDATE quarantine_items SET quarantined_at = datetime('now', '-40 days') WHERE id = ?", (ids[0],))
+    conn.commit()
+    conn.close()
+
+    assert store.purge(older_than_days=30) == 1
+    assert [item["id"] for item in store.list_items()] == [ids[1]]
+    assert store.purge() == 1 and store.list_items() == []
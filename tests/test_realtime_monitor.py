@@ -0,0 +1,47 @@
+from src.quarantine import QuarantineStore
+from src.realtime_monitor import EventDebouncer
+from src.scan_result import ScanResult
+
+def test_debouncer_waits_for_quiet_period_then_returns_by_priority():
+    debouncer = EventDebouncer(delay=0.5, max_delay=5.0)
+    debouncer.touch("/low", 2, now=0.0)
+    debouncer.touch("/high", 0, now=0.1)
+    debouncer.touch("/low", 2, now=0.3)
+
+    assert debouncer.pop_ready(0.6) == []
+    assert debouncer.pop_ready(0.8) == [(0, "/high"), (2, "/low")]
+    assert debouncer.pending == {}
+
+def test_debouncer_max_delay_limit_and_discard():
+    debouncer = EventDebouncer(delay=0.5, max_delay=2.0)
+    for tick in range(30):
+        debouncer.touch("/busy", 1, now=tick * 0.1)
+    debouncer.touch("/gone", 0, now=0.0)
+    debouncer.discard("/gone")
+    for index in range(3):
+        debouncer.touch(f"/idle{index}", 1, now=0.0)
+
+    # /busy est réécrit sans pause mais sort au plus tard max_delay après le premier événement
+    assert debouncer.pop_ready(2.0, limit=2) == [(1, "/busy"), (1, "/idle0")]
+    assert debouncer.pop_ready(2.0) == [(1, "/idle1"), (1, "/idle2")]
+    assert debouncer.pop_ready(10.0) == []
+
+def test_realtime_detections_do_not_touch_scan_counters(engine, tmp_path):
+    sample = tmp_path / "dropped.exe"
+    sample.write_bytes(b"payload")
+    engine.quarantine_store = QuarantineStore(str(tmp_path / "quarantine"))
+    success, _ = engine.start_realtime_protection([str(tmp_path)])
+    assert success
+    try:
+        detection = ScanResult(str(sample), malware_detected=True, malware_info="Test.Realtime", risk_level=8)
+        engine.realtime_monitor.on_result(detection)
+        engine.realtime_monitor.on_result(ScanResult(str(tmp_path / "clean.txt")))
+    finally:
+        engine.stop_realtime_protection()
+
+    assert engine.threats == [] and engine.threats_detected == 0
+    assert engine.get_realtime_threats() == [detection]
+
+    assert engine.cleanup_system() == (1, 0)
+    assert not sample.exists()
+    assert engine.get_realtime_threats() == []
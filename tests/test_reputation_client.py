@@ -0,0 +1,54 @@
+import hashlib
+
+from src.reputation_client import LocalReputationServer, ReputationClient
+
+MALWARE_MD5 = "44d88612fea8a8f36de82e1278abb02f"
+CLEAN_MD5 = "d41d8cd98f00b204e9800998ecf8427e"
+
+def test_rate_limited_batches_are_retried_without_tripping_the_breaker():
+    server = LocalReputationServer({MALWARE_MD5: ("EICAR", 9)}, throttle_requests=3).start()
+    client = ReputationClient(server.url, throttle_backoff=0.01)
+    try:
+        verdicts = client.lookup_many([MALWARE_MD5, CLEAN_MD5])
+        assert verdicts[MALWARE_MD5] == {"malware_name": "EICAR", "risk_level": 9}
+        assert verdicts[CLEAN_MD5] == {"malware_name": None, "risk_level": 0}
+        assert server.requests == 4
+    finally:
+        client.close()
+        server.stop()
+
+    stats = client.get_stats()
+    assert stats["throttled"] == 3
+    assert stats["failures"] == 0
+    assert stats["breaker"] == "closed"
+
+def test_persistent_rate_limit_gives_an_uncached_error_verdict():
+    server = LocalReputationServer(throttle_requests=100).start()
+    client = ReputationClient(server.url, throttle_retries=2, throttle_backoff=0.01)
+    try:
+        verdict = client.lookup(CLEAN_MD5)
+        assert "429" in verdict["error"]
+        assert server.requests == 3
+    finally:
+        client.close()
+        server.stop()
+
+    assert client.get_stats()["cached_verdicts"] == 0
+    assert client.breaker.state == "closed"
+
+def test_cloud_verdict_uses_the_service_risk_level(engine, tmp_path):
+    sample = tmp_path / "sample.bin"
+    sample.write_bytes(b"reported by the reputation service")
+    md5 = hashlib.md5(sample.read_bytes()).hexdigest()
+    server = LocalReputationServer({md5: ("Cloud.Family", 6)}).start()
+    engine.reputation_client = ReputationClient(server.url)
+    try:
+        assert engine.check_server_connection()
+        result = engine.scan_file(str(sample), {"profile": "quick", "cloud_scan": True, "incremental": False})
+    finally:
+        engine.reputation_client.close()
+        server.stop()
+
+    assert result.cloud_reputation == {"malware_name": "Cloud.Family", "risk_level": 6}
+    assert result.malware_detected and result.risk_level == 6
+    assert "Cloud.Family" in result.malware_info
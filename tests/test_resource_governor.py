@@ -0,0 +1,23 @@
+import threading
+
+from src.resource_governor import ResourceGovernor
+
+def test_background_priority_applies_to_a_single_worker(engine, tmp_path, monkeypatch):
+    target = tmp_path / "scan"
+    target.mkdir()
+    for index in range(3):
+        (target / f"file{index}.bin").write_bytes(b"data %d" % index)
+
+    configured = []
+    monkeypatch.setattr(ResourceGovernor, "configure_thread", lambda self: configured.append(threading.current_thread()))
+    scanned = []
+    original = engine._scan_batch
+    def scan_batch(*args):
+        scanned.append(threading.current_thread())
+        return original(*args)
+    monkeypatch.setattr(engine, "_scan_batch", scan_batch)
+
+    success, message = engine.scan_directory(str(target), {"profile": "background", "workers": 1})
+    assert success, message
+    assert configured and threading.main_thread() not in configured
+    assert set(scanned) <= set(configured)
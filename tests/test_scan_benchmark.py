@@ -0,0 +1,58 @@
+import hashlib
+import importlib.util
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("scan_benchmark", os.path.join(ROOT, "benchmarks", "scan_benchmark.py"))
+scan_benchmark = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(scan_benchmark)
+
+SCALE = 0.01
+
+def _digests(corpus_dir):
+    files = {}
+    for directory, _, names in os.walk(os.path.join(corpus_dir, "files")):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, corpus_dir)] = hashlib.md5(f.read()).hexdigest()
+    return files
+
+def test_corpus_is_reproducible(tmp_path):
+    first = scan_benchmark.generate_corpus(str(tmp_path / "a"), seed=7, scale=SCALE)
+    second = scan_benchmark.generate_corpus(str(tmp_path / "b"), seed=7, scale=SCALE)
+    other = scan_benchmark.generate_corpus(str(tmp_path / "c"), seed=8, scale=SCALE)
+
+    assert first == second
+    assert _digests(tmp_path / "a") == _digests(tmp_path / "b") != _digests(tmp_path / "c")
+    assert first["file_count"] == len(_digests(tmp_path / "a"))
+    assert len(first["signatures"]) == first["counts"]["planted"] == len(first["planted"])
+
+    # Corpus existant réutilisé avec les mêmes paramètres, refusé avec d'autres
+    assert scan_benchmark.generate_corpus(str(tmp_path / "a"), seed=7, scale=SCALE) == first
+    with pytest.raises(SystemExit):
+        scan_benchmark.generate_corpus(str(tmp_path / "a"), seed=8, scale=SCALE)
+
+def test_full_profile_finds_every_planted_sample(tmp_path, monkeypatch):
+    # run_profile choisit sa propre base: DATABASE_FILE restaurée après le test
+    monkeypatch.setenv("DATABASE_FILE", str(tmp_path / "unused.db"))
+    manifest = scan_benchmark.generate_corpus(str(tmp_path / "corpus"), scale=SCALE)
+
+    result = scan_benchmark.run_profile(str(tmp_path / "corpus"), "full", latency_sample=5)
+
+    assert result["threats_detected"] == result["planted_samples"] == len(manifest["planted"])
+    assert result["files_scanned"] >= manifest["file_count"]
+    assert result["latency_samples"] == 5 and result["latency_p50_ms"] <= result["latency_p99_ms"]
+
+def test_compare_with_baseline():
+    baseline = {"results": [{"profile": "quick", "files_per_second": 1000, "latency_p99_ms": 2.0, "peak_rss_mb": 50}]}
+    report = {"results": [{"profile": "quick", "files_per_second": 850, "latency_p99_ms": 2.1, "peak_rss_mb": None},
+                          {"profile": "full", "files_per_second": 10}]}
+
+    regressions = scan_benchmark.compare_with_baseline(report, baseline, tolerance=0.10)
+
+    assert regressions == ["quick: files_per_second 1000 -> 850 (-15.0%)"]
+    assert report["results"][0]["baseline"]["latency_p99_ms"] == {"baseline": 2.0, "change": 0.05}
+    assert "baseline" not in report["results"][1]
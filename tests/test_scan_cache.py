@@ -0,0 +1,84 @@
+import os
+import hashlib
+
+from src.database import add_malware_hash
+
+def test_signature_added_between_two_scans_on_the_same_engine(engine, tmp_path):
+    sample = tmp_path / "sample.bin"
+    sample.write_bytes(b"not yet known as malware")
+    options = {"profile": "full"}
+
+    assert not engine.scan_file(str(sample), options).malware_detected
+
+    add_malware_hash(hashlib.md5(sample.read_bytes()).hexdigest(), "Late.Signature", 7)
+
+    result = engine.scan_file(str(sample), options)
+    assert result.malware_detected
+    assert result.malware_info == "Late.Signature"
+
+def test_signature_added_between_directory_and_file_scans(engine, tmp_path):
+    target = tmp_path / "scan"
+    target.mkdir()
+    sample = target / "sample.bin"
+    sample.write_bytes(b"another unknown sample")
+
+    success, _ = engine.scan_directory(str(target), {"profile": "full"})
+    assert success and engine.threats_detected == 0
+
+    add_malware_hash(hashlib.md5(sample.read_bytes()).hexdigest(), "Late.Signature", 7)
+
+    assert engine.scan_file(str(sample), {"profile": "full"}).malware_detected
+
+def test_file_vanishing_before_its_scan_gives_an_error_result(engine, tmp_path):
+    missing = tmp_path / "vanished.bin"
+    for options in ({"profile": "full"}, {"profile": "quick", "incremental": False}):
+        result = engine.scan_file(str(missing), options)
+        assert result.file == str(missing)
+        assert result.error is not None and not result.malware_detected
+
+def test_stale_verdicts_are_ignored_at_lookup_without_a_purge(database, tmp_path):
+    from src.database import ScanCache, get_db_connection
+    sample = tmp_path / "sample.bin"
+    sample.write_bytes(b"cached")
+    file_stat = os.stat(sample)
+
+    cache = ScanCache()
+    assert cache.open()
+    version = cache.signature_version
+    cache.store(file_stat, {"md5": "a" * 32}, {"malware_detected": False})
+    cache.flush()
+
+    assert cache.open()
+    cache.set_signature_version(version + 1)
+    entry = cache.lookup(file_stat)
+    assert entry["digests"] == {"md5": "a" * 32} and entry["verdict"] is None
+    cache.close()
+
+    conn = get_db_connection()
+    assert conn.execute("SELECT signature_version FROM scan_cache").fetchone()[0] == version
+    conn.close()
+
+def test_concurrent_first_use_opens_a_single_cache(engine, monkeypatch):
+    import threading
+    from src import antivirus_engine
+    opened = []
+    barrier = threading.Barrier(8)
+
+    class CountingCache(antivirus_engine.ScanCache):
+        def open(self):
+            opened.append(self)
+            return super().open()
+
+    monkeypatch.setattr(antivirus_engine, "ScanCache", CountingCache)
+    caches = []
+    def first_use():
+        barrier.wait()
+        caches.append(engine.get_scan_cache())
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(opened) == 1
+    assert all(cache is opened[0] for cache in caches)
@@ -0,0 +1,57 @@
+import os
+
+from src.database import get_scan_checkpoint
+
+OPTIONS = {"incremental": False, "checkpoint_interval": 0}
+
+def _target(tmp_path):
+    target = tmp_path / "scan"
+    for index in range(20):
+        directory = target / f"dir{index // 6}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"f{index:02d}.bin").write_bytes(b"hello" if index % 3 == 0 else b"clean %d" % index)
+    return str(target)
+
+def test_interrupted_scan_resumes_after_the_last_finished_file(engine, tmp_path):
+    target = _target(tmp_path)
+    full = [result.file for result in engine.iter_scan(target, OPTIONS)]
+    assert get_scan_checkpoint(os.path.abspath(target)) is None
+
+    scan = engine.iter_scan(target, OPTIONS)
+    first = [next(scan).file for _ in range(8)]
+    scan.close()
+
+    checkpoint = get_scan_checkpoint(os.path.abspath(target))
+    # Le dernier fichier produit n'est pas considéré terminé: il sera rescanné
+    assert checkpoint["watermark"] == first[-2]
+    assert checkpoint["files_scanned"] == checkpoint["files_walked"] == 7
+    assert checkpoint["threats_detected"] == 3 and len(checkpoint["threats"]) == 3
+
+    resumed = [result.file for result in engine.iter_scan(target, dict(OPTIONS, resume=True))]
+
+    assert first[:-1] + resumed == full
+    assert engine.files_scanned == 20 and engine.threats_detected == 7
+    assert sorted(threat.file for threat in engine.threats) == sorted(full[::3])
+    assert get_scan_checkpoint(os.path.abspath(target)) is None
+
+def test_failed_scan_directory_keeps_its_checkpoint(engine, tmp_path):
+    target = _target(tmp_path)
+    full = [result.file for result in engine.iter_scan(target, OPTIONS)]
+    seen = []
+    def crash(progress, file_path, result):
+        seen.append(file_path)
+        if len(seen) == 12:
+            raise RuntimeError("arrêt du processus")
+
+    success, _ = engine.scan_directory(target, OPTIONS, progress_callback=crash)
+    assert not success
+    assert get_scan_checkpoint(os.path.abspath(target))["watermark"] == seen[-2]
+
+    success, message = engine.scan_directory(target, dict(OPTIONS, resume=True))
+    assert success, message
+    assert seen == full[:12]
+    assert [result.file for result in engine.scan_results] == full[11:]
+
+def test_resume_without_checkpoint_scans_everything(engine, tmp_path):
+    target = _target(tmp_path)
+    assert len(list(engine.iter_scan(target, dict(OPTIONS, resume=True)))) == 20
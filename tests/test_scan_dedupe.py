@@ -0,0 +1,83 @@
+import hashlib
+import os
+
+from src.database import add_malware_hash
+
+def _write(path, data, mtime_ns):
+    path.write_bytes(data)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_copy_differing_only_in_the_middle_is_not_deduplicated(engine, tmp_path):
+    target = tmp_path / "scan"
+    target.mkdir()
+    clean = os.urandom(400 * 1024)
+    middle = len(clean) // 2
+    tampered = clean[:middle] + b"X" * 10 + clean[middle + 10:]
+    mtime_ns = 1600000000 * 10 ** 9
+    _write(target / "a_clean.bin", clean, mtime_ns)
+    _write(target / "b_tampered.bin", tampered, mtime_ns)
+    add_malware_hash(hashlib.md5(tampered).hexdigest(), "Tampered.Copy", 8)
+
+    success, _ = engine.scan_directory(str(target), {"profile": "full", "dedupe_content": True})
+    assert success
+    results = {os.path.basename(result.file): result for result in engine.scan_results}
+    assert results["b_tampered.bin"].malware_detected
+    assert results["b_tampered.bin"].to_dict()["hash_md5"] == hashlib.md5(tampered).hexdigest()
+    assert not results["a_clean.bin"].malware_detected
+
+    # Le cache incrémental ne contient que les condensats propres à chaque fichier
+    success, _ = engine.scan_directory(str(target), {"profile": "full", "dedupe": False})
+    assert success
+    results = {os.path.basename(result.file): result for result in engine.scan_results}
+    assert results["b_tampered.bin"].malware_detected
+
+def test_identical_copies_share_one_read(engine, tmp_path):
+    target = tmp_path / "scan"
+    target.mkdir()
+    data = os.urandom(300 * 1024)
+    (target / "a.bin").write_bytes(data)
+    (target / "b.bin").write_bytes(data)
+    add_malware_hash(hashlib.md5(data).hexdigest(), "Shared.Copy", 8)
+
+    success, _ = engine.scan_directory(str(target), {"profile": "full", "dedupe_content": True, "workers": 1})
+    assert success
+    assert engine.threats_detected == 2
+    assert engine.get_scan_report()["deduplicated"]["content_hits"] == 1
+
+def test_hard_links_share_one_read_and_release_their_entry(engine, tmp_path):
+    target = tmp_path / "scan"
+    target.mkdir()
+    data = os.urandom(64 * 1024)
+    (target / "a.bin").write_bytes(data)
+    os.link(target / "a.bin", target / "b.bin")
+    (target / "single.bin").write_bytes(os.urandom(1024))
+    add_malware_hash(hashlib.md5(data).hexdigest(), "Linked.Copy", 8)
+
+    success, _ = engine.scan_directory(str(target), {"profile": "full", "workers": 1})
+    assert success
+    assert engine.threats_detected == 2
+    stats = engine.get_scan_report()["deduplicated"]
+    # Lien unique non suivi, entrée des liens physiques libérée après le dernier lien
+    assert stats["inode_hits"] == 1
+    assert stats["tracked"] == 0
+
+def test_single_link_inodes_are_only_tracked_for_bind_mounts():
+    from src.scan_dedupe import ScanDeduplicator
+
+    class Stat:
+        st_dev, st_ino, st_nlink, st_size = 1, 42, 1, 10
+
+    reads = []
+    def read():
+        reads.append(1)
+        return {"md5": "x"}, {}
+
+    plain = ScanDeduplicator()
+    plain.read_once("/a", Stat, read)
+    plain.read_once("/b", Stat, read)
+    assert len(reads) == 2 and plain.get_stats()["tracked"] == 0
+
+    bind_mounts = ScanDeduplicator(all_inodes=True, max_entries=1)
+    assert bind_mounts.read_once("/a", Stat, read) == (({"md5": "x"}, {}), False)
+    assert bind_mounts.read_once("/mnt/a", Stat, read) == (({"md5": "x"}, {}), True)
+    assert len(reads) == 3 and bind_mounts.get_stats()["tracked"] == 1
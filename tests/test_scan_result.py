@@ -0,0 +1,62 @@
+import hashlib
+
+import pytest
+
+from src.scan_result import ScanResult, ScanResultSet
+
+def _legacy(index):
+    data = b"file %d" % index
+    return {
+        "file": f"/data/file{index}.bin",
+        "hash_md5": hashlib.md5(data).hexdigest(),
+        "hash_sha1": hashlib.sha1(data).hexdigest() if index % 2 else None,
+        "hash_sha256": hashlib.sha256(data).hexdigest(),
+        "malware_detected": index % 3 == 0,
+        "malware_info": "Test malware signature" if index % 3 == 0 else None,
+        "risk_level": 5 if index % 3 == 0 else 0,
+        "content_matches": [],
+        "behavior_analysis": {"score": 0, "reasons": [], "suspicious": False},
+        "cloud_reputation": None,
+        "heuristic_analysis": {"entropy": 7.9} if index == 4 else None,
+        "fuzzy_hash": f"3:abc{index}:def",
+        "similarity": None,
+    }
+
+def test_scan_result_dict_view_round_trip():
+    legacy = _legacy(3)
+    result = ScanResult.from_dict(legacy)
+
+    assert result.md5 == bytes.fromhex(legacy["hash_md5"]) and result.sha1 == bytes.fromhex(legacy["hash_sha1"])
+    assert result.to_dict() == legacy
+    assert result["hash_sha256"] == result.get("hash_sha256") == legacy["hash_sha256"]
+    assert "hash_md5" in result and "error" not in result
+    with pytest.raises(KeyError):
+        result["unknown"]
+    with pytest.raises(AttributeError):
+        result.extra = 1
+
+    result["hash_md5"] = None
+    assert result.md5 is None and result["hash_md5"] is None
+
+def test_error_result_keeps_the_old_format():
+    result = ScanResult.from_error("/data/missing", FileNotFoundError("absent"))
+    assert result.to_dict() == {"file": "/data/missing", "error": "absent", "malware_detected": False}
+    assert ScanResult.from_dict(result.to_dict()).to_dict() == result.to_dict()
+
+def test_result_set_round_trip():
+    results = ScanResultSet()
+    rows = [_legacy(index) for index in range(10)]
+    for index, row in enumerate(rows):
+        # Ancien format et ScanResult acceptés
+        results.append(row if index % 2 else ScanResult.from_dict(row))
+    results.append(ScanResult.from_error("/data/unreadable", PermissionError("refusé")))
+
+    assert len(results) == 11
+    assert [result.to_dict() for result in results][:10] == rows
+    assert results[-1].to_dict() == {"file": "/data/unreadable", "error": "refusé", "malware_detected": False}
+    assert [threat.file for threat in results.threats()] == [row["file"] for row in rows if row["malware_detected"]]
+    assert results.summary() == {"files": 11, "threats": 4, "errors": 1, "risk_distribution": {5: 4}}
+    # Sous-résultats identiques partagés entre les lignes
+    assert results[1].behavior_analysis is results[2].behavior_analysis
+    with pytest.raises(IndexError):
+        results[11]
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from src import traversal
+from src.scan_rules import ScanRules
+from src.traversal import DirectoryWalker
+
+def _tree(root):
+    files = {
+        "app/main.py": b"print()",
+        "app/node_modules/lib/index.js": b"x" * 10,
+        "app/node_modules/lib/deep/a.js": b"x" * 10,
+        "backups/2024/dump.sql": b"x" * 10,
+        "images/disk.iso": b"x" * 5000,
+        "images/readme.txt": b"notes",
+        "images/big.bin": b"x" * 3000,
+        "logs/app.log": b"",
+    }
+    for relative, data in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+def _walk(root, monkeypatch, rules):
+    listed = []
+    real_scandir = os.scandir
+    def recording_scandir(path):
+        listed.append(os.path.relpath(path, root))
+        return real_scandir(path)
+    monkeypatch.setattr(traversal.os, "scandir", recording_scandir)
+    walker = DirectoryWalker(str(root), rules=rules)
+    files = [os.path.relpath(path, root) for path, _ in walker]
+    return walker, files, listed
+
+def test_excluded_subtrees_are_never_listed(tmp_path, monkeypatch):
+    _tree(tmp_path)
+    rules = ScanRules.from_options({"exclude": "node_modules, */backups/*, *.iso",
+                                    "max_size": 2048, "min_size": 1})
+
+    walker, files, listed = _walk(tmp_path, monkeypatch, rules)
+
+    assert files == ["app/main.py", "images/readme.txt"]
+    assert "app/node_modules" not in listed and "backups" not in listed
+    assert walker.skip_stats() == {"pattern": 3, "include": 0, "size": 2, "mount_point": 0,
+                                   "directories": 2, "files": 3, "bytes": 3000}
+    assert walker.finished and walker.files_found == 2
+
+def test_include_rules_only_apply_to_files(tmp_path, monkeypatch):
+    _tree(tmp_path)
+    rules = ScanRules(include=["*.js", "*/logs/*"], exclude_regex=[r"/deep/"])
+
+    walker, files, listed = _walk(tmp_path, monkeypatch, rules)
+
+    assert files == ["app/node_modules/lib/index.js", "logs/app.log"]
+    assert "app/node_modules/lib/deep" not in listed
+    assert walker.skip_stats()["include"] == 5
+
+def test_rules_from_options():
+    assert ScanRules.from_options({"incremental": False}) is None
+    assert ScanRules.from_options({"exclude": ["*.iso"]}).exclude_names is not None
+    with pytest.raises(ValueError):
+        ScanRules(exclude_regex=["("])
+
+def test_scan_directory_reports_skipped_entries(engine, tmp_path):
+    _tree(tmp_path / "tree")
+    success, message = engine.scan_directory(str(tmp_path / "tree"), {"incremental": False, "exclude": "node_modules,backups"})
+
+    assert success, message
+    assert engine.files_scanned == 5
+    assert engine.scan_skipped["directories"] == 2
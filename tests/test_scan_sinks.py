@@ -0,0 +1,57 @@
+import json
+import sqlite3
+
+from src.scan_sinks import NdjsonSink, SqliteSink
+
+def _target(tmp_path):
+    target = tmp_path / "scan"
+    for index in range(12):
+        directory = target / f"dir{index % 3}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"f{index:02d}.bin").write_bytes(b"hello" if index % 4 == 0 else b"clean %d" % index)
+    return target
+
+def test_iter_scan_streams_results_to_sinks(engine, tmp_path):
+    target = _target(tmp_path)
+    ndjson = NdjsonSink(str(tmp_path / "out" / "results.ndjson"))
+    sqlite_sink = SqliteSink(str(tmp_path / "out" / "results.db"))
+
+    results = [(result.file, result.malware_detected)
+               for result in engine.iter_scan(str(target), {"incremental": False}, sinks=(ndjson, sqlite_sink))]
+
+    assert len(results) == 12 and engine.files_scanned == 12
+    # Seules les menaces restent en mémoire
+    assert [threat.file for threat in engine.threats] == [file for file, detected in results if detected]
+    assert engine.threats_detected == 3
+
+    with open(tmp_path / "out" / "results.ndjson", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [(line["file"], line["malware_detected"]) for line in lines] == results
+    assert lines[0]["malware_info"] == "Another test signature"
+
+    conn = sqlite3.connect(tmp_path / "out" / "results.db")
+    rows = conn.execute("SELECT file, malware_detected, details FROM scan_results ORDER BY id").fetchall()
+    conn.close()
+    assert [(file, bool(detected)) for file, detected, _ in rows] == results
+    assert [json.loads(details) for _, _, details in rows] == lines
+
+def test_sinks_are_closed_when_the_scan_stops_early(engine, tmp_path):
+    target = _target(tmp_path)
+    ndjson = NdjsonSink(str(tmp_path / "results.ndjson"))
+    sqlite_sink = SqliteSink(str(tmp_path / "results.db"))
+
+    scan = engine.iter_scan(str(target), {"incremental": False, "checkpoint": False}, sinks=(ndjson, sqlite_sink))
+    first = [next(scan) for _ in range(5)]
+    scan.close()
+
+    assert ndjson.file.closed and sqlite_sink.conn is None
+    conn = sqlite3.connect(tmp_path / "results.db")
+    assert conn.execute("SELECT COUNT(*) FROM scan_results").fetchone()[0] == len(first)
+    conn.close()
+
+def test_scan_directory_without_kept_results(engine, tmp_path):
+    success, message = engine.scan_directory(str(_target(tmp_path)), {"incremental": False, "keep_results": False})
+
+    assert success, message
+    assert len(engine.scan_results) == 0
+    assert engine.files_scanned == 12 and len(engine.threats) == 3
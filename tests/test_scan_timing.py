@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+from src import scan_timing
+from src.scan_timing import NULL_SCAN_TIMING, ScanTiming
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_report_aggregates_stages_threads_and_slowest_files(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scan_timing, "perf_counter", clock)
+    timing = ScanTiming(slowest=2)
+
+    def scan_file(name, read_seconds):
+        timings = timing.new_file()
+        started = timing.start()
+        clock.now += read_seconds
+        timing.stop("read", started, timings)
+        timing.file_done(name, timings)
+
+    for name, seconds in (("a", 0.001), ("b", 0.004), ("c", 0.002)):
+        scan_file(name, seconds)
+    worker = threading.Thread(target=scan_file, args=("d", 0.0005))
+    worker.start()
+    worker.join()
+
+    # Vérification groupée d'un lot de quatre fichiers: durée répartie à parts égales
+    contexts = [{"timings": {}} for _ in range(4)]
+    started = timing.start()
+    clock.now += 0.008
+    timing.stop_batch("lookup", started, contexts)
+    assert contexts[0]["timings"]["lookup"] == pytest.approx(0.002)
+
+    report = timing.report()
+    assert list(report["stages"]) == ["read", "lookup"]
+    read = report["stages"]["read"]
+    assert read["calls"] == 4 and read["total_seconds"] == 0.0075 and read["max_ms"] == 4.0
+    assert read["mean_ms"] == 1.875
+    # Seaux en puissances de deux de microsecondes: 500 µs < 0.512 ms, 1 ms et 2 ms < 2.048 ms, 4 ms < 4.096 ms
+    assert read["histogram"] == [[0.512, 1], [1.024, 1], [2.048, 1], [4.096, 1]]
+    assert report["stages"]["lookup"] == {"total_seconds": 0.008, "calls": 4, "mean_ms": 2.0, "max_ms": 2.0,
+                                          "histogram": [[2.048, 4]]}
+    assert [entry["file"] for entry in report["slowest_files"]] == ["b", "c"]
+    assert report["slowest_files"][0] == {"file": "b", "total_ms": 4.0, "stages": {"read": 4.0}}
+    assert report["wall_seconds"] == 0.0155
+
+def test_timing_is_disabled_by_default():
+    assert ScanTiming.from_options({}) is NULL_SCAN_TIMING
+    assert NULL_SCAN_TIMING.report() is None
+    assert ScanTiming.from_options({"timing": True, "timing_slowest": 0}).new_file() is None
+
+def test_scan_directory_timing_report(engine, tmp_path):
+    target = tmp_path / "scan"
+    target.mkdir()
+    for index in range(6):
+        (target / f"f{index}.bin").write_bytes(b"hello" if index == 0 else b"data %d" % index)
+
+    success, message = engine.scan_directory(str(target), {"profile": "full", "incremental": False,
+                                                            "timing": True, "timing_slowest": 3})
+    assert success, message
+    report = engine.timing_report
+    assert report["stages"]["read"]["calls"] == 6 and report["stages"]["lookup"]["calls"] == 6
+    assert len(report["slowest_files"]) == 3
+    assert engine.scan_timing is NULL_SCAN_TIMING
+
+    engine.scan_directory(str(target), {"incremental": False})
+    assert engine.timing_report is None
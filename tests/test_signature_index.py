@@ -0,0 +1,52 @@
+import hashlib
+
+from src import antivirus_engine
+from src.database import add_malware_hash, check_hash
+from src.signature_index import SignatureIndex
+
+def _md5(data):
+    return hashlib.md5(data).hexdigest()
+
+def test_lookups_match_sqlite_with_and_without_bloom_filter(database):
+    sha256 = hashlib.sha256(b"payload").hexdigest()
+    assert add_malware_hash(sha256, "Sha256 signature", 6)
+    candidates = [_md5(b"hello"), _md5(b"abc123"), _md5(b""), sha256, _md5(b"clean"),
+                  hashlib.sha256(b"clean").hexdigest(), "not hex", ""]
+
+    for use_bloom_filter in (False, True):
+        index = SignatureIndex(use_bloom_filter=use_bloom_filter)
+        for hash_value in candidates:
+            assert index.lookup(hash_value) == (check_hash(hash_value) if hash_value else (False, None, 0))
+        assert index.lookup_many(candidates) == {
+            _md5(b"hello"): ("Another test signature", 7),
+            _md5(b"abc123"): ("Test malware signature", 5),
+            _md5(b""): ("Empty file", 1),
+            sha256: ("Sha256 signature", 6),
+        }
+        assert index.required_algorithms() == ("md5", "sha256")
+
+def test_index_reloads_when_signatures_change(database):
+    index = SignatureIndex(refresh_interval=3600)
+    new_hash = _md5(b"new sample")
+    assert index.lookup(new_hash) == (False, None, 0)
+    version = index.version()
+
+    assert add_malware_hash(new_hash, "New sample", 8)
+    assert index.refresh_if_stale()
+
+    assert index.lookup(new_hash) == (True, "New sample", 8)
+    assert index.version() != version
+    assert not index.refresh_if_stale()
+
+def test_scan_uses_the_index_instead_of_sqlite(engine, tmp_path, monkeypatch):
+    def no_sqlite(hash_values):
+        raise AssertionError("requête SQLite par fichier")
+    monkeypatch.setattr(antivirus_engine, "check_hashes", no_sqlite)
+    (tmp_path / "infected.bin").write_bytes(b"hello")
+    (tmp_path / "clean.bin").write_bytes(b"clean")
+
+    infected = engine.scan_file(str(tmp_path / "infected.bin"), {"incremental": False})
+    clean = engine.scan_file(str(tmp_path / "clean.bin"), {"incremental": False})
+
+    assert infected.malware_detected and infected.malware_info == "Another test signature"
+    assert not clean.malware_detected
@@ -0,0 +1,45 @@
+import os
+
+from src import traversal
+from src.traversal import DirectoryWalker
+
+def _tree(root):
+    for relative in ("b/z.txt", "b/a/2.txt", "b/a/1.txt", "a.txt", "c/d/e/f.txt", "c/0.txt", "b.txt"):
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(relative.encode())
+    (root / "empty").mkdir()
+
+def _relative(root, paths):
+    return [os.path.relpath(path, root) for path in paths]
+
+def test_walk_is_depth_first_in_name_order(tmp_path):
+    _tree(tmp_path)
+    walker = DirectoryWalker(str(tmp_path))
+    files = [path for path, _ in walker]
+
+    assert _relative(tmp_path, files) == ["a.txt", "b/a/1.txt", "b/a/2.txt", "b/z.txt", "b.txt",
+                                          "c/0.txt", "c/d/e/f.txt"]
+    assert walker.finished and walker.progress(len(files)) == 100
+
+def test_resume_after_yields_the_rest_of_the_walk(tmp_path):
+    _tree(tmp_path)
+    full = [path for path, _ in DirectoryWalker(str(tmp_path))]
+    for position, resume_after in enumerate(full):
+        resumed = [path for path, _ in DirectoryWalker(str(tmp_path), resume_after=resume_after)]
+        assert resumed == full[position + 1:], resume_after
+
+def test_resume_prunes_directories_before_the_resume_point(tmp_path, monkeypatch):
+    _tree(tmp_path)
+    listed = []
+    real_scandir = os.scandir
+    def recording_scandir(path):
+        listed.append(os.path.relpath(path, tmp_path))
+        return real_scandir(path)
+    monkeypatch.setattr(traversal.os, "scandir", recording_scandir)
+
+    resumed = [path for path, _ in DirectoryWalker(str(tmp_path), resume_after=str(tmp_path / "b" / "z.txt"))]
+
+    assert _relative(tmp_path, resumed) == ["b.txt", "c/0.txt", "c/d/e/f.txt"]
+    # b/a précède le point de reprise: jamais listé
+    assert listed == [".", "b", "c", "c/d", "c/d/e", "empty"]
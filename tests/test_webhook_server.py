@@ -0,0 +1,35 @@
+import stripe
+
+def _metric_value(client, line_prefix):
+    for line in client.get("/metrics").get_data(as_text=True).splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_unexpected_webhook_failure_is_counted(webhook_client, monkeypatch):
+    # Événement sans horodatage: échec inattendu après la vérification de signature
+    monkeypatch.setattr(stripe.Webhook, "construct_event", lambda *args: {"type": "invoice.created"})
+    series = 'samshakkur_webhook_events_total{type="invoice.created",outcome="error"}'
+    before = _metric_value(webhook_client, series)
+
+    response = webhook_client.post("/webhook", data="{}", headers={"Stripe-Signature": "t=1,v1=x"})
+    assert response.status_code == 500
+    assert _metric_value(webhook_client, series) == before + 1
+
+def test_metrics_endpoint_counts_requests_and_cache_lookups(webhook_client):
+    hash_value = "0" * 32
+    requests = 'samshakkur_http_requests_total{method="GET",route="/hash/check/cached/<hash_value>",status="200"}'
+    hits = 'samshakkur_hash_cache_lookups_total{result="hit"}'
+    misses = 'samshakkur_hash_cache_lookups_total{result="miss"}'
+    before = {series: _metric_value(webhook_client, series) for series in (requests, hits, misses)}
+
+    assert webhook_client.get(f"/hash/check/cached/{hash_value}").get_json()["cached"] is False
+    assert webhook_client.get(f"/hash/check/cached/{hash_value}").get_json()["cached"] is True
+
+    response = webhook_client.get("/metrics")
+    assert response.headers["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+    assert _metric_value(webhook_client, requests) == before[requests] + 2
+    assert _metric_value(webhook_client, hits) == before[hits] + 1
+    assert _metric_value(webhook_client, misses) == before[misses] + 1
+    assert _metric_value(webhook_client, 'samshakkur_sqlite_query_duration_seconds_count{operation="SELECT"}') >= 1
+    assert 'le="+Inf"' in response.get_data(as_text=True)